@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory representation of a set of GeoJSON features.
+
+json.load / ijson turn every vertex into a list of two Python floats (about 120 bytes
+per vertex once the list and float objects are counted) and every feature into nested
+dicts. FeatureStore keeps the same features as a few numpy arrays instead:
+
+  coords           (n_vertices, 2) float64, or int32 when quantized
+                   (lon = origin[0] + q * scale, likewise lat)
+  ring_offsets     (n_rings + 1)    vertex range of every ring / linestring / point
+  part_offsets     (n_parts + 1)    ring range of every polygon / line / point part
+  feature_offsets  (n_features + 1) part range of every feature
+  types            (n_features)     shapely geometry type id, -1 for a null geometry
+  records          list of FeatureRecord (__slots__ property rows)
+  other            {feature index: GeoJSON geometry} for the few geometries the ragged
+                   layout cannot hold (GeometryCollection), kept out of line as type 7
+
+This is the layout of shapely's ragged arrays, so polygonal stores convert to and
+from shapely geometries without going through Python lists. That is 16 bytes per vertex
+(8 when quantized), plus a few bytes of offsets per ring.
+
+Usage (standalone, compares memory with the nested-dict representation):
+  python3 feature_store.py path/to/file.geojson [--quantize 1e-7]
+
+Requires: numpy, shapely>=2.0, ijson
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+import tracemalloc
+from array import array
+from itertools import chain
+
+import ijson
+import numpy as np
+import shapely
+from shapely.geometry import mapping, shape
+
+GEOMETRY_TYPES = {'Point': 0, 'LineString': 1, 'Polygon': 3, 'MultiPoint': 4, 'MultiLineString': 5, 'MultiPolygon': 6}
+TYPE_NAMES = {v: k for k, v in GEOMETRY_TYPES.items()}
+POLYGONAL = (-1, 3, 6)
+OUT_OF_LINE = 7
+
+
+class FeatureRecord:
+    """
+    Properties of one feature. The fields every village file carries are slots;
+    anything else goes to `extra`. `keys` is the original key order, a tuple shared
+    by every record with the same schema.
+    """
+
+    FIELDS = ('country_code', 'country', 'province_code', 'province', 'regency_code', 'regency',
+              'district_code', 'district', 'village_code', 'village', 'source', 'date', 'valid_on')
+
+    __slots__ = ('feature_id', 'keys', 'extra') + FIELDS
+
+    def __init__(self, properties=None, feature_id=None, schemas=None):
+        self.feature_id = feature_id
+        self.extra = None
+        for field in self.FIELDS:
+            setattr(self, field, None)
+        if properties is None:
+            self.keys = None
+            return
+        keys = tuple(properties)
+        self.keys = schemas.setdefault(keys, keys) if schemas is not None else keys
+        for key, value in properties.items():
+            if key in self.FIELDS:
+                setattr(self, key, sys.intern(value) if isinstance(value, str) else value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    def properties(self):
+        if self.keys is None:
+            return None
+        return {k: getattr(self, k) if k in self.FIELDS else self.extra[k] for k in self.keys}
+
+    def get(self, key, default=None):
+        if self.keys is None or key not in self.keys:
+            return default
+        return getattr(self, key) if key in self.FIELDS else self.extra[key]
+
+
+class _Builder:
+    """Appends GeoJSON geometries to flat buffers"""
+
+    def __init__(self):
+        self.xy = array('d')
+        self.rings = array('q', [0])
+        self.parts = array('q', [0])
+        self.features = array('q', [0])
+        self.types = array('b')
+        self.records = []
+        self.schemas = {}
+        self.other = {}
+
+    def ring(self, positions):
+        start = len(self.xy)
+        self.xy.extend(chain.from_iterable(positions))
+        if len(self.xy) != start + 2 * len(positions):
+            # Positions with a z (or m) value: keep lon/lat only
+            del self.xy[start:]
+            self.xy.extend(v for p in positions for v in p[:2])
+        self.rings.append(len(self.xy) // 2)
+
+    def part(self, rings):
+        for r in rings:
+            self.ring(r)
+        self.parts.append(len(self.rings) - 1)
+
+    def add(self, feature):
+        geometry = feature.get('geometry')
+        kind = geometry.get('type') if geometry else None
+        coords = geometry.get('coordinates') if geometry else None
+        if kind is None:
+            self.types.append(-1)
+        elif kind not in GEOMETRY_TYPES:
+            self.other[len(self.types)] = geometry
+            self.types.append(OUT_OF_LINE)
+        else:
+            self.types.append(GEOMETRY_TYPES[kind])
+            if kind == 'Point':
+                self.part([[coords]])
+            elif kind in ('LineString', 'Polygon'):
+                self.part([coords] if kind == 'LineString' else coords)
+            else:
+                for c in coords:
+                    self.part([[c]] if kind == 'MultiPoint' else [c] if kind == 'MultiLineString' else c)
+        self.features.append(len(self.parts) - 1)
+        self.records.append(FeatureRecord(feature.get('properties'), feature.get('id'), self.schemas))
+
+    def finish(self, quantize=None):
+        xy = np.frombuffer(self.xy, dtype=np.float64).reshape(-1, 2) if len(self.xy) else np.empty((0, 2))
+        return FeatureStore(xy, np.array(self.rings), np.array(self.parts), np.array(self.features),
+                            np.array(self.types, dtype=np.int8), self.records, quantize=quantize, other=self.other)
+
+
+class FeatureStore:
+    """Features as flat coordinate buffers with ring/part/feature offsets (see module docstring)"""
+
+    def __init__(self, coords, ring_offsets, part_offsets, feature_offsets, types, records, quantize=None,
+                 other=None):
+        self.ring_offsets = np.asarray(ring_offsets, dtype=np.int64)
+        self.part_offsets = np.asarray(part_offsets, dtype=np.int64)
+        self.feature_offsets = np.asarray(feature_offsets, dtype=np.int64)
+        self.types = np.asarray(types, dtype=np.int8)
+        self.records = records
+        self.other = other or {}
+        self.scale = quantize
+        self.origin = (0.0, 0.0)
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        if quantize:
+            self.origin = tuple(np.floor(coords.min(axis=0))) if len(coords) else (0.0, 0.0)
+            q = np.round((coords - self.origin) / quantize)
+            if len(q) and np.abs(q).max() >= 2 ** 31:
+                raise ValueError(f'Coordinates span too much for int32 at scale {quantize}')
+            self.coords = q.astype(np.int32)
+        else:
+            self.coords = coords
+
+    def __len__(self):
+        return len(self.types)
+
+    @classmethod
+    def from_geojson(cls, data, quantize=None):
+        """From a FeatureCollection / Feature dict or any iterable of feature dicts"""
+        if isinstance(data, dict):
+            data = [data] if data.get('type') == 'Feature' else data.get('features') or []
+        builder = _Builder()
+        for feature in data:
+            if isinstance(feature, dict):
+                builder.add(feature)
+        return builder.finish(quantize)
+
+    @classmethod
+    def from_file(cls, path, quantize=None):
+        """Stream a FeatureCollection file with ijson; the nested dicts never exist all at once"""
+        with open(path, 'rb') as f:
+            return cls.from_geojson(ijson.items(f, 'features.item', use_float=True), quantize)
+
+    @classmethod
+    def from_shapely(cls, geoms, records=None, quantize=None):
+        """From an array of shapely geometries (None for null); records default to empty properties"""
+        geoms = np.asarray(geoms, dtype=object)
+        records = records if records is not None else [FeatureRecord({}) for _ in range(len(geoms))]
+        types = np.where(shapely.is_missing(geoms), -1, shapely.get_type_id(geoms)).astype(np.int8)
+        if not np.isin(types, POLYGONAL).all():
+            # Lines, points and collections: through GeoJSON mappings
+            builder = _Builder()
+            for geom, record in zip(geoms, records):
+                builder.add({'geometry': mapping(geom) if geom is not None else None})
+            store = builder.finish(quantize)
+            store.records = list(records)
+            return store
+        parts, part_owner = shapely.get_parts(geoms, return_index=True)
+        rings, ring_owner = shapely.get_rings(parts, return_index=True)
+        coords, vertex_owner = shapely.get_coordinates(rings, return_index=True)
+        offsets = [np.concatenate([[0], np.cumsum(np.bincount(owner, minlength=n))])
+                   for owner, n in ((vertex_owner, len(rings)), (ring_owner, len(parts)), (part_owner, len(geoms)))]
+        return cls(coords, *offsets, types, list(records), quantize=quantize)
+
+    def coordinates(self, start=0, end=None):
+        """(n, 2) float64 lon/lat of vertices start:end, dequantized when needed"""
+        xy = self.coords[start:end]
+        if not self.scale:
+            return xy
+        return np.round(xy * self.scale + self.origin, max(0, math.ceil(-math.log10(self.scale))))
+
+    def vertex_offsets(self):
+        """(n_features + 1) vertex range of every feature"""
+        return self.ring_offsets[self.part_offsets[self.feature_offsets]]
+
+    def bounds(self):
+        """(n_features, 4) [west, south, east, north]; NaN for features without vertices"""
+        out = np.full((len(self), 4), np.nan)
+        starts = self.vertex_offsets()
+        has = np.flatnonzero(starts[1:] > starts[:-1])
+        if len(has):
+            xy = self.coordinates()
+            out[has, :2] = np.minimum.reduceat(xy, starts[has], axis=0)
+            out[has, 2:] = np.maximum.reduceat(xy, starts[has], axis=0)
+        for i, geometry in self.other.items():
+            out[i] = shapely.bounds(self._shape(geometry))
+        return out
+
+    def total_bounds(self):
+        bounds = self.bounds()
+        if np.isnan(bounds).all():
+            return None
+        return (*np.nanmin(bounds[:, :2], axis=0).tolist(), *np.nanmax(bounds[:, 2:], axis=0).tolist())
+
+    @staticmethod
+    def _shape(geometry):
+        try:
+            return shape(geometry)
+        except Exception:
+            return None
+
+    def geometry(self, i):
+        """GeoJSON geometry dict of feature i"""
+        kind = int(self.types[i])
+        if kind < 0:
+            return None
+        if kind == OUT_OF_LINE:
+            return self.other[i]
+        p0, p1 = self.feature_offsets[i], self.feature_offsets[i + 1]
+        rings = self.ring_offsets[self.part_offsets[p0]:self.part_offsets[p1] + 1]
+        # Only this feature's vertices are sliced (and dequantized), relative to its first vertex
+        xy = self.coordinates(rings[0], rings[-1]).tolist()
+        rings = (rings - rings[0]).tolist()
+        parts = []
+        for p in range(p0, p1):
+            r0 = self.part_offsets[p] - self.part_offsets[p0]
+            r1 = self.part_offsets[p + 1] - self.part_offsets[p0]
+            parts.append([xy[rings[r]:rings[r + 1]] for r in range(r0, r1)])
+        name = TYPE_NAMES[kind]
+        if name == 'Point':
+            coords = parts[0][0][0]
+        elif name == 'LineString':
+            coords = parts[0][0]
+        elif name == 'Polygon':
+            coords = parts[0]
+        elif name == 'MultiPoint':
+            coords = [p[0][0] for p in parts]
+        elif name == 'MultiLineString':
+            coords = [p[0] for p in parts]
+        else:
+            coords = parts
+        return {'type': name, 'coordinates': coords}
+
+    def feature(self, i):
+        record = self.records[i]
+        feature = {'type': 'Feature'}
+        if record.feature_id is not None:
+            feature['id'] = record.feature_id
+        feature['properties'] = record.properties()
+        feature['geometry'] = self.geometry(i)
+        return feature
+
+    def iter_features(self):
+        for i in range(len(self)):
+            yield self.feature(i)
+
+    def to_geojson(self):
+        return {'type': 'FeatureCollection', 'features': list(self.iter_features())}
+
+    def write(self, path):
+        """Write as a FeatureCollection, one feature at a time"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"type":"FeatureCollection","features":[')
+            for i, feature in enumerate(self.iter_features()):
+                if i:
+                    f.write(',')
+                json.dump(feature, f, ensure_ascii=False, separators=(',', ':'))
+            f.write(']}')
+
+    def to_shapely(self):
+        """Array of shapely geometries (None for null geometries)"""
+        if not np.isin(self.types, POLYGONAL + (OUT_OF_LINE,)).all():
+            geoms = np.empty(len(self), dtype=object)
+            geoms[:] = [self._shape(g) if g else None for g in map(self.geometry, range(len(self)))]
+            return geoms
+        geoms = shapely.from_ragged_array(shapely.GeometryType.MULTIPOLYGON, self.coordinates(),
+                                          (self.ring_offsets, self.part_offsets, self.feature_offsets))
+        single = self.types == 3
+        geoms[single] = shapely.get_geometry(geoms[single], 0)
+        geoms[self.types < 0] = None
+        for i, geometry in self.other.items():
+            geoms[i] = self._shape(geometry)
+        return geoms
+
+    def simplify(self, tolerance, preserve_topology=True):
+        """New store with every geometry simplified (same records)"""
+        geoms = shapely.simplify(self.to_shapely(), tolerance, preserve_topology=preserve_topology)
+        return FeatureStore.from_shapely(geoms, self.records, quantize=self.scale)
+
+    def memory_usage(self):
+        """Approximate bytes held: coordinate buffer, offset arrays, property records"""
+        offsets = sum(a.nbytes for a in (self.ring_offsets, self.part_offsets, self.feature_offsets, self.types))
+        schemas = {id(r.keys): r.keys for r in self.records if r.keys is not None}
+        props = sum(sys.getsizeof(k) for k in schemas.values())
+        for r in self.records:
+            props += sys.getsizeof(r)
+            if r.extra:
+                props += sys.getsizeof(r.extra) + sum(sys.getsizeof(v) for v in r.extra.values())
+        return {'coordinates': self.coords.nbytes, 'offsets': offsets, 'properties': props}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load a GeoJSON file into a FeatureStore and report memory use')
+    parser.add_argument('file', help='Path to the GeoJSON file')
+    parser.add_argument('--quantize', type=float, default=None, help='Store coordinates as int32 multiples of this (e.g. 1e-7)')
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with open(args.file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    nested, _ = tracemalloc.get_traced_memory()
+    nested_time = time.perf_counter() - started
+    del data
+    tracemalloc.reset_peak()
+
+    base, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    store = FeatureStore.from_file(args.file, args.quantize)
+    compact = tracemalloc.get_traced_memory()[0] - base
+    store_time = time.perf_counter() - started
+    tracemalloc.stop()
+
+    print(f'{len(store)} features, {len(store.coords)} vertices, {len(store.ring_offsets) - 1} rings')
+    print(f'nested dicts: {nested / 1e6:.1f} MB (json.load {nested_time:.2f}s)')
+    print(f'FeatureStore: {compact / 1e6:.1f} MB ({nested / max(compact, 1):.1f}x smaller, '
+          f'ijson {store_time:.2f}s); {store.memory_usage()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -8,16 +8,29 @@ and provides a simple web interface to visualize the data.
 
 import json
 import os
-import geopandas as gpd
+import re
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 import shapely
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory, stream_with_context
+from werkzeug.security import safe_join
 import ijson
 import argparse
 from pathlib import Path
 import logging
 import sys
 
+from region_index import DIST_DIR_RE, PROV_DIR_RE, RegionIndex
+from process_geojson import slugify
+from feature_store import FeatureStore
+from reverse_geocoder import ReverseGeocoder
+from geometry_store import open_store
+from region_attributes import LEVELS, STATS_DIR, AttributeStore
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -26,6 +39,10 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__, static_folder='static')
 
+DATA_DIR = Path(__file__).resolve().parent / 'public' / 'data'
+# Prebuilt memory-mapped geometry store shared by all workers (python3 geometry_store.py build)
+GEOMETRY_STORE = os.environ.get('GEOMETRY_STORE')
+
 class GeoJSONProcessor:
     """Class to handle large GeoJSON files efficiently"""
     
@@ -35,6 +52,9 @@ class GeoJSONProcessor:
         self.simplified_file = None
         self.properties = {}
         self.feature_count = 0
+        self._bounds = None
+        self._index = None
+        self._store = None
         
     def validate_file(self):
         """Check if the file exists and appears to be GeoJSON"""
@@ -126,17 +146,8 @@ class GeoJSONProcessor:
             output_file = self.file_path + ".simplified"
         
         try:
-            # Use geopandas for efficient processing
-            logger.info(f"Loading GeoJSON into GeoPandas (this may take a while for large files)...")
-            gdf = gpd.read_file(self.file_path)
-            
-            # Simplify the geometries
             logger.info(f"Simplifying geometries with tolerance {tolerance}...")
-            gdf['geometry'] = gdf['geometry'].simplify(tolerance)
-            
-            # Save to file
-            logger.info(f"Saving simplified GeoJSON to {output_file}...")
-            gdf.to_file(output_file, driver='GeoJSON')
+            self.feature_store().simplify(tolerance).write(output_file)
             
             self.simplified_file = output_file
             logger.info(f"Simplification complete. Original size: {os.path.getsize(self.file_path) / (1024*1024):.2f} MB, " +
@@ -163,22 +174,244 @@ class GeoJSONProcessor:
         
         return samples
     
+    def iter_features(self):
+        """Stream features one by one in file order (constant memory)"""
+        with open(self.file_path, 'rb') as f:
+            yield from ijson.items(f, 'features.item', use_float=True)
+
+    def feature_store(self):
+        """The file's features as a compact FeatureStore, loaded once per file version"""
+        mtime = os.path.getmtime(self.file_path)
+        if self._store and self._store[0] == mtime:
+            return self._store[1]
+        store = FeatureStore.from_file(self.file_path)
+        self._store = (mtime, store)
+        return store
+
+    def feature_index(self):
+        """
+        Every feature pre-serialized with its planar area and bbox centre, built once
+        per file version with ijson, so ordered streams can start immediately.
+        """
+        mtime = os.path.getmtime(self.file_path)
+        if self._index and self._index[0] == mtime:
+            return self._index[1]
+        store = self.feature_store()
+        records = [json.dumps(f, ensure_ascii=False, separators=(',', ':')) for f in store.iter_features()]
+        areas = np.nan_to_num(shapely.area(store.to_shapely()))
+        bounds = store.bounds()
+        centres = np.column_stack([(bounds[:, 0] + bounds[:, 2]) / 2, (bounds[:, 1] + bounds[:, 3]) / 2])
+        index = (records, areas, centres)
+        self._index = (mtime, index)
+        return index
+
+    def stream_geojsonseq(self, order='file', center=None, limit=None):
+        """
+        Yield RFC 8142 records (RS + feature JSON + LF).
+
+        order='file' streams straight from disk; 'largest' (by area) and 'center'
+        (nearest bbox centre to `center` = (lon, lat) first) use feature_index().
+        At most `limit` records are yielded (none for a negative limit) in every order.
+        """
+        if limit is not None:
+            limit = max(limit, 0)
+        if order == 'file':
+            for i, feature in enumerate(self.iter_features()):
+                if limit is not None and i >= limit:
+                    break
+                yield '\x1e' + json.dumps(feature, ensure_ascii=False, separators=(',', ':')) + '\n'
+            return
+
+        records, areas, centres = self.feature_index()
+        if not len(records):
+            return
+        if order == 'center' and center is None:
+            center = (np.nanmin(centres, axis=0) + np.nanmax(centres, axis=0)) / 2
+        if order == 'largest':
+            ranking = np.argsort(-areas, kind='stable')
+        else:
+            distance = np.hypot(centres[:, 0] - center[0], centres[:, 1] - center[1])
+            ranking = np.argsort(np.where(np.isnan(distance), np.inf, distance), kind='stable')
+        for i in ranking[:limit]:
+            yield '\x1e' + records[i] + '\n'
+
     def get_bounds(self):
-        """Get the bounding box of the GeoJSON file"""
+        """Get the bounding box of the GeoJSON file (computed once per file version)"""
         try:
-            gdf = gpd.read_file(self.file_path)
-            bounds = gdf.total_bounds
-            return {
+            mtime = os.path.getmtime(self.file_path)
+            if self._bounds and self._bounds[0] == mtime:
+                return self._bounds[1]
+            bounds = self.feature_store().total_bounds()
+            result = {
                 'west': bounds[0],
                 'south': bounds[1],
                 'east': bounds[2],
                 'north': bounds[3]
             }
+            self._bounds = (mtime, result)
+            return result
         except Exception as e:
             logger.error(f"Error getting bounds: {e}")
             return None
 
 
+def derive_subdistrict_name(file_id):
+    """'id5106020_bangli' -> 'Bangli' (same as deriveSubdistrictName in src/data-loader.ts)"""
+    words = ' '.join(file_id.split('_')[1:]).split(' ')
+    return ' '.join(w[:1].upper() + w[1:] for w in words)
+
+
+def enhance_features(features, subdistrict_id, district_code):
+    """Add the name/code property variants the frontend expects (enhanceFeatures in src/data-loader.ts)"""
+    name = derive_subdistrict_name(subdistrict_id)
+    for feature in features:
+        props = feature.get('properties') or {}
+        for key in ('kecamatan', 'kec_name', 'KECAMATAN', 'NAMA', 'nama', 'name', 'NAME'):
+            props[key] = name
+        for key in ('district_code', 'kab_id', 'kabupaten_id', 'KABUPATEN_ID', 'ID_KABUPATEN'):
+            props[key] = district_code
+        feature['properties'] = props
+    return features
+
+
+class DistrictAssembler:
+    """
+    Assemble a district's kecamatan files into one pre-enhanced, gzipped FeatureCollection.
+
+    Results are kept in a bounded LRU cache keyed by the (mtime, size) of every input
+    file, so an entry is rebuilt as soon as any kecamatan or fallback file changes.
+    Districts without features are cached too (as a None body) so they are not
+    re-read on every request.
+    """
+
+    def __init__(self, data_dir, max_entries=64, regions=None):
+        self.data_dir = Path(data_dir)
+        self.max_entries = max_entries
+        self.regions = regions
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def find_district_dir(self, code):
+        if self.regions is not None:
+            self.regions.refresh()
+            return self.regions.district_dir(code)
+        for prov_dir in self.data_dir.glob(f'id{code[:2]}_*'):
+            if not (prov_dir.is_dir() and PROV_DIR_RE.match(prov_dir.name)):
+                continue
+            for dist_dir in prov_dir.glob(f'id{code}_*'):
+                if dist_dir.is_dir() and DIST_DIR_RE.match(dist_dir.name):
+                    return dist_dir
+        return None
+
+    def input_key(self, dist_dir):
+        key = []
+        for f in sorted(dist_dir.iterdir()):
+            if f.is_file() and f.name.endswith('.geojson'):
+                st = f.stat()
+                key.append((f.name, st.st_mtime_ns, st.st_size))
+        return tuple(key)
+
+    def _read_features(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading {path}: {e}")
+            return []
+        if isinstance(data, dict) and data.get('type') == 'Feature':
+            return [data]
+        return [f for f in (data.get('features') or []) if isinstance(f, dict)] if isinstance(data, dict) else []
+
+    def assemble(self, code, dist_dir):
+        """Build the payload dict: FeatureCollection plus loadedCount/totalCount/source"""
+        fallback = dist_dir / f'{dist_dir.name}.geojson'
+        subdistricts = sorted(f for f in dist_dir.glob('*.geojson') if f != fallback)
+        features = []
+        loaded = 0
+        for f in subdistricts:
+            feats = self._read_features(f)
+            if feats:
+                features.extend(enhance_features(feats, f.stem, code))
+                loaded += 1
+        source = 'subdistricts'
+        if not features and fallback.exists():
+            # Fallback features span several kecamatan; name each after its own one
+            for feature in self._read_features(fallback):
+                props = feature.get('properties') or {}
+                kec_code, kec_name = props.get('district_code'), props.get('district')
+                subdistrict_id = f'{kec_code}_{slugify(kec_name)}' if kec_code and kec_name else fallback.stem
+                features.extend(enhance_features([feature], subdistrict_id, code))
+            source = 'fallback'
+        return {
+            'type': 'FeatureCollection',
+            'features': features,
+            'loadedCount': loaded,
+            'totalCount': len(subdistricts),
+            'source': source,
+        }
+
+    def get(self, code):
+        """Return (gzipped JSON, etag) for a district code such as '5106', or None if unknown"""
+        dist_dir = self.find_district_dir(code)
+        if dist_dir is None:
+            return None
+        key = self.input_key(dist_dir)
+        with self._lock:
+            hit = self._cache.get(code)
+            if hit and hit[0] == key:
+                self._cache.move_to_end(code)
+                return (hit[1], hit[2]) if hit[1] is not None else None
+
+        payload = self.assemble(code, dist_dir)
+        body = etag = None
+        if payload['features']:
+            body = gzip.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+            etag = hashlib.sha1(body).hexdigest()[:16]
+        with self._lock:
+            self._cache[code] = (key, body, etag)
+            self._cache.move_to_end(code)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return (body, etag) if body is not None else None
+
+
+class RegionMetrics:
+    """Label points, areas and bboxes from scripts/build_region_metrics.py, reloaded when the file changes"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.regions = {}
+        self._sig = None
+        self._lock = threading.Lock()
+
+    def get(self, code):
+        try:
+            st = self.path.stat()
+        except OSError:
+            return None
+        sig = (st.st_mtime_ns, st.st_size)
+        if sig != self._sig:
+            with self._lock:
+                if sig != self._sig:
+                    try:
+                        with open(self.path, 'r', encoding='utf-8') as f:
+                            self.regions = json.load(f).get('regions', {})
+                    except (OSError, ValueError) as e:
+                        logger.error(f"Error reading {self.path}: {e}")
+                        return None
+                    self._sig = sig
+        return self.regions.get(re.sub(r'^id', '', code))
+
+
+regions = RegionIndex(DATA_DIR)
+assembler = DistrictAssembler(DATA_DIR, regions=regions)
+geocoder = ReverseGeocoder(regions, open_store(GEOMETRY_STORE, regions) if GEOMETRY_STORE else None)
+attributes = AttributeStore(STATS_DIR, regions)
+metrics = RegionMetrics(DATA_DIR / 'region_metrics.json')
+
+MAX_LOCATE_BATCH = 1000000
+
+
 # Set up the Flask routes
 @app.route('/')
 def index():
@@ -223,6 +456,202 @@ def serve_geojson(filename):
     directory = os.path.dirname(os.path.abspath(processor.file_path))
     return send_from_directory(directory, filename)
 
+@app.route('/api/district/<code>/subdistricts')
+def district_subdistricts(code):
+    """Return a district's kecamatan as one pre-enhanced FeatureCollection (gzip when accepted)"""
+    code = re.sub(r'^id', '', code)
+    if not re.fullmatch(r'\d{4}', code):
+        return jsonify({'error': f'Invalid district code: {code}'}), 400
+
+    result = assembler.get(code)
+    if result is None:
+        return jsonify({'error': f'No data found for district {code}'}), 404
+    body, etag = result
+
+    # Each encoding is its own representation, so it gets its own validator
+    use_gzip = 'gzip' in request.accept_encodings
+    if use_gzip:
+        etag = f'{etag}-gz'
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif use_gzip:
+        response = Response(body, mimetype='application/geo+json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(gzip.decompress(body), mimetype='application/geo+json')
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def region_response(payload, code):
+    if payload is None:
+        return jsonify({'error': f'Unknown region: {code}'}), 404
+    return jsonify(payload)
+
+@app.route('/api/regions')
+def list_regions():
+    """Return all provinces"""
+    regions.refresh()
+    return jsonify([regions.nodes[c] for c in regions.provinces])
+
+@app.route('/api/regions/<code>')
+def region(code):
+    """Return one province, district or kecamatan by code"""
+    regions.refresh()
+    return region_response(regions.get(code), code)
+
+@app.route('/api/regions/<code>/children')
+def region_children(code):
+    """Return the direct children of a region"""
+    regions.refresh()
+    return region_response(regions.children(code), code)
+
+@app.route('/api/regions/<code>/ancestors')
+def region_ancestors(code):
+    """Return the ancestors of a region, province first"""
+    regions.refresh()
+    return region_response(regions.ancestors(code), code)
+
+@app.route('/api/regions/<code>/metrics')
+def region_metrics(code):
+    """Return the precomputed label point, centroid, area, perimeter and bbox of a region"""
+    return region_response(metrics.get(code), code)
+
+@app.route('/api/metrics')
+def region_metrics_batch():
+    """Return precomputed metrics for ?codes=51,5106,... (unknown codes are omitted)"""
+    codes = [c for c in request.args.get('codes', '').split(',') if c.strip()]
+    found = {}
+    for code in codes:
+        entry = metrics.get(code.strip())
+        if entry is not None:
+            found[re.sub(r'^id', '', code.strip())] = entry
+    return jsonify(found)
+
+@app.route('/api/locate')
+def locate():
+    """Return the province/kabupaten/kecamatan (and desa) containing ?lat=&lon="""
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if lat is None or lon is None:
+        return jsonify({'error': 'lat and lon query parameters are required'}), 400
+
+    chain = geocoder.locate(lon, lat)
+    if chain is None:
+        return jsonify({'error': f'No region found at {lat}, {lon}'}), 404
+    return jsonify(chain)
+
+@app.route('/api/locate', methods=['POST'])
+def locate_batch():
+    """
+    Locate many points at once.
+
+    Body: {"points": [[lon, lat], ...]} or {"lon": [...], "lat": [...]}
+    Returns one key per point (village or kecamatan code, null when unmatched)
+    and the admin chain of each distinct key.
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        if 'points' in body:
+            coords = np.asarray(body['points'], dtype=float).reshape(-1, 2)
+            lons, lats = coords[:, 0], coords[:, 1]
+        else:
+            lons = np.asarray(body.get('lon', []), dtype=float)
+            lats = np.asarray(body.get('lat', []), dtype=float)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'points must be [[lon, lat], ...] or lon/lat arrays of numbers'}), 400
+    if lons.shape != lats.shape or lons.ndim != 1:
+        return jsonify({'error': 'lon and lat must be arrays of the same length'}), 400
+    if len(lons) > MAX_LOCATE_BATCH:
+        return jsonify({'error': f'At most {MAX_LOCATE_BATCH} points per request'}), 413
+
+    return jsonify(geocoder.locate_many(lons, lats))
+
+@app.route('/api/attributes')
+def list_attributes():
+    """Return the names of the indicator datasets"""
+    return jsonify(attributes.datasets())
+
+@app.route('/api/attributes/<name>')
+def attribute_payload(name):
+    """
+    Return one indicator dataset as typed-array columns in region order.
+
+    ?parent=<code> selects the children of one region; ?level=province|district|subdistrict
+    (default: the level below parent, or district) selects the level.
+    """
+    parent = request.args.get('parent')
+    level = request.args.get('level')
+    regions.refresh()
+    if parent and not level:
+        node = regions.get(parent)
+        if node is None:
+            return jsonify({'error': f'Unknown region: {parent}'}), 404
+        level = {'province': 'district', 'district': 'subdistrict'}.get(node['level'], 'subdistrict')
+    level = level or 'district'
+    if level not in LEVELS:
+        return jsonify({'error': f'Unknown level: {level} (choose from {", ".join(LEVELS)})'}), 400
+
+    try:
+        result = attributes.payload(name, level, parent)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 422
+    if result is None:
+        return jsonify({'error': f'No dataset {name} for {parent or level}'}), 404
+    body, etag, mtime = result
+
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.last_modified = mtime
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+STREAM_ORDERS = ('file', 'largest', 'center')
+seq_processors = OrderedDict()
+
+@app.route('/geojsonseq/<path:filename>')
+def serve_geojsonseq(filename):
+    """
+    Stream a GeoJSON file as newline-delimited GeoJSON (RFC 8142, application/geo+json-seq).
+
+    ?order=file (default) | largest | center, ?center=lon,lat for order=center
+    (default: centre of the file's extent), ?limit=N
+
+    order=file streams features as they are read. largest/center have to parse and rank
+    the whole file before the first record (cached per file version afterwards), so
+    they are opt-in.
+    """
+    directory = os.path.dirname(os.path.abspath(processor.file_path))
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        return jsonify({'error': f'File not found: {filename}'}), 404
+
+    order = request.args.get('order', 'file')
+    if order not in STREAM_ORDERS:
+        return jsonify({'error': f'Unknown order: {order} (choose from {", ".join(STREAM_ORDERS)})'}), 400
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 0:
+        return jsonify({'error': 'limit must not be negative'}), 400
+
+    # Keep one processor per file so ordered streams reuse its feature index
+    source = seq_processors.pop(path, None) or GeoJSONProcessor(path)
+    seq_processors[path] = source
+    while len(seq_processors) > 8:
+        seq_processors.popitem(last=False)
+
+    center = None
+    if order == 'center' and request.args.get('center'):
+        try:
+            center = tuple(float(v) for v in request.args['center'].split(','))
+        except ValueError:
+            center = ()
+        if len(center) != 2:
+            return jsonify({'error': 'center must be lon,lat'}), 400
+
+    return Response(stream_with_context(source.stream_geojsonseq(order, center, limit)),
+                    mimetype='application/geo+json-seq')
+
 def create_html_template():
     """Create the HTML template for the web interface"""
     templates_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
@@ -341,6 +770,26 @@ def create_html_template():
             return colors[id % colors.length];
         }
 
+        // Read an RFC 8142 GeoJSON text sequence, calling onFeature for every record as it arrives
+        async function streamGeoJSONSeq(url, onFeature) {
+            const response = await fetch(url);
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+            }
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const records = buffer.split('\\x1e');
+                buffer = records.pop();
+                records.filter(r => r.trim()).forEach(r => onFeature(JSON.parse(r)));
+            }
+            if (buffer.trim()) onFeature(JSON.parse(buffer));
+        }
+
         // Load file information
         fetch('/api/file-info')
             .then(response => response.json())
@@ -368,17 +817,19 @@ def create_html_template():
                 // Get the filename from the path
                 const filename = data.file_path.split('/').pop();
                 
-                // Load the GeoJSON data (use simplified if available)
+                // Stream the GeoJSON data (use simplified if available) in file order, so the
+                // first features draw while the rest is still being read; ?order=largest or
+                // ?order=center on this page opts into ranked streams (indexed up front)
+                const order = new URLSearchParams(window.location.search).get('order') || 'file';
                 const geoJsonUrl = data.simplified_file ? 
-                    `/geojson/${data.simplified_file.split('/').pop()}` : 
-                    `/geojson/${filename}`;
+                    `/geojsonseq/${data.simplified_file.split('/').pop()}?order=${order}` : 
+                    `/geojsonseq/${filename}?order=${order}`;
                 
-                // Load the GeoJSON data
-                fetch(geoJsonUrl)
-                    .then(response => response.json())
-                    .then(geoData => {
+                // Load the GeoJSON data, drawing each feature as soon as it arrives
+                Promise.resolve()
+                    .then(() => {
                         // Add GeoJSON layer
-                        const geoJsonLayer = L.geoJSON(geoData, {
+                        const geoJsonLayer = L.geoJSON(null, {
                             style: function(feature) {
                                 return {
                                     weight: 2,
@@ -439,6 +890,7 @@ def create_html_template():
                                 }
                             }
                         }).addTo(map);
+                        return streamGeoJSONSeq(geoJsonUrl, feature => geoJsonLayer.addData(feature));
                     })
                     .catch(error => {
                         console.error('Error loading GeoJSON:', error);
@@ -464,10 +916,29 @@ def main():
                         help='Simplification tolerance (higher = more simplification)')
     parser.add_argument('--port', type=int, default=5000, help='Port for the web server')
     parser.add_argument('--fix', action='store_true', help='Attempt to fix common GeoJSON issues')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR,
+                        help='Directory with the id<prov>_<slug>/ trees served by /api/district (default: public/data)')
+    parser.add_argument('--stats-dir', type=Path, default=STATS_DIR,
+                        help='Directory with indicator CSVs served by /api/attributes (default: stats)')
+    parser.add_argument('--district-cache-size', type=int, default=64,
+                        help='Number of assembled districts kept in memory (default: 64)')
+    parser.add_argument('--geometry-store', type=Path, default=GEOMETRY_STORE,
+                        help='Prebuilt memory-mapped geometry store for /api/locate (see geometry_store.py; '
+                             'default: $GEOMETRY_STORE)')
     
     args = parser.parse_args()
     
-    global processor
+    global processor, assembler, regions, geocoder, attributes, metrics
+    regions = RegionIndex(args.data_dir)
+    logger.info(f"Indexing regions under {args.data_dir}...")
+    regions.refresh(force=True)
+    logger.info(f"Indexed {len(regions.nodes)} regions")
+    assembler = DistrictAssembler(args.data_dir, args.district_cache_size, regions=regions)
+    if geocoder.store is not None:
+        geocoder.store.close()
+    geocoder = ReverseGeocoder(regions, open_store(args.geometry_store, regions) if args.geometry_store else None)
+    attributes = AttributeStore(args.stats_dir, regions)
+    metrics = RegionMetrics(args.data_dir / 'region_metrics.json')
     processor = GeoJSONProcessor(args.file)
     
     # Validate the file
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped geometry store shared by all server worker processes.
+
+Parsing the national kecamatan/village polygons and building an STRtree costs every
+worker process its own copy of the geometries. Instead, `build` writes them once into
+a single binary file, and every worker maps that file read-only (GeometryStore):
+the OS page cache holds one copy for all workers, opening is instant, and a shapely
+geometry is only built from its WKB when a lookup actually needs it (small LRU).
+
+File layout (all sections 8-byte aligned, little-endian):
+  b'GEOSTORE' | uint64 header length | JSON header (sections, kecamatan codes, grid, signature)
+  bboxes         float64 (n, 4)   [west, south, east, north] per geometry
+  wkb_offsets    uint64  (n + 1)  byte ranges into `wkb`
+  wkb            uint8            concatenated WKB
+  kec_index      uint32  (n)      index into header["kecamatan"]
+  village_codes  S16     (n)      village code (empty when the feature has none)
+  name_offsets   uint64  (n + 1)  byte ranges into `names` (UTF-8 village names)
+  names          uint8
+  grid_offsets   uint64  (cells + 1)  CSR index: geometries whose bbox touches each grid cell
+  grid_items     uint32
+
+Usage:
+  python3 geometry_store.py build [--data-dir public/data] [--out .cache/geometry_store.bin] [--cell 0.1]
+  python3 geometry_store.py info [--out .cache/geometry_store.bin]
+
+Build the store before starting the server, then point every worker at it with
+GEOMETRY_STORE=.cache/geometry_store.bin (or --geometry-store). Workers only map the file
+(open_store); when it is missing, unreadable or older than the data, they log a warning
+and fall back to the in-memory index. They never build it themselves.
+
+Requires: shapely>=2.0, numpy, ijson
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import shapely
+
+from feature_store import FeatureStore
+from region_index import DATA_DIR, RegionIndex
+
+ROOT = Path(__file__).resolve().parent
+STORE_FILE = ROOT / '.cache' / 'geometry_store.bin'
+MAGIC = b'GEOSTORE'
+VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def source_signature(regions):
+    """Hash of the (path, mtime, size) of every kecamatan file the store is built from"""
+    h = hashlib.sha256()
+    for code in sorted(c for c, n in regions.nodes.items() if n['level'] == 'subdistrict'):
+        path = regions.data_dir / regions.nodes[code]['path'][len('/data/'):]
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        h.update(f'{code}|{st.st_mtime_ns}|{st.st_size}\n'.encode())
+    return h.hexdigest()[:20]
+
+
+def build_grid(bboxes, cell):
+    """CSR arrays mapping every grid cell to the geometries whose bbox touches it"""
+    x0, y0 = float(bboxes[:, 0].min()), float(bboxes[:, 1].min())
+    nx = int(np.floor((bboxes[:, 2].max() - x0) / cell)) + 1
+    ny = int(np.floor((bboxes[:, 3].max() - y0) / cell)) + 1
+    cx0 = np.floor((bboxes[:, 0] - x0) / cell).astype(np.int64)
+    cx1 = np.floor((bboxes[:, 2] - x0) / cell).astype(np.int64)
+    cy0 = np.floor((bboxes[:, 1] - y0) / cell).astype(np.int64)
+    cy1 = np.floor((bboxes[:, 3] - y0) / cell).astype(np.int64)
+    cells, items = [], []
+    for i in range(len(bboxes)):
+        gx, gy = np.meshgrid(np.arange(cx0[i], cx1[i] + 1), np.arange(cy0[i], cy1[i] + 1))
+        cells.append((gy * nx + gx).ravel())
+        items.append(np.full(gx.size, i, dtype=np.uint32))
+    cells = np.concatenate(cells)
+    items = np.concatenate(items)
+    order = np.argsort(cells, kind='stable')
+    counts = np.bincount(cells, minlength=nx * ny)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.uint64)
+    return {'x0': x0, 'y0': y0, 'cell': cell, 'nx': nx, 'ny': ny}, offsets, items[order]
+
+
+def build_store(regions, out_path, cell=0.1):
+    """Write every village polygon of the indexed kecamatan files to out_path; returns the geometry count"""
+    regions.refresh(force=True)
+    kec_codes = sorted(c for c, n in regions.nodes.items() if n['level'] == 'subdistrict')
+    wkbs, bboxes, kec_index, village_codes, names = [], [], [], [], []
+    for k, code in enumerate(kec_codes):
+        path = regions.data_dir / regions.nodes[code]['path'][len('/data/'):]
+        try:
+            store = FeatureStore.from_file(path)
+        except Exception as e:
+            print(f'[WARN] {path}: {e}')
+            continue
+        geoms = store.to_shapely()
+        keep = np.flatnonzero(~shapely.is_missing(geoms))
+        wkbs.extend(shapely.to_wkb(geoms[keep]).tolist())
+        bboxes.extend(store.bounds()[keep].tolist())
+        kec_index.extend([k] * len(keep))
+        for i in keep.tolist():
+            record = store.records[i]
+            village_codes.append(str(record.get('village_code') or '').replace('id', '', 1).encode()[:16])
+            names.append(str(record.get('village') or '').encode('utf-8'))
+    if not wkbs:
+        raise SystemExit(f'No kecamatan geometries found under {regions.data_dir}')
+
+    bboxes = np.array(bboxes, dtype='<f8')
+    grid, grid_offsets, grid_items = build_grid(bboxes, cell)
+    arrays = OrderedDict([
+        ('bboxes', bboxes),
+        ('wkb_offsets', np.concatenate([[0], np.cumsum([len(w) for w in wkbs])]).astype('<u8')),
+        ('wkb', np.frombuffer(b''.join(wkbs), dtype=np.uint8)),
+        ('kec_index', np.array(kec_index, dtype='<u4')),
+        ('village_codes', np.array(village_codes, dtype='S16')),
+        ('name_offsets', np.concatenate([[0], np.cumsum([len(n) for n in names])]).astype('<u8')),
+        ('names', np.frombuffer(b''.join(names), dtype=np.uint8)),
+        ('grid_offsets', grid_offsets.astype('<u8')),
+        ('grid_items', grid_items.astype('<u4')),
+    ])
+
+    # Section offsets are relative to the end of the header, so they do not depend on its length
+    sections, pos = {}, 0
+    for name, arr in arrays.items():
+        sections[name] = [pos, arr.dtype.str, list(arr.shape)]
+        pos += (arr.nbytes + 7) // 8 * 8
+    header = json.dumps({
+        'version': VERSION,
+        'count': len(wkbs),
+        'kecamatan': kec_codes,
+        'grid': grid,
+        'signature': source_signature(regions),
+        'sections': sections,
+    }).encode('utf-8')
+    header += b' ' * (-len(header) % 8)
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(out_path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        for arr in arrays.values():
+            f.write(arr.tobytes())
+            f.write(b'\0' * (-arr.nbytes % 8))
+    os.replace(tmp, out_path)
+    return len(wkbs)
+
+
+class GeometryStore:
+    """Read-only, memory-mapped view of a file written by build_store()"""
+
+    def __init__(self, path, cache_size=4096):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != MAGIC:
+            raise ValueError(f'{self.path} is not a geometry store')
+        (header_len,) = struct.unpack('<Q', self._mm[8:16])
+        self.header = json.loads(self._mm[16:16 + header_len])
+        if self.header['version'] != VERSION:
+            raise ValueError(f'{self.path}: unsupported store version {self.header["version"]}')
+        base = 16 + header_len
+        for name, (offset, dtype, shp) in self.header['sections'].items():
+            count = int(np.prod(shp)) if shp else 0
+            view = np.frombuffer(self._mm, dtype=np.dtype(dtype), count=count, offset=base + offset)
+            setattr(self, name, view.reshape(shp))
+        self.kecamatan = self.header['kecamatan']
+        self.grid = self.header['grid']
+        self.cache_size = cache_size
+        self._geoms = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def __len__(self):
+        return self.header['count']
+
+    def is_current(self, regions):
+        return self.header.get('signature') == source_signature(regions)
+
+    def geometry(self, i):
+        """Prepared shapely geometry i, built from its WKB on first use"""
+        with self._cache_lock:
+            geom = self._geoms.get(i)
+            if geom is not None:
+                self._geoms.move_to_end(i)
+                return geom
+        start, end = int(self.wkb_offsets[i]), int(self.wkb_offsets[i + 1])
+        geom = shapely.from_wkb(self.wkb[start:end].tobytes())
+        shapely.prepare(geom)
+        with self._cache_lock:
+            self._geoms[i] = geom
+            while len(self._geoms) > self.cache_size:
+                self._geoms.popitem(last=False)
+        return geom
+
+    def kecamatan_code(self, i):
+        return self.kecamatan[int(self.kec_index[i])]
+
+    def village(self, i):
+        """(village code, village name) of geometry i; code is '' when unknown"""
+        start, end = int(self.name_offsets[i]), int(self.name_offsets[i + 1])
+        return self.village_codes[i].decode(), self.names[start:end].tobytes().decode('utf-8')
+
+    def locate_indices(self, lons, lats):
+        """Geometry containing each point (-1 where none does): grid cell -> bbox -> exact test"""
+        x = np.asarray(lons, dtype=float)
+        y = np.asarray(lats, dtype=float)
+        result = np.full(len(x), -1, dtype=np.int64)
+        g = self.grid
+        gx = np.floor((x - g['x0']) / g['cell'])
+        gy = np.floor((y - g['y0']) / g['cell'])
+        ok = np.flatnonzero((gx >= 0) & (gx < g['nx']) & (gy >= 0) & (gy < g['ny']))
+        if not len(ok):
+            return result
+        cells = gy[ok].astype(np.int64) * g['nx'] + gx[ok].astype(np.int64)
+        starts = self.grid_offsets[cells].astype(np.int64)
+        counts = self.grid_offsets[cells + 1].astype(np.int64) - starts
+        pts = np.repeat(ok, counts)
+        ids = self.grid_items[np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+
+        b = self.bboxes[ids]
+        hit = (b[:, 0] <= x[pts]) & (x[pts] <= b[:, 2]) & (b[:, 1] <= y[pts]) & (y[pts] <= b[:, 3])
+        pts, ids = pts[hit], ids[hit].astype(np.int64)
+        if not len(pts):
+            return result
+        geoms = np.array([self.geometry(i) for i in ids.tolist()], dtype=object)
+        inside = shapely.intersects_xy(geoms, x[pts], y[pts])
+        pts, ids = pts[inside], ids[inside]
+        # Points on a shared boundary match several polygons; keep the lowest index.
+        order = np.lexsort((ids, pts))
+        pts, ids = pts[order], ids[order]
+        first = np.r_[True, pts[1:] != pts[:-1]] if len(pts) else np.zeros(0, dtype=bool)
+        result[pts[first]] = ids[first]
+        return result
+
+    def close(self):
+        self._geoms.clear()
+        for name in self.header['sections']:
+            setattr(self, name, None)
+        self._mm.close()
+        self._file.close()
+
+
+def open_store(path, regions):
+    """Map a prebuilt store; None (with a warning) when it is missing, unreadable or stale"""
+    try:
+        store = GeometryStore(path)
+    except (OSError, ValueError, KeyError, TypeError, struct.error) as e:
+        logger.warning(f"Geometry store {path} unusable ({e}); using the in-memory index. "
+                       f"Build it with: python3 geometry_store.py build --out {path}")
+        return None
+    regions.refresh()
+    if not store.is_current(regions):
+        logger.warning(f"Geometry store {path} is older than the data; using the in-memory index. "
+                       f"Rebuild it with: python3 geometry_store.py build --out {path}")
+        store.close()
+        return None
+    logger.info(f"Mapped {len(store)} geometries from {path}")
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or inspect the memory-mapped geometry store')
+    parser.add_argument('command', choices=('build', 'info'))
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR, help='Data directory (default: public/data)')
+    parser.add_argument('--out', type=Path, default=STORE_FILE, help='Store file (default: .cache/geometry_store.bin)')
+    parser.add_argument('--cell', type=float, default=0.1, help='Grid cell size in degrees (default: 0.1)')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        count = build_store(RegionIndex(args.data_dir), args.out, args.cell)
+        print(f'[OK] Wrote {count} geometries to {args.out} ({args.out.stat().st_size / 1e6:.1f} MB) '
+              f'in {time.perf_counter() - started:.2f}s')
+    else:
+        started = time.perf_counter()
+        store = GeometryStore(args.out)
+        opened = time.perf_counter() - started
+        regions = RegionIndex(args.data_dir)
+        regions.refresh(force=True)
+        print(f'{args.out}: {len(store)} geometries, {len(store.kecamatan)} kecamatan, '
+              f'{store.grid["nx"]}x{store.grid["ny"]} grid, opened in {opened * 1e3:.2f} ms, '
+              f'{"current" if store.is_current(regions) else "STALE (rebuild)"}')
+
+
+if __name__ == '__main__':
+    main()
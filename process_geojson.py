@@ -1,6 +1,24 @@
+import argparse
 import json
-import sys
 import os
+import re
+import sys
+from collections import OrderedDict
+
+import ijson
+
+# Property keys that carry each administrative code/name, in order of preference.
+# HDX/BPS files use province_code/regency_code/district_code with an 'id' prefix
+# (e.g. 'id5106010'); older exports use kab_id and friends.
+PROVINCE_CODE_KEYS = ('province_code', 'prov_id', 'ID_PROV', 'kode_prov')
+REGENCY_CODE_KEYS = ('regency_code', 'kab_id', 'ID_KAB', 'kode_kab')
+KECAMATAN_CODE_KEYS = ('district_code', 'kec_id', 'ID_KEC', 'kode_kec')
+PROVINCE_NAME_KEYS = ('province', 'prov_name', 'PROVINSI', 'Propinsi')
+REGENCY_NAME_KEYS = ('regency', 'kab_name', 'KABUPATEN', 'kabupaten')
+KECAMATAN_NAME_KEYS = ('district', 'kec_name', 'KECAMATAN', 'kecamatan')
+
+FEATURE_COLLECTION_HEADER = '{"type":"FeatureCollection","features":[\n'
+FEATURE_COLLECTION_FOOTER = '\n]}\n'
 
 def filter_geojson_by_regency(regency_id, input_file, output_dir):
     """
@@ -25,15 +43,22 @@ def filter_geojson_by_regency(regency_id, input_file, output_dir):
         print("Error: Input file is not a GeoJSON FeatureCollection.")
         return
 
+    target_id = int(regency_id)
+    # kab_id values repeat for every kecamatan of a regency, so each distinct value is
+    # converted once and the answer reused
+    matches = {}
     filtered_features = []
     for feature in data.get('features', []):
-        # Assuming the district ID is in properties and starts with the regency ID.
         properties = feature.get('properties', {})
         # The correct key for the regency ID is 'kab_id'.
         kabupaten_id = properties.get('kab_id')
-        
-        # We compare the integer value of the regency ID.
-        if kabupaten_id and int(kabupaten_id) == int(regency_id):
+        if not kabupaten_id:
+            continue
+        match = matches.get(kabupaten_id)
+        if match is None:
+            # We compare the integer value of the regency ID.
+            match = matches[kabupaten_id] = int(kabupaten_id) == target_id
+        if match:
             filtered_features.append(feature)
 
     if not filtered_features:
@@ -55,15 +80,162 @@ def filter_geojson_by_regency(regency_id, input_file, output_dir):
     except IOError as e:
         print(f"Error writing to file {output_filename}: {e}")
 
+def slugify(name):
+    """'Kota Denpasar' -> 'kota_denpasar', matching the public/data directory names."""
+    return re.sub(r'[^a-z0-9]+', '_', str(name).lower()).strip('_')
+
+
+def _first(props, keys):
+    for key in keys:
+        value = props.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _digits(value):
+    return re.sub(r'\D', '', str(value)) if value is not None else ''
+
+
+def feature_route(properties):
+    """
+    Work out where a kecamatan-level feature belongs.
+
+    Returns (province_dir, regency_dir, kecamatan_stem), e.g.
+    ('id51_bali', 'id5106_bangli', 'id5106010_susut'), or None when the
+    codes or names needed for the layout are missing.
+    """
+    kec = _digits(_first(properties, KECAMATAN_CODE_KEYS))
+    regency = _digits(_first(properties, REGENCY_CODE_KEYS)) or kec[:4]
+    province = _digits(_first(properties, PROVINCE_CODE_KEYS)) or regency[:2]
+    if len(kec) != 7 or len(regency) != 4 or len(province) != 2:
+        return None
+
+    names = (
+        _first(properties, PROVINCE_NAME_KEYS),
+        _first(properties, REGENCY_NAME_KEYS),
+        _first(properties, KECAMATAN_NAME_KEYS),
+    )
+    if not all(names):
+        return None
+    prov_slug, regency_slug, kec_slug = (slugify(n) for n in names)
+    return (
+        f"id{province}_{prov_slug}",
+        f"id{regency}_{regency_slug}",
+        f"id{kec}_{kec_slug}",
+    )
+
+
+class FeatureWriterPool:
+    """
+    Append features to many FeatureCollection files while keeping at most
+    `max_open` file handles open. Least recently used handles are closed and
+    transparently reopened in append mode when more features arrive.
+    """
+
+    def __init__(self, max_open=256):
+        self.max_open = max_open
+        self.handles = OrderedDict()
+        self.counts = {}
+
+    def _handle(self, path):
+        fh = self.handles.get(path)
+        if fh is not None:
+            self.handles.move_to_end(path)
+            return fh
+        if len(self.handles) >= self.max_open:
+            _, oldest = self.handles.popitem(last=False)
+            oldest.close()
+        if path in self.counts:
+            fh = open(path, 'a', encoding='utf-8')
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fh = open(path, 'w', encoding='utf-8')
+            fh.write(FEATURE_COLLECTION_HEADER)
+            self.counts[path] = 0
+        self.handles[path] = fh
+        return fh
+
+    def write(self, path, feature_json):
+        fh = self._handle(path)
+        if self.counts[path]:
+            fh.write(',\n')
+        fh.write(feature_json)
+        self.counts[path] += 1
+
+    def close(self):
+        """Close every file with a valid FeatureCollection footer."""
+        for fh in self.handles.values():
+            fh.close()
+        self.handles.clear()
+        for path in self.counts:
+            with open(path, 'a', encoding='utf-8') as fh:
+                fh.write(FEATURE_COLLECTION_FOOTER)
+
+
+def split_national_geojson(input_file, output_dir, with_fallback=True, max_open=256):
+    """
+    Split a nationwide kecamatan/village GeoJSON into the public/data layout in one pass.
+
+    Streams `features` with ijson (bounded memory) and routes each feature to
+    output_dir/id<prov>_<slug>/id<regency>_<slug>/id<kec>_<slug>.geojson. With
+    with_fallback, each feature is also appended to the combined district file
+    id<regency>_<slug>/id<regency>_<slug>.geojson that the loaders fall back to.
+
+    Returns a dict with 'features', 'skipped' and 'files' counts.
+    """
+    pool = FeatureWriterPool(max_open=max_open)
+    total = skipped = 0
+    try:
+        with open(input_file, 'rb') as f:
+            for feature in ijson.items(f, 'features.item', use_float=True):
+                total += 1
+                route = feature_route(feature.get('properties') or {})
+                if route is None:
+                    skipped += 1
+                    continue
+                prov_dir, regency_dir, kec_stem = route
+                district_path = os.path.join(output_dir, prov_dir, regency_dir)
+                feature_json = json.dumps(feature, ensure_ascii=False, separators=(',', ':'))
+                pool.write(os.path.join(district_path, f"{kec_stem}.geojson"), feature_json)
+                if with_fallback:
+                    pool.write(os.path.join(district_path, f"{regency_dir}.geojson"), feature_json)
+    finally:
+        pool.close()
+
+    return {'features': total, 'skipped': skipped, 'files': len(pool.counts)}
+
+
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
+    parser = argparse.ArgumentParser(description='Split a nationwide kecamatan GeoJSON')
+    parser.add_argument('regency_id', nargs='?', help="Regency ID to extract (e.g. '5104' for Gianyar)")
+    parser.add_argument('--split-all', action='store_true',
+                        help='Split every feature into the id<prov>_<slug>/id<regency>_<slug>/ layout in one pass')
+    parser.add_argument('--input', default='kec.geojson', help='Nationwide GeoJSON (default: kec.geojson)')
+    parser.add_argument('--output-dir', help='Output directory')
+    parser.add_argument('--no-fallback', action='store_true',
+                        help='With --split-all, do not write the combined id<regency>_<slug>.geojson files')
+    parser.add_argument('--max-open', type=int, default=256, help='With --split-all, max simultaneously open files')
+    args = parser.parse_args()
+
+    if args.split_all:
+        output_directory = args.output_dir or os.path.join('public', 'data')
+        if not os.path.exists(args.input):
+            print(f"Error: Input file not found at {args.input}")
+            sys.exit(1)
+        stats = split_national_geojson(args.input, output_directory,
+                                       with_fallback=not args.no_fallback, max_open=args.max_open)
+        print(f"Split {stats['features']} features into {stats['files']} files under {output_directory}"
+              f" ({stats['skipped']} skipped without usable codes/names).")
+        sys.exit(0)
+
+    if not args.regency_id:
         print("Usage: python process_geojson.py <regency_id>")
+        print("       python process_geojson.py --split-all [--input kec.geojson] [--output-dir public/data]")
         print("Example: python process_geojson.py 5104")
         sys.exit(1)
 
-    regency_id_to_filter = sys.argv[1]
-    large_geojson_file = 'kec.geojson'
     # The output will be placed where the React app can find it.
-    output_directory = 'indonesia-map-viewer/public/data'
+    output_directory = args.output_dir or 'indonesia-map-viewer/public/data'
 
-    filter_geojson_by_regency(regency_id_to_filter, large_geojson_file, output_directory)
+    filter_geojson_by_regency(args.regency_id, args.input, output_directory)
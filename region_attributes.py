@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Join indicator CSVs to regions by code and serve them as compact columnar payloads.
+
+Statistics live in their own CSV files (one dataset per file, e.g. stats/poverty.csv)
+instead of being baked into copies of the GeoJSON, so refreshing a statistic never
+touches the geometry files and those can stay cached indefinitely.
+
+A CSV needs a region code column (code / kode / region_code / kode_wilayah, codes with
+or without the 'id' prefix) plus any number of numeric indicator columns:
+  code,poverty_rate,population
+  5106,5.3,258721
+  5171,2.1,725314
+
+AttributeStore.payload(dataset, level, parent) returns the values in region order,
+i.e. the order of RegionIndex children of `parent` (or all regions of `level`):
+  {"dataset": "poverty", "level": "district", "parent": "51",
+   "codes": ["5106", "5171", ...],
+   "columns": {"poverty_rate": {"dtype": "float32", "data": "<base64>"}, ...}}
+Each column is a little-endian typed array (int32 when every value is an integer that
+fits, float32 otherwise; missing values are NaN / -2147483648), base64-encoded:
+  new Float32Array(Uint8Array.from(atob(data), c => c.charCodeAt(0)).buffer)
+
+Payloads carry their own validators (ETag from the content, Last-Modified from the CSV)
+so clients revalidate attributes cheaply without refetching geometry.
+
+Usage (standalone, lists the datasets):
+  python3 region_attributes.py [--stats-dir stats] [--data-dir public/data]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from region_index import DATA_DIR, RegionIndex
+
+ROOT = Path(__file__).resolve().parent
+STATS_DIR = ROOT / 'stats'
+
+CODE_COLUMNS = ('code', 'kode', 'region_code', 'kode_wilayah', 'id')
+LEVELS = {'province': 2, 'district': 4, 'subdistrict': 7}
+INT32_MISSING = np.iinfo(np.int32).min
+
+
+def normalize_codes(values):
+    """'id5106' / 5106 / '51.06' -> '5106'"""
+    return [re.sub(r'\D', '', str(v)) for v in values]
+
+
+def encode_column(values):
+    """Numeric pandas Series -> (dtype name, base64 little-endian typed array)"""
+    arr = values.to_numpy(dtype=float)
+    finite = arr[np.isfinite(arr)]
+    if len(finite) and np.all(finite == np.round(finite)) \
+            and finite.min() > INT32_MISSING and finite.max() <= np.iinfo(np.int32).max:
+        out = np.where(np.isfinite(arr), arr, INT32_MISSING).astype('<i4')
+        dtype = 'int32'
+    else:
+        out = arr.astype('<f4')
+        dtype = 'float32'
+    return dtype, base64.b64encode(out.tobytes()).decode('ascii')
+
+
+class AttributeStore:
+    """Indicator CSVs under stats_dir, joined to a RegionIndex on demand"""
+
+    def __init__(self, stats_dir, regions, max_entries=256):
+        self.stats_dir = Path(stats_dir)
+        self.regions = regions
+        self.max_entries = max_entries
+        self._tables = {}
+        self._payloads = OrderedDict()
+        self._lock = threading.Lock()
+
+    def datasets(self):
+        if not self.stats_dir.is_dir():
+            return []
+        return sorted(p.stem for p in self.stats_dir.glob('*.csv'))
+
+    def _table(self, name):
+        """
+        (DataFrame indexed by normalized code, (mtime_ns, size) of the CSV), reloaded when
+        the CSV changes
+        """
+        path = self.stats_dir / f'{name}.csv'
+        if not re.fullmatch(r'[\w.-]+', name) or not path.is_file():
+            return None, None
+        st = path.stat()
+        sig = (st.st_mtime_ns, st.st_size)
+        cached = self._tables.get(name)
+        if cached and cached[0] == sig:
+            return cached[1], sig
+
+        df = pd.read_csv(path, dtype=str)
+        lower = {c.lower(): c for c in df.columns}
+        code_col = next((lower[c] for c in CODE_COLUMNS if c in lower), None)
+        if code_col is None:
+            raise ValueError(f'{path.name}: no code column (expected one of {", ".join(CODE_COLUMNS)})')
+        codes = normalize_codes(df[code_col])
+        table = pd.DataFrame(index=pd.Index(codes, name='code'))
+        for col in df.columns:
+            if col == code_col:
+                continue
+            values = pd.to_numeric(df[col], errors='coerce')
+            if values.notna().any():
+                table[col] = values.to_numpy()
+        table = table[~table.index.duplicated(keep='last')]
+        self._tables[name] = (sig, table)
+        return table, sig
+
+    def region_order(self, level, parent=None):
+        self.regions.refresh()
+        if parent:
+            children = self.regions.children(parent)
+            if children is None:
+                return None
+            return [n['code'] for n in children if n['level'] == level]
+        return sorted(c for c, n in self.regions.nodes.items() if n['level'] == level)
+
+    def payload(self, name, level='district', parent=None):
+        """
+        Return (JSON bytes, etag, last_modified) for one dataset in region order,
+        or None when the dataset or parent region does not exist.
+        """
+        table, table_sig = self._table(name)
+        if table is None:
+            return None
+        order = self.region_order(level, parent)
+        if order is None:
+            return None
+
+        key = (name, level, parent or '')
+        sig = (table_sig, self.regions.version)
+        with self._lock:
+            hit = self._payloads.get(key)
+            if hit and hit[0] == sig:
+                self._payloads.move_to_end(key)
+                return hit[1]
+
+        joined = table.reindex(order)
+        columns = {}
+        for col in table.columns:
+            dtype, data = encode_column(joined[col])
+            columns[col] = {'dtype': dtype, 'data': data}
+        body = json.dumps({
+            'dataset': name,
+            'level': level,
+            'parent': parent,
+            'codes': order,
+            'matched': int(table.index.isin(order).sum()),
+            'columns': columns,
+        }, separators=(',', ':')).encode('utf-8')
+        result = (body, hashlib.sha1(body).hexdigest()[:16], table_sig[0] / 1e9)
+        with self._lock:
+            self._payloads[key] = (sig, result)
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.max_entries:
+                self._payloads.popitem(last=False)
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List indicator datasets and how many regions they match')
+    parser.add_argument('--stats-dir', type=Path, default=STATS_DIR, help='Directory with indicator CSVs (default: stats)')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR, help='Data directory (default: public/data)')
+    args = parser.parse_args()
+
+    store = AttributeStore(args.stats_dir, RegionIndex(args.data_dir))
+    names = store.datasets()
+    if not names:
+        raise SystemExit(f'No CSV files found under {args.stats_dir}')
+    for name in names:
+        try:
+            table, _ = store._table(name)
+        except ValueError as e:
+            print(f'[WARN] {e}')
+            continue
+        length = len(table.index[0]) if len(table) else 0
+        level = next((lv for lv, n in LEVELS.items() if n == length), 'district')
+        body, etag, _ = store.payload(name, level)
+        info = json.loads(body)
+        print(f"{name}: {len(table)} rows, {len(table.columns)} columns, "
+              f"{info['matched']}/{len(info['codes'])} {level} regions matched, {len(body)} bytes (etag {etag})")
+
+
+if __name__ == '__main__':
+    main()
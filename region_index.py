@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+In-memory index of the province -> district -> kecamatan hierarchy under public/data.
+
+The hierarchy only exists in directory and file names:
+  id<prov>_<slug>/id<regency>_<slug>/id<kecamatan>_<slug>.geojson
+RegionIndex walks that tree once and keeps one small node per region in a dict
+keyed by its code ('51', '5106', '5106020'), so lookups, children and ancestors
+are O(1) per node. Each node carries its code, level, slug, display name, parent,
+child codes, public file paths and bbox [west, south, east, north].
+
+Bboxes need the geometry, so they are read once per file and remembered in
+.cache/region_index.json keyed by (mtime, size); later builds only re-read files
+that changed. refresh() re-stats the tree at most every refresh_interval seconds
+and rebuilds the index when anything was added, removed or modified; every rebuild
+bumps `version`, so callers can key their own caches on it.
+
+Usage (standalone, prints a summary):
+  python3 region_index.py [--data-dir public/data]
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+ROOT = Path(__file__).resolve().parent
+DATA_DIR = ROOT / 'public' / 'data'
+CACHE_FILE = ROOT / '.cache' / 'region_index.json'
+
+PROV_DIR_RE = re.compile(r'^id(\d{2})_([a-z0-9_]+)$')
+DIST_DIR_RE = re.compile(r'^id(\d{4})_(.+)$')
+KEC_FILE_RE = re.compile(r'^id(\d{7})_(.+)\.geojson$')
+
+
+def to_title(slug):
+    return ' '.join(w.capitalize() for w in slug.replace('_', ' ').split())
+
+
+def normalize_code(code):
+    """'id5106' / '5106' -> '5106'"""
+    return re.sub(r'^id', '', str(code).strip())
+
+
+def merge_bbox(boxes):
+    boxes = [b for b in boxes if b]
+    if not boxes:
+        return None
+    arr = np.array(boxes)
+    return [float(arr[:, 0].min()), float(arr[:, 1].min()), float(arr[:, 2].max()), float(arr[:, 3].max())]
+
+
+def file_bbox(path):
+    """Bbox of all feature geometries in a GeoJSON file, or None when unreadable/empty"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        features = (data.get('features') or []) if isinstance(data, dict) else []
+        geoms = [shape(ft['geometry']) for ft in features if isinstance(ft, dict) and ft.get('geometry')]
+    except Exception:
+        return None
+    if not geoms:
+        return None
+    bounds = shapely.total_bounds(np.array(geoms, dtype=object))
+    return None if np.isnan(bounds).any() else [round(float(v), 6) for v in bounds]
+
+
+class RegionIndex:
+    """Province/district/kecamatan tree built from the public/data layout"""
+
+    def __init__(self, data_dir=DATA_DIR, cache_file=CACHE_FILE, refresh_interval=5.0):
+        self.data_dir = Path(data_dir)
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.refresh_interval = refresh_interval
+        self.nodes = {}
+        self.provinces = []
+        self.version = 0
+        self._snapshot = None
+        self._bboxes = {}
+        self._dirty = False
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def scan(self):
+        """{relative file path: (mtime_ns, size)} for every file the index is built from"""
+        snap = {}
+        if not self.data_dir.is_dir():
+            return snap
+        for prov in os.scandir(self.data_dir):
+            if not (prov.is_dir() and PROV_DIR_RE.match(prov.name)):
+                continue
+            snap[prov.name] = (0, 0)
+            for dist in os.scandir(prov.path):
+                if not (dist.is_dir() and DIST_DIR_RE.match(dist.name)):
+                    continue
+                snap[f'{prov.name}/{dist.name}'] = (0, 0)
+                for f in os.scandir(dist.path):
+                    if f.name.endswith('.geojson') and f.is_file():
+                        st = f.stat()
+                        snap[f'{prov.name}/{dist.name}/{f.name}'] = (st.st_mtime_ns, st.st_size)
+        return snap
+
+    def refresh(self, force=False):
+        """Rebuild the index if the tree changed; returns True when it was rebuilt"""
+        if not force and self._snapshot is not None and time.monotonic() - self._checked < self.refresh_interval:
+            return False
+        with self._lock:
+            if not force and self._snapshot is not None and time.monotonic() - self._checked < self.refresh_interval:
+                return False
+            snap = self.scan()
+            self._checked = time.monotonic()
+            if snap == self._snapshot and not force:
+                return False
+            self._build(snap)
+            self._snapshot = snap
+            return True
+
+    def _load_bbox_cache(self):
+        if self._bboxes or not self.cache_file:
+            return
+        try:
+            self._bboxes = json.loads(self.cache_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            self._bboxes = {}
+
+    def _save_bbox_cache(self):
+        if not self.cache_file:
+            return
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_file.with_name(self.cache_file.name + '.tmp')
+        tmp.write_text(json.dumps(self._bboxes), encoding='utf-8')
+        os.replace(tmp, self.cache_file)
+
+    def _bbox(self, rel, sig):
+        key = str(self.data_dir / rel)
+        hit = self._bboxes.get(key)
+        if hit and hit[:2] == list(sig):
+            return hit[2]
+        bbox = file_bbox(self.data_dir / rel)
+        self._bboxes[key] = [sig[0], sig[1], bbox]
+        self._dirty = True
+        return bbox
+
+    def _build(self, snap):
+        self._load_bbox_cache()
+        self._dirty = False
+        nodes = {}
+        for rel in sorted(snap):
+            parts = rel.split('/')
+            if len(parts) == 1:
+                code, slug = PROV_DIR_RE.match(parts[0]).groups()
+                nodes[code] = {
+                    'code': code, 'level': 'province', 'slug': slug, 'name': to_title(slug),
+                    'parent': None, 'path': f'/data/{rel}', 'children': [], 'bbox': None,
+                }
+            elif len(parts) == 2:
+                code, slug = DIST_DIR_RE.match(parts[1]).groups()
+                parent = PROV_DIR_RE.match(parts[0]).group(1)
+                if not code.startswith(parent):
+                    continue
+                nodes[code] = {
+                    'code': code, 'level': 'district', 'slug': slug, 'name': to_title(slug),
+                    'parent': parent, 'path': f'/data/{rel}', 'children': [], 'bbox': None,
+                }
+                nodes[parent]['children'].append(code)
+            else:
+                dist_code = DIST_DIR_RE.match(parts[1]).group(1)
+                district = nodes.get(dist_code)
+                if district is None or district['path'] != f'/data/{parts[0]}/{parts[1]}':
+                    continue
+                if parts[2] == f'{parts[1]}.geojson':
+                    district['fallbackFile'] = parts[2]
+                    district['fallbackBbox'] = self._bbox(rel, snap[rel])
+                    continue
+                m = KEC_FILE_RE.match(parts[2])
+                if not m or not m.group(1).startswith(dist_code):
+                    continue
+                code, slug = m.groups()
+                nodes[code] = {
+                    'code': code, 'level': 'subdistrict', 'slug': slug, 'name': to_title(slug),
+                    'parent': dist_code, 'path': f'/data/{rel}', 'children': [],
+                    'bbox': self._bbox(rel, snap[rel]),
+                }
+                district['children'].append(code)
+
+        for node in nodes.values():
+            if node['level'] == 'district':
+                node['bbox'] = merge_bbox([nodes[c]['bbox'] for c in node['children']]
+                                          + [node.get('fallbackBbox')])
+                node.pop('fallbackBbox', None)
+        for node in nodes.values():
+            if node['level'] == 'province':
+                node['bbox'] = merge_bbox([nodes[c]['bbox'] for c in node['children']])
+
+        self.nodes = nodes
+        self.provinces = sorted(c for c, n in nodes.items() if n['level'] == 'province')
+        self.version += 1
+        if self._dirty:
+            self._save_bbox_cache()
+
+    def get(self, code):
+        return self.nodes.get(normalize_code(code))
+
+    def children(self, code):
+        node = self.get(code)
+        if node is None:
+            return None
+        return [self.nodes[c] for c in node['children']]
+
+    def ancestors(self, code):
+        """Ancestors from the province down to the direct parent"""
+        node = self.get(code)
+        if node is None:
+            return None
+        chain = []
+        while node['parent']:
+            node = self.nodes[node['parent']]
+            chain.append(node)
+        return chain[::-1]
+
+    def district_dir(self, code):
+        node = self.get(code)
+        if node is None or node['level'] != 'district':
+            return None
+        return self.data_dir / node['path'][len('/data/'):]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the region hierarchy index and print a summary')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR, help='Data directory (default: public/data)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = RegionIndex(args.data_dir)
+    index.refresh(force=True)
+    levels = {}
+    for node in index.nodes.values():
+        levels[node['level']] = levels.get(node['level'], 0) + 1
+    print(f"Indexed {levels.get('province', 0)} provinces, {levels.get('district', 0)} districts, "
+          f"{levels.get('subdistrict', 0)} kecamatan in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
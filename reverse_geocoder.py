@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Reverse geocoding: which province / kabupaten / kecamatan (and desa) contains a point.
+
+ReverseGeocoder loads every kecamatan file listed by a RegionIndex into one
+nationwide STRtree over the village polygons. The polygons are prepared
+(shapely.prepare), and the tree's bbox search prefilters candidates before the
+exact point-in-polygon test. Batches are answered with a single vectorized
+STRtree.query over all points.
+
+The tree is built on first use and rebuilt whenever the region index changes.
+
+With a GeometryStore (geometry_store.py) the geocoder builds no tree at all: lookups
+go through the store's memory-mapped grid index and bboxes, and only the polygons a
+query touches are built from WKB, so every worker process shares one copy of the data.
+
+Usage (standalone benchmark):
+  python3 reverse_geocoder.py [--data-dir public/data] [--points 100000] [--geometry-store .cache/geometry_store.bin]
+
+Requires: shapely>=2.0, numpy, ijson
+"""
+
+import argparse
+import logging
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from feature_store import FeatureStore
+from region_index import DATA_DIR, RegionIndex
+
+logger = logging.getLogger(__name__)
+
+
+# Everything one lookup needs, published as a single attribute so a lookup that
+# overlaps a rebuild keeps using one consistent set: the tree (None with a store),
+# its polygons and their keys, the admin chains by key, the region nodes it was
+# built from and the geometry store answering instead of the tree (or None).
+Snapshot = namedtuple('Snapshot', 'tree geoms keys chains nodes store')
+
+
+class ReverseGeocoder:
+    """Point -> admin chain lookups backed by an STRtree over kecamatan/village polygons"""
+
+    def __init__(self, regions, store=None):
+        self.regions = regions
+        self.store = store
+        self.snapshot = None
+        self._lock = threading.Lock()
+
+    def ensure(self):
+        """
+        Return the Snapshot to answer from, rebuilding it when the region index changed.
+        A store that no longer matches the data is dropped with a warning and the tree
+        is built instead.
+        """
+        self.regions.refresh()
+        snap = self.snapshot
+        if snap is not None and snap.nodes is self.regions.nodes:
+            return snap
+        with self._lock:
+            snap = self.snapshot
+            nodes = self.regions.nodes
+            if snap is None or snap.nodes is not nodes:
+                store = self.store
+                if store is not None and not store.is_current(self.regions):
+                    logger.warning(f"Geometry store {store.path} no longer matches the data; "
+                                   f"using the in-memory index")
+                    self.store = store = None
+                snap = Snapshot(None, None, None, {}, nodes, store) if store is not None else self.build(nodes)
+                self.snapshot = snap
+        return snap
+
+    def build(self, nodes):
+        """Snapshot with an STRtree over every village polygon of `nodes`"""
+        started = time.perf_counter()
+        geoms, keys, chains = [], [], {}
+        for code, node in nodes.items():
+            if node['level'] != 'subdistrict':
+                continue
+            base = self.admin_chain(nodes, node)
+            try:
+                store = FeatureStore.from_file(self.regions.data_dir / node['path'][len('/data/'):])
+            except Exception as e:
+                logger.error(f"Error reading {node['path']}: {e}")
+                continue
+            for geom, record in zip(store.to_shapely(), store.records):
+                if geom is None:
+                    continue
+                village_code = str(record.get('village_code') or '').replace('id', '', 1)
+                key = village_code or code
+                if key not in chains:
+                    chain = dict(base)
+                    if village_code:
+                        chain['village'] = {'code': village_code, 'name': record.get('village')}
+                    chains[key] = chain
+                geoms.append(geom)
+                keys.append(key)
+
+        geoms = np.array(geoms, dtype=object)
+        shapely.prepare(geoms)
+        logger.info(f"Built reverse-geocoding index: {len(geoms)} polygons in "
+                    f"{time.perf_counter() - started:.2f}s")
+        return Snapshot(STRtree(geoms), geoms, keys, chains, nodes, None)
+
+    @staticmethod
+    def admin_chain(nodes, node):
+        district = nodes[node['parent']]
+        province = nodes[district['parent']]
+        return {
+            'province': {'code': province['code'], 'name': province['name']},
+            'district': {'code': district['code'], 'name': district['name']},
+            'subdistrict': {'code': node['code'], 'name': node['name']},
+        }
+
+    @staticmethod
+    def key(i, snap):
+        """Village code (kecamatan code when unknown) of polygon i of a snapshot from lookup()"""
+        if snap.store is None:
+            return snap.keys[i]
+        return snap.store.village(i)[0] or snap.store.kecamatan_code(i)
+
+    def chain(self, i, snap):
+        """Admin chain of polygon i of a snapshot from lookup()"""
+        key = self.key(i, snap)
+        chains, store = snap.chains, snap.store
+        if store is None or key in chains:
+            return chains[key]
+        nodes = snap.nodes
+        kec = store.kecamatan_code(i)
+        if kec not in nodes:
+            return None
+        chain = self.admin_chain(nodes, nodes[kec])
+        village_code, village = store.village(i)
+        if village_code:
+            chain['village'] = {'code': village_code, 'name': village or None}
+        chains[key] = chain
+        return chain
+
+    def lookup(self, lons, lats):
+        """
+        (indices, snapshot): index of the polygon containing each point (-1 where none
+        does) and the Snapshot they refer to; pass it on to key/chain
+        """
+        snap = self.ensure()
+        if snap.store is not None:
+            # The mapped arrays are read-only, so concurrent lookups need no lock
+            return snap.store.locate_indices(lons, lats), snap
+        tree, geoms = snap.tree, snap.geoms
+        points = shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        result = np.full(len(points), -1, dtype=np.int64)
+        if not len(geoms) or not len(points):
+            return result, snap
+        inp, hit = tree.query(points, predicate='intersects')
+        if len(inp):
+            # Points on a shared boundary match several polygons; keep the lowest index.
+            order = np.lexsort((hit, inp))
+            inp, hit = inp[order], hit[order]
+            first = np.r_[True, inp[1:] != inp[:-1]]
+            result[inp[first]] = hit[first]
+        return result, snap
+
+    def locate_indices(self, lons, lats):
+        return self.lookup(lons, lats)[0]
+
+    def locate(self, lon, lat):
+        """Admin chain for one point, or None when it is outside every polygon"""
+        idx, snap = self.lookup([lon], [lat])
+        return self.chain(idx[0], snap) if idx[0] >= 0 else None
+
+    def locate_many(self, lons, lats):
+        """
+        Compact batch answer: one key per point (village or kecamatan code, None when
+        unmatched) plus the admin chain of every distinct key that occurred.
+        """
+        idx, snap = self.lookup(lons, lats)
+        results, regions = [], {}
+        for i in idx.tolist():
+            if i < 0:
+                results.append(None)
+                continue
+            key = self.key(i, snap)
+            if key not in regions:
+                regions[key] = self.chain(i, snap)
+            results.append(key)
+        return {
+            'count': len(results),
+            'matched': int((idx >= 0).sum()),
+            'results': results,
+            'regions': regions,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the reverse-geocoding index and benchmark lookups')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR, help='Data directory (default: public/data)')
+    parser.add_argument('--points', type=int, default=100000, help='Random points for the batch benchmark')
+    parser.add_argument('--geometry-store', type=Path, help='Use this memory-mapped store (see geometry_store.py)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    regions = RegionIndex(args.data_dir)
+    store = None
+    if args.geometry_store:
+        from geometry_store import open_store
+        store = open_store(args.geometry_store, regions)
+    if store is not None:
+        geocoder = ReverseGeocoder(regions, store)
+        b = store.bboxes
+        west, south, east, north = b[:, 0].min(), b[:, 1].min(), b[:, 2].max(), b[:, 3].max()
+    else:
+        geocoder = ReverseGeocoder(regions)
+        geoms = geocoder.ensure().geoms
+        if not len(geoms):
+            raise SystemExit(f'No kecamatan polygons found under {args.data_dir}')
+        west, south, east, north = shapely.total_bounds(geoms)
+    rng = np.random.default_rng(0)
+    lons = rng.uniform(west, east, args.points)
+    lats = rng.uniform(south, north, args.points)
+
+    started = time.perf_counter()
+    for lon, lat in zip(lons[:1000], lats[:1000]):
+        geocoder.locate(lon, lat)
+    single = (time.perf_counter() - started) / min(1000, args.points)
+
+    started = time.perf_counter()
+    batch = geocoder.locate_many(lons, lats)
+    elapsed = time.perf_counter() - started
+    print(f"Single lookup: {single * 1e6:.0f} us/point")
+    print(f"Batch: {batch['count']} points ({batch['matched']} matched) in {elapsed:.3f}s "
+          f"= {batch['count'] / elapsed:,.0f} points/s")
+
+
+if __name__ == '__main__':
+    main()
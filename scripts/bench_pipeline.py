@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Benchmark the offline data pipeline on synthetic trees and compare with stored baselines.
+
+Usage:
+  python3 scripts/bench_pipeline.py                         # scales 0.01 and 0.1, all targets
+  python3 scripts/bench_pipeline.py --scale 1 10 100 --repeat 3   # national size and beyond
+  python3 scripts/bench_pipeline.py --target kab_dissolved --scale 10
+  python3 scripts/bench_pipeline.py --save-baseline         # record this run as the baseline
+
+Targets (each run single-process):
+  optimize_directory   optimize_geojson.process_directory over the whole tree (simplify 0.01)
+  kab_dissolved        make_kab_dissolved.build_province for every province (force, no cache)
+  validate_data        validate_data layout check + run_deep_checks (no cache)
+  split_national       process_geojson.split_national_geojson of national.geojson
+  processor_analysis   GeoJSONProcessor on national.geojson: validate_file, stream_properties,
+                       count_features, get_bounds, feature_index
+
+Logic:
+- Datasets come from scripts/gen_synthetic_data.py and are generated on first use under
+  .cache/synthetic/x<scale>/ (--data-root). Scale 1 is the size of the national tree,
+  10 and 100 go beyond it (tens and hundreds of GB on disk)
+- Every measurement runs in a fresh interpreter, so peak memory (ru_maxrss) belongs to
+  that target alone; the time excludes interpreter start-up and imports. Outputs go to a
+  temporary directory (kab_<prov>.geojson files are removed afterwards)
+- With --repeat N the fastest time and the highest peak of N runs are reported
+- Baselines are local to the checkout (.cache/bench_baselines.json, not committed) and
+  kept per machine (CPU model, CPU count, architecture, Python version). A run is only
+  compared with the baseline recorded on the same machine, as a ratio; a new machine
+  prints "no baseline for this machine". Record or refresh one with --save-baseline on an
+  otherwise idle machine before a change, then compare after it (or pass --baseline to
+  share a file between checkouts). A time or peak above --tolerance x that baseline is
+  reported as [WARN] and makes the run exit with code 1; use --repeat 3 or more before
+  recording or comparing so a single noisy run does not decide
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_ROOT = ROOT / '.cache' / 'synthetic'
+BASELINE_FILE = ROOT / '.cache' / 'bench_baselines.json'
+
+TARGETS = ('optimize_directory', 'kab_dissolved', 'validate_data', 'split_national', 'processor_analysis')
+
+
+def run_target(target: str, dataset: Path) -> Dict[str, float]:
+    """Run one target in this process; returns seconds and peak RSS in MB."""
+    sys.path.insert(0, str(ROOT))
+    data_dir = dataset / 'data'
+    national = dataset / 'national.geojson'
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        if target == 'optimize_directory':
+            import optimize_geojson
+            run = lambda: optimize_geojson.process_directory(data_dir, Path(tmp) / 'optimized', 0.01)
+        elif target == 'kab_dissolved':
+            import make_kab_dissolved as mkd
+            mkd.PUBLIC_DATA = data_dir
+            run = lambda: [mkd.build_province(code, force=True, cache_dir=None) for code in mkd.list_province_codes()]
+        elif target == 'validate_data':
+            import validate_data as vd
+            vd.PUBLIC_DATA = data_dir
+            districts = [d for p in vd.find_province_dirs(None, None) for d in sorted(p.iterdir())
+                         if d.is_dir() and vd.DIST_DIR_RE.match(d.name)]
+            run = lambda: ([vd.validate_district_dir(d) for d in districts],
+                           vd.run_deep_checks(districts, 1, 0.001, 0.001, use_cache=False))
+        elif target == 'split_national':
+            import process_geojson
+            run = lambda: process_geojson.split_national_geojson(str(national), str(Path(tmp) / 'split'))
+        elif target == 'processor_analysis':
+            import logging
+            import geojson_processor
+            logging.disable(logging.INFO)
+
+            def run():
+                processor = geojson_processor.GeoJSONProcessor(str(national))
+                processor.validate_file()
+                processor.stream_properties()
+                processor.count_features()
+                processor.get_bounds()
+                processor.feature_index()
+        else:
+            raise SystemExit(f'Unknown target {target!r}')
+
+        started = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(devnull):
+                run()
+        finally:
+            for kab in data_dir.glob('kab_*.geojson'):
+                kab.unlink()
+        seconds = time.perf_counter() - started
+    return {'seconds': round(seconds, 4), 'peak_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+
+def measure(target: str, dataset: Path, repeat: int) -> Optional[Dict[str, float]]:
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, __file__, '--run-target', target, str(dataset)],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f'[WARN] {target} failed:\n{proc.stderr.strip()}')
+            return None
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {'seconds': min(r['seconds'] for r in runs), 'peak_mb': max(r['peak_mb'] for r in runs)}
+
+
+def ensure_dataset(data_root: Path, scale: float) -> Path:
+    dataset = data_root / f'x{scale:g}'
+    if not (dataset / 'national.geojson').exists():
+        import gen_synthetic_data
+        print(f'Generating synthetic dataset x{scale} in {dataset}...')
+        stats = gen_synthetic_data.generate(dataset, scale)
+        print(f"  {stats['villages']:,} villages, {stats['vertices']:,} vertices")
+    return dataset
+
+
+def cpu_model() -> str:
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as fh:
+            for line in fh:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.system()
+
+
+def machine_info() -> Dict[str, object]:
+    return {
+        'arch': platform.machine(),
+        'cpu': cpu_model(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+    }
+
+
+def machine_key(info: Dict[str, object]) -> str:
+    return hashlib.sha256(json.dumps(info, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def load_baselines(path: Path) -> dict:
+    if path.exists():
+        data = json.loads(path.read_text(encoding='utf-8'))
+        if data.get('version') == 2:
+            return data
+        print(f'[WARN] {path} has no per-machine baselines; ignoring it')
+    return {'version': 2, 'machines': {}}
+
+
+def compare(value: float, base: Optional[float], tolerance: float) -> str:
+    if not base:
+        return 'no baseline'
+    ratio = value / base
+    return f'{ratio:.2f}x baseline' + (' [WARN]' if ratio > tolerance else '')
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Benchmark the data pipeline on synthetic trees')
+    ap.add_argument('--scale', type=float, nargs='+', default=[0.01, 0.1],
+                    help='Dataset scales as multiples of the national tree (default: 0.01 0.1)')
+    ap.add_argument('--target', choices=TARGETS, action='append', help='Only these targets (repeatable)')
+    ap.add_argument('--repeat', type=int, default=1, help='Runs per target; fastest time is kept (default: 1)')
+    ap.add_argument('--data-root', type=Path, default=DATA_ROOT, help='Synthetic datasets (default: .cache/synthetic)')
+    ap.add_argument('--baseline', type=Path, default=BASELINE_FILE, help='Baseline file (default: .cache/bench_baselines.json)')
+    ap.add_argument('--tolerance', type=float, default=1.3, help='Warn above this multiple of the baseline (default: 1.3)')
+    ap.add_argument('--save-baseline', action='store_true', help='Store this run as the new baseline')
+    ap.add_argument('--run-target', nargs=2, metavar=('TARGET', 'DATASET'), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.run_target:
+        print(json.dumps(run_target(args.run_target[0], Path(args.run_target[1]))))
+        return
+
+    baselines = load_baselines(args.baseline)
+    info = machine_info()
+    machine = baselines['machines'].setdefault(machine_key(info), {'info': info, 'results': {}})
+    print(f"Machine: {info['cpu']}, {info['cpus']} CPUs, {info['arch']}, Python {info['python']}")
+    if not machine['results']:
+        print('  no baseline for this machine; run with --save-baseline to record one')
+    targets: List[str] = args.target or list(TARGETS)
+    regressions = 0
+    for scale in args.scale:
+        dataset = ensure_dataset(args.data_root, scale)
+        stored = machine['results'].setdefault(f'x{scale:g}', {})
+        print(f'\nScale x{scale:g}:')
+        for target in targets:
+            result = measure(target, dataset, args.repeat)
+            if result is None:
+                regressions += 1
+                continue
+            base = stored.get(target, {})
+            time_note = compare(result['seconds'], base.get('seconds'), args.tolerance)
+            mem_note = compare(result['peak_mb'], base.get('peak_mb'), args.tolerance)
+            regressions += ('[WARN]' in time_note) + ('[WARN]' in mem_note)
+            print(f"  {target:<20} {result['seconds']:>9.3f}s ({time_note})  "
+                  f"{result['peak_mb']:>8.1f} MB peak ({mem_note})")
+            if args.save_baseline:
+                stored[target] = result
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(baselines, indent=2) + '\n', encoding='utf-8')
+        print(f'\n[OK] Baseline written to {args.baseline}')
+    elif regressions:
+        print(f'\n[SUMMARY] {regressions} regression(s) above {args.tolerance}x baseline')
+        raise SystemExit(1)
+    else:
+        print('\n[SUMMARY] No regressions')
+
+
+if __name__ == '__main__':
+    main()
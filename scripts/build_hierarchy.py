@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Build the whole administrative hierarchy bottom-up in one run:
+kecamatan -> kabupaten/kota -> province -> national.
+
+Usage:
+  python3 scripts/build_hierarchy.py [--jobs 8] [--tolerance-kab 0] [--tolerance-prov 0.001] \
+    [--tolerance-national 0.005] [--out-dir public/data] [--no-cache]
+
+Logic:
+- Districts: every id<prov>_<slug>/id<regency>_<slug>/ directory is dissolved exactly like
+  scripts/make_kab_dissolved.py (fallback file first, else all kecamatan files; coverage
+  union when possible, unary_union otherwise) and shares its per-district cache
+- Provinces: the full-resolution district geometries of each province are dissolved again
+- National: the full-resolution province geometries are dissolved into one outline
+- Each level is computed from the previous level's in-memory (unsimplified) result, so the
+  kecamatan files are read once; simplification is applied only when writing, with one
+  tolerance per level (shared edges are simplified together via coverage_simplify when
+  shapely>=2.1 is available, so neighbours do not drift apart)
+
+Outputs (in --out-dir):
+- kab_<prov>.geojson      per-province districts (regency_code, province_code, kab_name)
+- kab_37.geojson          all districts nationwide (same properties)
+- prov_37.geojson         province outlines (prov_id, prov_name, province_code)
+- indonesia.geojson       national outline
+
+Requires: shapely>=2.0
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import mapping
+
+import make_kab_dissolved as mkd
+from region_index import DIST_DIR_RE
+
+
+def dissolve_wkbs(wkbs: List[bytes], engine: str = 'auto',
+                  grid_size: Optional[float] = None) -> Tuple[bytes, str]:
+    """Dissolve already-dissolved children (as WKB) into their parent geometry."""
+    merged, path = mkd.dissolve(list(shapely.from_wkb(wkbs)), engine=engine, grid_size=grid_size)
+    return shapely.to_wkb(merged), path
+
+
+def simplify_level(wkbs: List[bytes], tolerance: float) -> List:
+    """Simplify one level's geometries together, keeping shared edges shared when possible."""
+    geoms = shapely.from_wkb(np.asarray(wkbs, dtype=object))
+    if not tolerance:
+        return list(geoms)
+    if hasattr(shapely, 'coverage_simplify') and mkd.is_clean_coverage(geoms):  # shapely >= 2.1
+        return list(shapely.coverage_simplify(geoms, tolerance))
+    return list(shapely.simplify(geoms, tolerance, preserve_topology=True))
+
+
+def write_collection(out_path: Path, props: List[dict], geoms: List) -> None:
+    features = [
+        {'type': 'Feature', 'properties': p, 'geometry': mapping(g)}
+        for p, g in zip(props, geoms)
+    ]
+    # The outputs are served directly; replace them only once fully written
+    tmp_path = out_path.with_name(out_path.name + '.tmp')
+    with tmp_path.open('w', encoding='utf-8') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f, ensure_ascii=False)
+    os.replace(tmp_path, out_path)
+    print(f'[OK] Wrote {out_path} with {len(features)} features')
+
+
+def province_name(prov_dir: Path) -> str:
+    return prov_dir.name.split('_', 1)[1].replace('_', ' ').title()
+
+
+def build_hierarchy(out_dir: Path, jobs: int = 1, engine: str = 'auto', grid_size: Optional[float] = None,
+                    cache_dir: Optional[Path] = mkd.CACHE_DIR,
+                    tolerances: Tuple[float, float, float] = (0.0, 0.001, 0.005),
+                    national_kab: str = 'kab_37.geojson', provinces_file: str = 'prov_37.geojson',
+                    national_file: str = 'indonesia.geojson') -> bool:
+    tol_kab, tol_prov, tol_national = tolerances
+    plans: Dict[str, Tuple[Path, List[Path]]] = {}
+    for code in mkd.list_province_codes():
+        prov_dir = mkd.find_province_dir(code)
+        if prov_dir:
+            plans[code] = (prov_dir, mkd.list_district_dirs(prov_dir))
+
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    mapper = pool.map if pool else map
+    try:
+        # Level 1: kecamatan -> kabupaten
+        tasks = [(code, d) for code, (_, dirs) in plans.items() for d in dirs]
+        results = mapper(mkd.dissolve_district,
+                         [c for c, _ in tasks], [d for _, d in tasks],
+                         [engine] * len(tasks), [grid_size] * len(tasks), [cache_dir] * len(tasks))
+        districts: Dict[str, List[Tuple[Path, bytes]]] = {code: [] for code in plans}
+        for (code, dist_dir), (wkb, _, warnings) in zip(tasks, results):
+            for w in warnings:
+                print(w)
+            if wkb:
+                districts[code].append((dist_dir, wkb))
+
+        # Level 2: kabupaten -> province
+        prov_codes = [code for code in plans if districts[code]]
+        for code in plans:
+            if code not in prov_codes:
+                print(f'[WARN] Province {code}: no features produced')
+        results = mapper(dissolve_wkbs,
+                         [[wkb for _, wkb in districts[c]] for c in prov_codes],
+                         [engine] * len(prov_codes), [grid_size] * len(prov_codes))
+        provinces = [wkb for wkb, _ in results]
+
+        # Level 3: province -> national
+        national = dissolve_wkbs(provinces, engine, grid_size)[0] if provinces else None
+    finally:
+        if pool:
+            pool.shutdown()
+
+    if not provinces:
+        print('[WARN] No provinces produced')
+        return False
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    all_props: List[dict] = []
+    all_wkbs: List[bytes] = []
+    for code in prov_codes:
+        props = []
+        for dist_dir, wkb in districts[code]:
+            regency_code, slug = DIST_DIR_RE.match(dist_dir.name).groups()
+            props.append({
+                'regency_code': regency_code,
+                'province_code': code,
+                'kab_name': slug.replace('_', ' ').title(),
+            })
+            all_wkbs.append(wkb)
+        all_props.extend(props)
+        write_collection(out_dir / f'kab_{code}.geojson', props,
+                         simplify_level([wkb for _, wkb in districts[code]], tol_kab))
+
+    write_collection(out_dir / national_kab, all_props, simplify_level(all_wkbs, tol_kab))
+    prov_props = [
+        {'prov_id': code, 'prov_name': province_name(plans[code][0]), 'province_code': code}
+        for code in prov_codes
+    ]
+    write_collection(out_dir / provinces_file, prov_props, simplify_level(provinces, tol_prov))
+    write_collection(out_dir / national_file, [{'name': 'Indonesia'}], simplify_level([national], tol_national))
+    print(f'[SUMMARY] {len(all_props)} districts, {len(prov_codes)} provinces, 1 national outline')
+    return True
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Dissolve kecamatan into kabupaten, province and national boundaries')
+    ap.add_argument('--out-dir', type=Path, default=mkd.PUBLIC_DATA, help='Output directory (default: public/data)')
+    ap.add_argument('--jobs', type=int, default=1, help='Worker processes (default: 1, serial)')
+    ap.add_argument('--engine', choices=mkd.DISSOLVE_ENGINES, default='auto', help='Dissolve engine (see make_kab_dissolved)')
+    ap.add_argument('--grid-size', type=float, default=None, help='Snap vertices to this precision grid before dissolving')
+    ap.add_argument('--no-cache', action='store_true', help='Re-dissolve every district, ignoring the dissolve cache')
+    ap.add_argument('--tolerance-kab', type=float, default=0.0, help='Simplification tolerance for district outputs')
+    ap.add_argument('--tolerance-prov', type=float, default=0.001, help='Simplification tolerance for province outlines')
+    ap.add_argument('--tolerance-national', type=float, default=0.005, help='Simplification tolerance for the national outline')
+    ap.add_argument('--national-kab', default='kab_37.geojson', help='File name for the nationwide districts file')
+    ap.add_argument('--provinces-file', default='prov_37.geojson', help='File name for the province outlines')
+    ap.add_argument('--national-file', default='indonesia.geojson', help='File name for the national outline')
+    args = ap.parse_args()
+
+    ok = build_hierarchy(
+        args.out_dir, jobs=args.jobs, engine=args.engine, grid_size=args.grid_size,
+        cache_dir=None if args.no_cache else mkd.CACHE_DIR,
+        tolerances=(args.tolerance_kab, args.tolerance_prov, args.tolerance_national),
+        national_kab=args.national_kab, provinces_file=args.provinces_file, national_file=args.national_file,
+    )
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
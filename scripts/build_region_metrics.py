@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Precompute label points, centroids, areas, perimeters and bboxes for every region.
+
+Usage:
+  python3 scripts/build_region_metrics.py [--jobs 8] [--out public/data/region_metrics.json] [--no-cache]
+
+Logic:
+- Kecamatan: the village polygons of each id<kec>_<slug>.geojson are dissolved into one geometry
+- Kabupaten/kota: dissolved exactly like scripts/make_kab_dissolved.py (sharing its cache)
+- Province: the district geometries are dissolved again (like scripts/build_hierarchy.py)
+- Districts are processed in parallel worker processes; provinces afterwards
+- For every region:
+  - label:        pole of inaccessibility of its largest polygon (shapely polylabel), the
+                  point furthest inside the shape, which is where a map label belongs
+  - centroid:     planar centroid in lon/lat
+  - area_km2, perimeter_km: geodesic on the WGS84 ellipsoid (pyproj.Geod)
+  - bbox:         [west, south, east, north]
+
+Output (one small sidecar, served by geojson_processor.py at /api/regions/<code>/metrics):
+  {"version": 1, "regions": {"5106": {"level": "district", "name": "Bangli", "label": [lon, lat],
+   "centroid": [lon, lat], "area_km2": 490.71, "perimeter_km": 121.3, "bbox": [...]}, ...}}
+
+Requires: shapely>=2.0, numpy, pyproj (installed with geopandas)
+"""
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from pyproj import Geod
+from shapely.ops import polylabel
+
+import build_hierarchy as bh
+import make_kab_dissolved as mkd
+from region_index import DIST_DIR_RE, to_title
+
+KEC_FILE_RE = re.compile(r'^id(\d{7})_(.+)\.geojson$')
+OUT_FILE = mkd.PUBLIC_DATA / 'region_metrics.json'
+
+GEOD = Geod(ellps='WGS84')
+
+
+def region_metrics(geom) -> Optional[Dict[str, object]]:
+    """Label point, centroid, geodesic area/perimeter and bbox of one (multi)polygon."""
+    if geom is None or geom.is_empty:
+        return None
+    parts = shapely.get_parts(geom)
+    parts = parts[shapely.get_type_id(parts) == 3]
+    if not len(parts):
+        return None
+    largest = parts[int(np.argmax(shapely.area(parts)))]
+    west, south, east, north = geom.bounds
+    label = polylabel(largest, tolerance=max(east - west, north - south) / 1000 or 1e-6)
+    centroid = geom.centroid
+    area, perimeter = GEOD.geometry_area_perimeter(geom)
+    return {
+        'label': [round(label.x, 6), round(label.y, 6)],
+        'centroid': [round(centroid.x, 6), round(centroid.y, 6)],
+        'area_km2': round(abs(area) / 1e6, 3),
+        'perimeter_km': round(perimeter / 1e3, 3),
+        'bbox': [round(v, 6) for v in (west, south, east, north)],
+    }
+
+
+def district_metrics(prov_code: str, dist_dir: Path, engine: str = 'auto', grid_size: Optional[float] = None,
+                     cache_dir: Optional[Path] = mkd.CACHE_DIR) -> Tuple[Optional[bytes], Dict[str, dict], List[str]]:
+    """Metrics of one district and its kecamatan; also returns the district geometry as WKB."""
+    regency_code, slug = DIST_DIR_RE.match(dist_dir.name).groups()
+    out: Dict[str, dict] = {}
+    for f in sorted(dist_dir.glob('*.geojson')):
+        m = KEC_FILE_RE.match(f.name)
+        if not m:
+            continue
+        geoms = mkd.read_all_geoms(f)
+        if not geoms:
+            continue
+        merged, _ = mkd.dissolve(geoms, engine=engine, grid_size=grid_size)
+        metrics = region_metrics(merged)
+        if metrics:
+            out[m.group(1)] = {'level': 'subdistrict', 'name': to_title(m.group(2)), **metrics}
+
+    wkb, _, warnings = mkd.dissolve_district(prov_code, dist_dir, engine, grid_size, cache_dir)
+    if wkb:
+        metrics = region_metrics(shapely.from_wkb(wkb))
+        if metrics:
+            out[regency_code] = {'level': 'district', 'name': to_title(slug), **metrics}
+    return wkb, out, warnings
+
+
+def province_metrics(wkbs: List[bytes], engine: str, grid_size: Optional[float]) -> Optional[Dict[str, object]]:
+    wkb, _ = bh.dissolve_wkbs(wkbs, engine, grid_size)
+    return region_metrics(shapely.from_wkb(wkb))
+
+
+def build_metrics(jobs: int = 1, engine: str = 'auto', grid_size: Optional[float] = None,
+                  cache_dir: Optional[Path] = mkd.CACHE_DIR) -> Dict[str, dict]:
+    tasks = []
+    prov_names = {}
+    for code in mkd.list_province_codes():
+        prov_dir = mkd.find_province_dir(code)
+        if prov_dir:
+            prov_names[code] = bh.province_name(prov_dir)
+            tasks.extend((code, d) for d in mkd.list_district_dirs(prov_dir)
+                         if DIST_DIR_RE.match(d.name).group(1).startswith(code))
+
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    mapper = pool.map if pool else map
+    regions: Dict[str, dict] = {}
+    try:
+        results = mapper(district_metrics, [c for c, _ in tasks], [d for _, d in tasks],
+                         [engine] * len(tasks), [grid_size] * len(tasks), [cache_dir] * len(tasks))
+        district_wkbs: Dict[str, List[bytes]] = {code: [] for code in prov_names}
+        for (code, _), (wkb, metrics, warnings) in zip(tasks, results):
+            for w in warnings:
+                print(w)
+            regions.update(metrics)
+            if wkb:
+                district_wkbs[code].append(wkb)
+
+        prov_codes = [c for c in prov_names if district_wkbs[c]]
+        results = mapper(province_metrics, [district_wkbs[c] for c in prov_codes],
+                         [engine] * len(prov_codes), [grid_size] * len(prov_codes))
+        for code, metrics in zip(prov_codes, results):
+            if metrics:
+                regions[code] = {'level': 'province', 'name': prov_names[code], **metrics}
+    finally:
+        if pool:
+            pool.shutdown()
+    return dict(sorted(regions.items()))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Precompute label points, areas and bboxes for every region')
+    ap.add_argument('--out', type=Path, default=OUT_FILE, help='Output file (default: public/data/region_metrics.json)')
+    ap.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+    ap.add_argument('--engine', choices=mkd.DISSOLVE_ENGINES, default='auto', help='Dissolve engine (see make_kab_dissolved)')
+    ap.add_argument('--grid-size', type=float, default=None, help='Snap vertices to this precision grid before dissolving')
+    ap.add_argument('--no-cache', action='store_true', help='Re-dissolve every district, ignoring the dissolve cache')
+    args = ap.parse_args()
+
+    regions = build_metrics(args.jobs, args.engine, args.grid_size, None if args.no_cache else mkd.CACHE_DIR)
+    if not regions:
+        raise SystemExit(f'No regions found under {mkd.PUBLIC_DATA}')
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = args.out.with_name(args.out.name + '.tmp')
+    tmp.write_text(json.dumps({'version': 1, 'regions': regions}, ensure_ascii=False, separators=(',', ':')),
+                   encoding='utf-8')
+    os.replace(tmp, args.out)
+    levels: Dict[str, int] = {}
+    for r in regions.values():
+        levels[r['level']] = levels.get(r['level'], 0) + 1
+    print(f"[SUMMARY] {levels.get('province', 0)} provinces, {levels.get('district', 0)} districts, "
+          f"{levels.get('subdistrict', 0)} kecamatan -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
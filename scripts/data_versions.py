@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Versioned snapshots of public/data with feature-level deltas between versions.
+
+Usage:
+  python3 scripts/data_versions.py snapshot [--name 2024-06]        # record the current tree
+  python3 scripts/data_versions.py list
+  python3 scripts/data_versions.py delta 2024-01 2024-06 --out delta.json.gz
+  python3 scripts/data_versions.py apply delta.json.gz --dir /srv/mirror/data
+
+Store layout (--store, default data-versions/):
+  snapshots/<name>.json   {"name", "seq", "created", "parent", "files": {relpath: {"hash", "keys": [...],
+                           "features": {key: [object, geometry hash]}, "container": {...}}},
+                           "unreadable": [relpath, ...]}
+  objects/ab/abcdef...json one feature per file, addressed by the hash of its canonical (sorted-key)
+                           form, so a feature that did not change between versions is stored once
+
+Logic:
+- Every *.geojson under public/data is split into features. A feature's key is its region code
+  (village_code / district_code / regency_code / province_code / prov_id, first one present; the
+  position in the file otherwise), plus its geometry hash and the hash of the whole feature
+- A new snapshot re-reads only files whose content hash differs from the previous snapshot.
+  Files that cannot be read or parsed are listed under "unreadable" instead of being left
+  out, and deltas skip them: they are neither deleted from nor rewritten in a mirror
+- A delta from A to B lists, per file, the added and changed features (full content from B),
+  the removed keys and the new key order; unchanged features are not included, so a refresh
+  that touches a handful of kecamatan produces a delta of a few kilobytes
+- Each file also records its container: Feature or FeatureCollection, the other top-level
+  members (name, crs, ...) in their original order, and the JSON style it was written in
+  (compact, ASCII-escaped or not, trailing newline), so a rebuilt file is byte-identical
+- apply rebuilds the affected files of a mirror from its current files plus the delta and
+  checks each one against the hash of version B
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLIC_DATA = ROOT / 'public' / 'data'
+STORE_DIR = ROOT / 'data-versions'
+
+CODE_KEYS = ('village_code', 'district_code', 'regency_code', 'province_code', 'prov_id')
+
+
+def canonical(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def short_hash(data: bytes, length: int = 20) -> str:
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open('rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()[:20]
+
+
+def read_json(path: Path):
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rt', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def write_json(path: Path, data, compact: bool = True) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    text = json.dumps(data, ensure_ascii=False, separators=(',', ':') if compact else None,
+                      indent=None if compact else 1)
+    if path.suffix == '.gz':
+        tmp.write_bytes(gzip.compress(text.encode('utf-8'), 9))
+    else:
+        tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def detect_style(raw: bytes, data) -> Optional[Dict[str, bool]]:
+    """The compact json.dumps options that reproduce raw exactly, None when none do."""
+    for ensure_ascii in (False, True):
+        text = json.dumps(data, ensure_ascii=ensure_ascii, separators=(',', ':')).encode('utf-8')
+        if raw in (text, text + b'\n'):
+            return {'ensure_ascii': ensure_ascii, 'newline': raw.endswith(b'\n')}
+    return None
+
+
+def file_container(raw: bytes, data) -> dict:
+    """Everything about a file except its features: type, other top-level members, style."""
+    if data.get('type') == 'Feature':
+        return {'type': 'Feature', 'order': None, 'members': {}, 'style': detect_style(raw, data)}
+    return {
+        'type': 'FeatureCollection',
+        'order': list(data),
+        'members': {k: v for k, v in data.items() if k != 'features'},
+        'style': detect_style(raw, data),
+    }
+
+
+def serialize(container: Optional[dict], features: List[dict]) -> bytes:
+    """Inverse of file_container: the file bytes for these features."""
+    container = container or {'type': 'FeatureCollection', 'order': None, 'members': {}, 'style': None}
+    if container['type'] == 'Feature':
+        if len(features) != 1:
+            raise ValueError(f'a single-Feature file needs exactly one feature, got {len(features)}')
+        data = features[0]
+    else:
+        order = container['order'] or ['type', 'features']
+        members = dict(container['members'], type='FeatureCollection')
+        data = {k: features if k == 'features' else members[k] for k in order}
+    style = container['style'] or {'ensure_ascii': False, 'newline': False}
+    text = json.dumps(data, ensure_ascii=style['ensure_ascii'], separators=(',', ':'))
+    return (text + ('\n' if style['newline'] else '')).encode('utf-8')
+
+
+def read_features(path: Path) -> Tuple[dict, List[dict]]:
+    """(container, features) of a data file."""
+    raw = path.read_bytes()
+    data = json.loads(raw)
+    if not isinstance(data, dict):
+        return {'type': 'FeatureCollection', 'order': None, 'members': {}, 'style': None}, []
+    if data.get('type') == 'Feature':
+        return file_container(raw, data), [data]
+    return file_container(raw, data), [f for f in (data.get('features') or []) if isinstance(f, dict)]
+
+
+def feature_keys(features: List[dict]) -> List[str]:
+    """Region code per feature (position when it has none), made unique within the file."""
+    keys, seen = [], {}
+    for i, feat in enumerate(features):
+        props = feat.get('properties') or {}
+        key = next((str(props[k]) for k in CODE_KEYS if props.get(k)), f'#{i}')
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        keys.append(key if n == 0 else f'{key}#{n}')
+    return keys
+
+
+class Store:
+    def __init__(self, root: Path):
+        self.root = root
+        self.snapshots = root / 'snapshots'
+        self.objects = root / 'objects'
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / f'{digest}.json'
+
+    def put(self, data: bytes, digest: Optional[str] = None) -> str:
+        digest = digest or short_hash(data)
+        path = self.object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + '.tmp')
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        return digest
+
+    def get(self, digest: str) -> dict:
+        return json.loads(self.object_path(digest).read_bytes())
+
+    def names(self) -> List[str]:
+        if not self.snapshots.is_dir():
+            return []
+        snaps = [read_json(p) for p in self.snapshots.glob('*.json')]
+        return [s['name'] for s in sorted(snaps, key=lambda s: s['seq'])]
+
+    def load(self, name: str) -> dict:
+        path = self.snapshots / f'{name}.json'
+        if not path.exists():
+            raise SystemExit(f'No snapshot named {name!r} in {self.root} (have: {", ".join(self.names()) or "none"})')
+        return read_json(path)
+
+
+def snapshot_file(store: Store, path: Path) -> Optional[Dict[str, object]]:
+    try:
+        container, features = read_features(path)
+    except Exception as e:
+        print(f'[WARN] {path}: {e}')
+        return None
+    keys = feature_keys(features)
+    entries = {}
+    for key, feat in zip(keys, features):
+        # Addressed by the canonical form, stored in the original key order so files rebuild exactly
+        obj = store.put(json.dumps(feat, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+                        short_hash(canonical(feat)))
+        entries[key] = [obj, short_hash(canonical(feat.get('geometry')), 16)]
+    return {'keys': keys, 'features': entries, 'container': container}
+
+
+def take_snapshot(store: Store, data_dir: Path, name: str) -> Tuple[dict, int]:
+    names = store.names()
+    parent = store.load(names[-1]) if names else {'files': {}}
+    files = {}
+    unreadable = []
+    reread = 0
+    for path in sorted(data_dir.rglob('*.geojson')):
+        rel = path.relative_to(data_dir).as_posix()
+        digest = file_hash(path)
+        previous = parent['files'].get(rel)
+        if previous and previous['hash'] == digest:
+            files[rel] = previous
+            continue
+        entry = snapshot_file(store, path)
+        reread += 1
+        if entry is None:
+            unreadable.append(rel)
+        else:
+            files[rel] = {'hash': digest, **entry}
+    snap = {
+        'name': name,
+        'seq': len(names) + 1,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'parent': names[-1] if names else None,
+        'files': files,
+        'unreadable': unreadable,
+    }
+    write_json(store.snapshots / f'{name}.json', snap)
+    return snap, reread
+
+
+def make_delta(store: Store, a: dict, b: dict) -> dict:
+    # A file B could not read is not known to be gone; leave it out of the delta
+    skipped = set(b.get('unreadable', []))
+    files = {}
+    for rel, new in b['files'].items():
+        old = a['files'].get(rel)
+        if old and old['hash'] == new['hash']:
+            continue
+        old_features = old['features'] if old else {}
+        added, changed = {}, {}
+        for key, (obj, _) in new['features'].items():
+            if key not in old_features:
+                added[key] = store.get(obj)
+            elif old_features[key][0] != obj:
+                changed[key] = store.get(obj)
+        removed = [k for k in old_features if k not in new['features']]
+        files[rel] = {
+            'hash': new['hash'],
+            'added': added,
+            'changed': changed,
+            'removed': removed,
+            'order': new['keys'] if new['keys'] != (old or {}).get('keys') else None,
+            'new': old is None,
+            'container': new.get('container'),
+        }
+    return {
+        'from': a['name'],
+        'to': b['name'],
+        'files': files,
+        'deleted': sorted(rel for rel in a['files'] if rel not in b['files'] and rel not in skipped),
+        'skipped': sorted(skipped),
+    }
+
+
+def apply_delta(delta: dict, target: Path) -> Tuple[int, List[str]]:
+    """
+    Rewrite the files of a mirror that the delta touches. Returns the number of files
+    written and the files whose bytes differ from version B (written in a JSON style
+    that could not be reproduced; their features are still those of B).
+    """
+    written = 0
+    mismatched: List[str] = []
+    for rel in delta['deleted']:
+        path = target / rel
+        if path.exists():
+            path.unlink()
+            written += 1
+    for rel, change in delta['files'].items():
+        path = target / rel
+        features: List[dict] = []
+        container = change.get('container')
+        if not change['new']:
+            try:
+                current, features = read_features(path)
+            except (OSError, ValueError) as e:
+                raise SystemExit(f'Cannot apply delta to {path}: {e} (is the mirror at version {delta["from"]}?)')
+            container = container or current
+        current = dict(zip(feature_keys(features), features))
+        for key in change['removed']:
+            current.pop(key, None)
+        current.update(change['changed'])
+        current.update(change['added'])
+        order = change['order'] or list(current)
+        missing = [k for k in order if k not in current]
+        if missing:
+            raise SystemExit(f'{rel}: delta refers to features the mirror does not have ({missing[0]}, ...)')
+        data = serialize(container, [current[k] for k in order])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        written += 1
+        if hashlib.sha256(data).hexdigest()[:20] != change['hash']:
+            mismatched.append(rel)
+    return written, mismatched
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Versioned snapshots of public/data with feature-level deltas')
+    ap.add_argument('--store', type=Path, default=STORE_DIR, help='Version store directory (default: data-versions)')
+    sub = ap.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('snapshot', help='Record the current data tree as a new version')
+    p.add_argument('--name', help='Version name (default: UTC timestamp)')
+    p.add_argument('--dir', type=Path, default=PUBLIC_DATA, help='Data directory (default: public/data)')
+    sub.add_parser('list', help='List recorded versions')
+    p = sub.add_parser('delta', help='Write the delta from version A to version B')
+    p.add_argument('a')
+    p.add_argument('b')
+    p.add_argument('--out', type=Path, help='Output file (.json or .json.gz; default: stdout)')
+    p = sub.add_parser('apply', help='Apply a delta to a data directory')
+    p.add_argument('delta', type=Path)
+    p.add_argument('--dir', type=Path, default=PUBLIC_DATA, help='Data directory to update (default: public/data)')
+    args = ap.parse_args()
+
+    store = Store(args.store)
+    if args.command == 'snapshot':
+        name = args.name or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        if (store.snapshots / f'{name}.json').exists():
+            raise SystemExit(f'Snapshot {name!r} already exists')
+        snap, reread = take_snapshot(store, args.dir, name)
+        features = sum(len(f['keys']) for f in snap['files'].values())
+        print(f'[OK] Snapshot {name}: {len(snap["files"])} files, {features} features '
+              f'({reread} files re-read, parent {snap["parent"] or "none"})')
+        if snap['unreadable']:
+            print(f'[WARN] {len(snap["unreadable"])} unreadable files recorded; deltas to {name} leave them untouched')
+    elif args.command == 'list':
+        for name in store.names():
+            snap = store.load(name)
+            print(f'{name}  {snap["created"]}  {len(snap["files"])} files')
+    elif args.command == 'delta':
+        delta = make_delta(store, store.load(args.a), store.load(args.b))
+        counts = [sum(len(f[k]) for f in delta['files'].values()) for k in ('added', 'changed', 'removed')]
+        summary = (f'[OK] Delta {args.a} -> {args.b}: {len(delta["files"])} files changed, '
+                   f'{len(delta["deleted"])} deleted; {counts[0]} added, {counts[1]} changed, {counts[2]} removed features')
+        if delta['skipped']:
+            summary += f'\n[WARN] {len(delta["skipped"])} files unreadable in {args.b} were skipped: ' + ', '.join(delta['skipped'][:5])
+        if args.out:
+            write_json(args.out, delta)
+            print(f'{summary} -> {args.out} ({args.out.stat().st_size} bytes)')
+        else:
+            json.dump(delta, sys.stdout, ensure_ascii=False, separators=(',', ':'))
+            print(summary, file=sys.stderr)
+    elif args.command == 'apply':
+        delta = read_json(args.delta)
+        written, mismatched = apply_delta(delta, args.dir)
+        for rel in mismatched:
+            print(f'[WARN] {rel}: same features as {delta["to"]}, but the original JSON formatting could not be '
+                  f'reproduced; its hash differs, so the next snapshot re-reads it')
+        print(f'[OK] Applied {delta["from"]} -> {delta["to"]}: {written} files written '
+              f'({len(mismatched)} not byte-identical to {delta["to"]})')
+
+
+if __name__ == '__main__':
+    main()
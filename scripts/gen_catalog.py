@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Generate lazy-loadable catalog manifests for every province in one run.
+
+Scans all public/data/id<prov>_<slug>/ trees in parallel and writes:
+  public/data/catalog/index.json          small root index (one entry per province)
+  public/data/catalog/prov-<prov>.json    compact per-province manifest
+
+A province manifest has the same shape as ProvinceConfig (src/types/data-config.ts),
+so the frontend can fetch it on demand instead of bundling src/data/prov-*.ts, and
+every file entry also carries data about the file itself:
+  size (bytes), features, vertices, bbox [west, south, east, north], hash (sha256, 16 hex)
+Loaders can use the listed files directly instead of probing URLs for 404s.
+District bundles written by scripts/gen_province_config.py are listed as bundleFile /
+bundleIndexFile, and with --aliases (scripts/publish_hashed.py) every file also gets its
+content-hashed URL (url / fallbackUrl / bundleUrl / bundleIndexUrl), so a manifest
+carries everything the bundled prov-*.ts module does.
+
+Examples:
+  python3 scripts/gen_catalog.py                # all provinces, CPU-count workers
+  python3 scripts/gen_catalog.py --jobs 4 --province 35
+  python3 scripts/gen_catalog.py --aliases public/data-hashed/aliases.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+from gen_province_config import BUNDLE_INDEX_SUFFIX, BUNDLE_SUFFIX
+from publish_hashed import load_aliases
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLIC_DATA = ROOT / 'public' / 'data'
+CATALOG_DIR = PUBLIC_DATA / 'catalog'
+sys.path.insert(0, str(ROOT))
+
+from region_index import DIST_DIR_RE, PROV_DIR_RE, merge_bbox, to_title  # noqa: E402
+
+
+def file_stats(path: str) -> Dict[str, object]:
+    """Size, feature count, vertex count, bbox and content hash of one GeoJSON file."""
+    raw = Path(path).read_bytes()
+    stats: Dict[str, object] = {
+        'size': len(raw),
+        'features': 0,
+        'vertices': 0,
+        'bbox': None,
+        'hash': hashlib.sha256(raw).hexdigest()[:16],
+    }
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        stats['error'] = 'invalid JSON'
+        return stats
+
+    if isinstance(data, dict) and data.get('type') == 'Feature':
+        features = [data]
+    elif isinstance(data, dict):
+        features = [f for f in (data.get('features') or []) if isinstance(f, dict)]
+    else:
+        features = []
+    stats['features'] = len(features)
+
+    try:
+        geoms = np.array([shape(f['geometry']) for f in features if f.get('geometry')], dtype=object)
+    except Exception:
+        stats['error'] = 'invalid geometry'
+        return stats
+    if len(geoms):
+        stats['vertices'] = int(shapely.get_num_coordinates(geoms).sum())
+        bounds = shapely.total_bounds(geoms)
+        if not np.isnan(bounds).any():
+            stats['bbox'] = [round(float(v), 6) for v in bounds]
+    return stats
+
+
+def scan_province(prov_dir: Path) -> Dict[str, List[Path]]:
+    """{district_dir_name: [geojson files]} for one province, in sorted order."""
+    layout: Dict[str, List[Path]] = {}
+    for entry in sorted(prov_dir.iterdir()):
+        if entry.is_dir() and DIST_DIR_RE.match(entry.name):
+            layout[entry.name] = sorted(f for f in entry.iterdir() if f.is_file() and f.name.endswith('.geojson'))
+    return layout
+
+
+def province_manifest(prov: str, slug: str, layout: Dict[str, List[Path]],
+                      stats: Dict[str, Dict[str, object]], aliases: Optional[Dict[str, str]] = None) -> dict:
+    aliases = aliases or {}
+    prov_dir_name = f'id{prov}_{slug}'
+    kab_file = PUBLIC_DATA / f'kab_{prov}.geojson'
+    districts = {}
+    for dist_name, files in layout.items():
+        regency4, dist_slug = DIST_DIR_RE.match(dist_name).groups()
+        if not regency4.startswith(prov):
+            continue
+        path = f'/data/{prov_dir_name}/{dist_name}'
+        entry: Dict[str, object] = {
+            'id': regency4,
+            'name': to_title(dist_slug),
+            'path': path,
+            'subdistricts': [],
+        }
+        for f in files:
+            s = stats[str(f)]
+            url = aliases.get(f'{path}/{f.name}')
+            if f.stem == dist_name:
+                entry['fallbackFile'] = f.name
+                entry['fallback'] = s
+                if url:
+                    entry['fallbackUrl'] = url
+            else:
+                entry['subdistricts'].append({'id': f.stem, **s, **({'url': url} if url else {})})
+        dist_dir = PUBLIC_DATA / prov_dir_name / dist_name
+        bundle, bundle_index = dist_name + BUNDLE_SUFFIX, dist_name + BUNDLE_INDEX_SUFFIX
+        if (dist_dir / bundle).is_file() and (dist_dir / bundle_index).is_file():
+            entry['bundleFile'] = bundle
+            entry['bundleIndexFile'] = bundle_index
+            for key, name in (('bundleUrl', bundle), ('bundleIndexUrl', bundle_index)):
+                if f'{path}/{name}' in aliases:
+                    entry[key] = aliases[f'{path}/{name}']
+        entry['bbox'] = merge_bbox([s['bbox'] for s in entry['subdistricts']] +
+                                   [entry.get('fallback', {}).get('bbox')])
+        districts[regency4] = entry
+
+    districts_file = f'/data/{kab_file.name}' if kab_file.exists() else '/data/kab_37.geojson'
+    return {
+        'id': prov,
+        'name': to_title(slug),
+        'path': f'/data/{prov_dir_name}',
+        'districtsFile': aliases.get(districts_file, districts_file),
+        'bbox': merge_bbox([d['bbox'] for d in districts.values()]),
+        'districts': districts,
+    }
+
+
+def public_url(path: Path) -> str:
+    """'/data/...' URL for a file under public/data (absolute path otherwise)."""
+    try:
+        return '/data/' + path.resolve().relative_to(PUBLIC_DATA).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def write_json(path: Path, data: dict) -> str:
+    """Write compact JSON atomically and return its short content hash."""
+    text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, path)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def index_entry(manifest: dict, out_path: Path, digest: str) -> dict:
+    return {
+        'id': manifest['id'],
+        'name': manifest['name'],
+        'manifest': public_url(out_path),
+        'districts': len(manifest['districts']),
+        'bbox': manifest['bbox'],
+        'hash': digest,
+    }
+
+
+def stats_from_manifest(manifest: dict, prov_dir: Path) -> Dict[str, Dict[str, object]]:
+    """Recover {file path: stats} from a previously written province manifest."""
+    stats: Dict[str, Dict[str, object]] = {}
+    for district in manifest.get('districts', {}).values():
+        dist_dir = prov_dir / district['path'].rsplit('/', 1)[-1]
+        for sub in district.get('subdistricts', []):
+            stats[str(dist_dir / f"{sub['id']}.geojson")] = {k: v for k, v in sub.items() if k not in ('id', 'url')}
+        if district.get('fallbackFile') and district.get('fallback'):
+            stats[str(dist_dir / district['fallbackFile'])] = district['fallback']
+    return stats
+
+
+def update_province(prov_dir: Path, changed: Iterable[str], out_dir: Path = CATALOG_DIR,
+                    aliases: Optional[Dict[str, str]] = None) -> None:
+    """
+    Refresh one province manifest and its root index entry after some files changed.
+
+    Stats of unchanged files are reused from the existing manifest, so only the
+    changed files are opened.
+    """
+    prov, slug = PROV_DIR_RE.match(prov_dir.name).groups()
+    out_path = out_dir / f'prov-{prov}.json'
+    try:
+        old = json.loads(out_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        old = {}
+    stats = stats_from_manifest(old, prov_dir)
+    for path in changed:
+        stats.pop(path, None)
+
+    layout = scan_province(prov_dir)
+    for files in layout.values():
+        for f in files:
+            if str(f) not in stats:
+                stats[str(f)] = file_stats(str(f))
+    manifest = province_manifest(prov, slug, layout, stats, aliases)
+    entry = index_entry(manifest, out_path, write_json(out_path, manifest))
+
+    index_path = out_dir / 'index.json'
+    try:
+        index = json.loads(index_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        index = {'version': 1, 'provinces': []}
+    provinces = [p for p in index['provinces'] if p['id'] != prov] + [entry]
+    index['provinces'] = sorted(provinces, key=lambda p: p['id'])
+    write_json(index_path, index)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Generate catalog manifests for all provinces under public/data')
+    ap.add_argument('--province', help='Only this province code (the root index still lists it alone)')
+    ap.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+    ap.add_argument('--out-dir', type=Path, default=CATALOG_DIR, help='Output directory (default: public/data/catalog)')
+    ap.add_argument('--aliases', help='Alias map from scripts/publish_hashed.py; adds content-hashed URLs')
+    args = ap.parse_args()
+    aliases = load_aliases(args.aliases)
+
+    provinces = []
+    for d in sorted(PUBLIC_DATA.iterdir()):
+        m = PROV_DIR_RE.match(d.name) if d.is_dir() else None
+        if m and (not args.province or m.group(1) == args.province.zfill(2)):
+            provinces.append((m.group(1), m.group(2), d))
+    if not provinces:
+        raise SystemExit(f'No province directories found under {PUBLIC_DATA}')
+
+    layouts = {prov: scan_province(d) for prov, _, d in provinces}
+    files = [str(f) for layout in layouts.values() for fs in layout.values() for f in fs]
+    print(f'Scanning {len(files)} files in {len(provinces)} provinces with {args.jobs} workers...')
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            stats = dict(zip(files, pool.map(file_stats, files, chunksize=16)))
+    else:
+        stats = {f: file_stats(f) for f in files}
+
+    index = []
+    for prov, slug, _ in provinces:
+        manifest = province_manifest(prov, slug, layouts[prov], stats, aliases)
+        out_path = args.out_dir / f'prov-{prov}.json'
+        index.append(index_entry(manifest, out_path, write_json(out_path, manifest)))
+        print(f'Wrote {out_path} ({len(manifest["districts"])} districts)')
+
+    write_json(args.out_dir / 'index.json', {'version': 1, 'provinces': index})
+    bad = [f for f, s in stats.items() if s.get('error')]
+    for f in bad:
+        print(f'  - {Path(f).relative_to(PUBLIC_DATA)}: {stats[f]["error"]}')
+    print(f'Wrote {args.out_dir / "index.json"} ({len(index)} provinces, {len(files)} files, {len(bad)} unreadable)')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,38 +7,49 @@ for district directories and their subdistrict files.
 - Lists subdistrict files excluding the combined fallback file
 - Adds a fallbackFile if present: `id3510_banyuwangi.geojson`
 - Keeps province-level districtsFile as '/data/jawa_timu_kab.geojson'
+- Writes a per-district bundle (<district>.bundle.json + .bundle.idx.json), see
+  gen_province_config.py; pass --no-bundles to skip
+- With --aliases (from scripts/publish_hashed.py) adds content-hashed URLs; --publish
+  publishes the province after writing the bundles and uses the new hashed URLs
 
 Usage:
-  python3 scripts/gen_prov35_config.py
+  python3 scripts/gen_prov35_config.py [--no-bundles] [--aliases public/data-hashed/aliases.json] [--publish]
 """
-import re
+import argparse
+import sys
 from pathlib import Path
 
+import publish_hashed
+from gen_province_config import district_ts, publish_province, write_district_bundle
+from publish_hashed import load_aliases
+
 ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / 'public' / 'data' / 'id35_jawa_timur'
 OUT_FILE = ROOT / 'src' / 'data' / 'prov-35-jawa-timur.ts'
+sys.path.insert(0, str(ROOT))
 
-DIST_DIR_PATTERN = re.compile(r'^id(\d{4})_(.+)$')
-
-
-def to_title(name: str) -> str:
-    # Replace underscores with spaces and title-case, handle common tokens
-    s = name.replace('_', ' ').strip()
-    # Preserve acronyms like "KOTA" into "Kota"
-    return ' '.join([w.capitalize() for w in s.split()])
+from region_index import DIST_DIR_RE, to_title  # noqa: E402
 
 
 def main() -> None:
+    p = argparse.ArgumentParser(description='Generate src/data/prov-35-jawa-timur.ts')
+    p.add_argument('--no-bundles', action='store_true', help='Do not write per-district bundle files')
+    p.add_argument('--aliases', help='Alias map from scripts/publish_hashed.py; adds content-hashed URLs')
+    p.add_argument('--publish', nargs='?', type=Path, const=publish_hashed.HASHED_DIR, metavar='DIR',
+                   help='Publish the province under hashed names (default DIR: public/data-hashed) '
+                        'and use those URLs')
+    args = p.parse_args()
+    aliases = load_aliases(args.aliases)
     if not DATA_DIR.exists():
         raise SystemExit(f"Missing data directory: {DATA_DIR}")
 
-    districts_entries = []
+    districts = []
 
     # Iterate directories sorted by id
     for entry in sorted(DATA_DIR.iterdir()):
         if not entry.is_dir():
             continue
-        m = DIST_DIR_PATTERN.match(entry.name)
+        m = DIST_DIR_RE.match(entry.name)
         if not m:
             continue
         did, slug = m.groups()
@@ -58,23 +69,12 @@ def main() -> None:
             subdistricts.append(base)
 
         # Build TS snippet
-        ts = []
-        ts.append(f"    '{did}': {{")
-        ts.append(f"      id: '{did}',")
-        ts.append(f"      name: '{name}',")
-        ts.append(f"      path: '/data/id35_jawa_timur/{entry.name}',")
-        ts.append("      subdistricts: [")
-        for s in subdistricts:
-            ts.append(f"        {{ id: '{s}' }},")
-        ts.append("      ],")
-        if fallback_file:
-            ts.append(f"      fallbackFile: '{fallback_file}'")
-        else:
-            # Remove trailing comma on subdistricts if no fallback
-            if ts[-1].endswith(','):
-                ts[-1] = ts[-1][:-1]
-        ts.append("    },")
-        districts_entries.append('\n'.join(ts))
+        bundle = None if args.no_bundles else write_district_bundle(entry, subdistricts)
+        districts.append((did, name, f'/data/id35_jawa_timur/{entry.name}', subdistricts, fallback_file, bundle))
+
+    if args.publish:
+        aliases = publish_province(DATA_DIR, '/data/jawa_timu_kab.geojson', args.publish, aliases)
+    districts_entries = [district_ts(*district, aliases) for district in districts]
 
     # Compose full TS file
     header = "import { ProvinceConfig } from '../types/data-config';\n\n"
@@ -84,7 +84,7 @@ def main() -> None:
         "  name: 'Jawa Timur',\n"
         "  // Province-level data base (not used directly for subdistricts but kept consistent)\n"
         "  path: '/data/id35_jawa_timur',\n"
-        "  districtsFile: '/data/jawa_timu_kab.geojson',\n"
+        f"  districtsFile: '{aliases.get('/data/jawa_timu_kab.geojson', '/data/jawa_timu_kab.geojson')}',\n"
         "  districts: {\n"
     )
     body = '\n'.join(districts_entries)
@@ -8,42 +8,158 @@ collects subdistrict .geojson basenames, detects a combined fallback file, and
 writes a ProvinceConfig module at:
   src/data/prov-<province>-<slug>.ts
 
+It also writes one bundle per district next to the kecamatan files, so a client
+can fetch a whole district in one request instead of one request per kecamatan:
+  <district>.bundle.json      FeatureCollection with every kecamatan's features, in
+                              config order, plus a trailing "subdistricts" member
+                              listing [{id, features}] to map features back
+  <district>.bundle.idx.json  {id: [offset, length, features]} byte ranges of each
+                              kecamatan's features inside the bundle, for HTTP Range
+                              requests (wrap the slice in [ ] to parse it)
+Bundles use .json, not .geojson, so they are never mistaken for kecamatan files.
+Skip them with --no-bundles.
+
+With --aliases public/data-hashed/aliases.json (see scripts/publish_hashed.py) every
+file reference also gets its content-hashed URL (url / fallbackUrl / bundleUrl /
+bundleIndexUrl, and districtsFile), so the app can use immutable caching.
+--publish does both in one run: once the bundles are written, the province's files
+and the districts file are published to public/data-hashed, their entries are merged
+into aliases.json there, and the config gets their hashed URLs.
+
 Examples:
   python3 scripts/gen_province_config.py --province 51 --slug bali --name "Bali"
   python3 scripts/gen_province_config.py --province 35 --slug jawa_timur --name "Jawa Timur" \
     --districts-file /data/jawa_timu_kab.geojson
+  python3 scripts/gen_province_config.py --province 51 --slug bali --publish
 
 By default, districtsFile is set to /data/kab_37.geojson (shared all-province file).
 Override via --districts-file if you have a province-specific districts collection.
 """
 import argparse
-import re
+import json
+import os
+import sys
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import publish_hashed
+from publish_hashed import load_aliases
 
 ROOT = Path(__file__).resolve().parents[1]
 PUBLIC_DATA = ROOT / 'public' / 'data'
 OUT_DIR = ROOT / 'src' / 'data'
+sys.path.insert(0, str(ROOT))
 
-# id<prov><regency>_<slug>
-DIST_DIR_PATTERN = re.compile(r"^id(\d{2}\d{2})_(.+)$")  # captures 4-digit regency code after province
+from region_index import DIST_DIR_RE, to_title  # noqa: E402
 
+BUNDLE_SUFFIX = '.bundle.json'
+BUNDLE_INDEX_SUFFIX = '.bundle.idx.json'
 
-def to_title(name: str) -> str:
-    s = name.replace('_', ' ').strip()
-    return ' '.join(w.capitalize() for w in s.split())
 
+def write_district_bundle(dist_dir: Path, subdistricts: List[str]) -> Optional[Tuple[str, str]]:
+    """
+    Write <district>.bundle.json and <district>.bundle.idx.json for one district.
 
-def gen_province_ts(prov: str, slug: str, name: str, districts_file: str) -> str:
+    Returns (bundle_name, index_name), or None if no kecamatan file could be read.
+    """
+    parts: List[bytes] = []
+    listing = []
+    for stem in subdistricts:
+        try:
+            with (dist_dir / f"{stem}.geojson").open('r', encoding='utf-8') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Skipping {stem} in bundle: {e}")
+            continue
+        features = (data.get('features') or []) if isinstance(data, dict) else []
+        if not features:
+            continue
+        encoded = ','.join(json.dumps(f, ensure_ascii=False, separators=(',', ':')) for f in features)
+        parts.append(encoded.encode('utf-8'))
+        listing.append((stem, len(features)))
+    if not parts:
+        return None
+
+    head = b'{"type":"FeatureCollection","features":['
+    index = {}
+    offset = len(head)
+    for (stem, count), part in zip(listing, parts):
+        index[stem] = [offset, len(part), count]
+        offset += len(part) + 1  # separating comma
+    tail = json.dumps([{'id': stem, 'features': count} for stem, count in listing], separators=(',', ':'))
+    body = head + b','.join(parts) + b'],"subdistricts":' + tail.encode('utf-8') + b'}'
+
+    bundle_name = dist_dir.name + BUNDLE_SUFFIX
+    index_name = dist_dir.name + BUNDLE_INDEX_SUFFIX
+    # Written to .tmp and renamed, so a dev server or watcher never serves half a bundle
+    for name, data in ((bundle_name, body), (index_name, json.dumps(index, separators=(',', ':')).encode('utf-8'))):
+        tmp = dist_dir / (name + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, dist_dir / name)
+    return bundle_name, index_name
+
+
+def district_ts(regency4: str, dist_name: str, path: str, subdistricts: List[str],
+                fallback_file: Optional[str], bundle: Optional[Tuple[str, str]],
+                aliases: Optional[Dict[str, str]] = None) -> str:
+    aliases = aliases or {}
+    ts = []
+    ts.append(f"    '{regency4}': {{")
+    ts.append(f"      id: '{regency4}',")
+    ts.append(f"      name: '{dist_name}',")
+    ts.append(f"      path: '{path}',")
+    ts.append("      subdistricts: [")
+    for s in subdistricts:
+        url = aliases.get(f"{path}/{s}.geojson")
+        if url:
+            ts.append(f"        {{ id: '{s}', url: '{url}' }},")
+        else:
+            ts.append(f"        {{ id: '{s}' }},")
+    ts.append("      ],")
+    if fallback_file:
+        ts.append(f"      fallbackFile: '{fallback_file}',")
+        if f"{path}/{fallback_file}" in aliases:
+            ts.append(f"      fallbackUrl: '{aliases[f'{path}/{fallback_file}']}',")
+    if bundle:
+        ts.append(f"      bundleFile: '{bundle[0]}',")
+        ts.append(f"      bundleIndexFile: '{bundle[1]}',")
+        for key, name in (('bundleUrl', bundle[0]), ('bundleIndexUrl', bundle[1])):
+            if f"{path}/{name}" in aliases:
+                ts.append(f"      {key}: '{aliases[f'{path}/{name}']}',")
+    if ts[-1].endswith(','):
+        ts[-1] = ts[-1][:-1]
+    ts.append("    },")
+    return '\n'.join(ts)
+
+
+def publish_province(base_dir: Path, districts_file: str, hashed_dir: Path = publish_hashed.HASHED_DIR,
+                     aliases: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Publish a province directory (and the districts file) under hashed names, merge
+    them into hashed_dir/aliases.json and return `aliases` updated with them.
+    """
+    files = [f for f in base_dir.rglob('*') if f.is_file()]
+    if districts_file.startswith('/data/'):
+        files.append(PUBLIC_DATA / districts_file[len('/data/'):])
+    published = publish_hashed.publish(PUBLIC_DATA, hashed_dir, files)
+    publish_hashed.write_aliases(hashed_dir, published, merge=True)
+    print(f"Published {len(published)} files to {hashed_dir}")
+    return {**(aliases or {}), **published}
+
+
+def gen_province_ts(prov: str, slug: str, name: str, districts_file: str, bundles: bool = True,
+                    aliases: Optional[Dict[str, str]] = None, publish_to: Optional[Path] = None) -> str:
+    aliases = aliases or {}
     prov_dir_name = f"id{prov}_{slug}"
     base_dir = PUBLIC_DATA / prov_dir_name
     if not base_dir.exists():
         raise SystemExit(f"Missing data directory: {base_dir}")
 
-    entries = []
+    districts = []
     for entry in sorted(base_dir.iterdir()):
         if not entry.is_dir():
             continue
-        m = DIST_DIR_PATTERN.match(entry.name)
+        m = DIST_DIR_RE.match(entry.name)
         if not m:
             # not a district folder, skip
             continue
@@ -66,22 +182,14 @@ def gen_province_ts(prov: str, slug: str, name: str, districts_file: str) -> str
                 continue
             subdistricts.append(stem)
 
-        ts = []
-        ts.append(f"    '{regency4}': {{")
-        ts.append(f"      id: '{regency4}',")
-        ts.append(f"      name: '{dist_name}',")
-        ts.append(f"      path: '/data/{prov_dir_name}/{entry.name}',")
-        ts.append("      subdistricts: [")
-        for s in subdistricts:
-            ts.append(f"        {{ id: '{s}' }},")
-        ts.append("      ],")
-        if fallback_file:
-            ts.append(f"      fallbackFile: '{fallback_file}'")
-        else:
-            if ts[-1].endswith(','):
-                ts[-1] = ts[-1][:-1]
-        ts.append("    },")
-        entries.append('\n'.join(ts))
+        bundle = write_district_bundle(entry, subdistricts) if bundles else None
+        districts.append((regency4, dist_name, f'/data/{prov_dir_name}/{entry.name}',
+                          subdistricts, fallback_file, bundle))
+
+    # Published after the bundles are written, so their hashes are final
+    if publish_to:
+        aliases = publish_province(base_dir, districts_file, publish_to, aliases)
+    entries = [district_ts(*district, aliases) for district in districts]
 
     header = "import { ProvinceConfig } from '../types/data-config';\n\n"
     start = (
@@ -89,7 +197,7 @@ def gen_province_ts(prov: str, slug: str, name: str, districts_file: str) -> str
         f"  id: '{prov}',\n"
         f"  name: '{name}',\n"
         f"  path: '/data/id{prov}_{slug}',\n"
-        f"  districtsFile: '{districts_file}',\n"
+        f"  districtsFile: '{aliases.get(districts_file, districts_file)}',\n"
         "  districts: {\n"
     )
     body = '\n'.join(entries)
@@ -108,6 +216,11 @@ def main() -> None:
     p.add_argument('--name', required=False, help='Province display name (e.g., Bali)')
     p.add_argument('--districts-file', default='/data/kab_37.geojson', help='URL for the districts collection file')
     p.add_argument('--out', help='Override output TS path (default: src/data/prov-<prov>-<slug>.ts)')
+    p.add_argument('--no-bundles', action='store_true', help='Do not write per-district bundle files')
+    p.add_argument('--aliases', help='Alias map from scripts/publish_hashed.py; adds content-hashed URLs')
+    p.add_argument('--publish', nargs='?', type=Path, const=publish_hashed.HASHED_DIR, metavar='DIR',
+                   help='Publish the province under hashed names (default DIR: public/data-hashed) '
+                        'and use those URLs')
 
     args = p.parse_args()
     prov = str(args.province).zfill(2)  # normalize to 2-digit province code
@@ -115,7 +228,8 @@ def main() -> None:
     name = args.name or to_title(slug)
     districts_file = args.districts_file
 
-    ts_content = gen_province_ts(prov, slug, name, districts_file)
+    ts_content = gen_province_ts(prov, slug, name, districts_file, bundles=not args.no_bundles,
+                                 aliases=load_aliases(args.aliases), publish_to=args.publish)
     out_path = Path(args.out) if args.out else (OUT_DIR / f"prov-{prov}-{slug}.ts")
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(ts_content, encoding='utf-8')
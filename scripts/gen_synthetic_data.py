@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic province/kabupaten/kecamatan tree laid out like public/data.
+
+The real data lives in Git LFS and is too small to show how the batch tools scale, so
+benchmarks (scripts/bench_pipeline.py) run on generated trees instead.
+
+Usage:
+  python3 scripts/gen_synthetic_data.py --scale 1 [--out .cache/synthetic/x1] [--edge-vertices 100]
+  python3 scripts/gen_synthetic_data.py --scale 0.1      # a tenth of the national tree
+  python3 scripts/gen_synthetic_data.py --scale 10       # ten times the national tree
+
+Output (--out, default .cache/synthetic/x<scale>):
+  data/id<prov>_<slug>/id<regency>_<slug>/id<kec>_<slug>.geojson   village features per kecamatan
+  data/id<prov>_<slug>/id<regency>_<slug>/id<regency>_<slug>.geojson combined fallback file
+  national.geojson   every village in one FeatureCollection (input of process_geojson --split-all)
+
+Logic:
+- --scale is a multiple of the real national tree (38 provinces, 514 kabupaten/kota,
+  ~7.1k kecamatan files, ~0.6 GB): --scale 1 is national size (514 kabupaten x 14 kecamatan
+  x 12 desa = 86,352 villages of ~400 vertices). Below 1 the tree shrinks to fewer
+  kabupaten (--scale 0.01: 5 kabupaten, 840 villages). Above 1 both the number of
+  kabupaten and the vertices per edge grow by sqrt(scale), so the total vertex count grows
+  linearly: --scale 100 has 5,140 kabupaten of ~4,000-vertex villages. Provinces hold at
+  most 99 kabupaten (two-digit regency codes), extra ones go to extra provinces
+- Every village is one cell of a regular grid. Cell edges are wavy, and each edge is a
+  function of the grid line it lies on only, so neighbouring villages share their edges
+  vertex for vertex. The kecamatan of a district form a clean polygonal coverage, like
+  the real data, which is what the dissolve and validation checks expect
+- Properties follow the HDX/BPS village schema used in public/data (province_code id51,
+  regency_code id5106, district_code id5106020, village_code id5106020003, ...)
+- Output is deterministic for a given scale and --edge-vertices
+"""
+import argparse
+import json
+import math
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT_ROOT = ROOT / '.cache' / 'synthetic'
+
+# Real counts; --scale 1 reproduces them
+NATIONAL_PROVINCES = 38
+NATIONAL_DISTRICTS = 514
+MAX_DISTRICTS_PER_PROVINCE = 99
+MAX_PROVINCES = 89  # province codes 11..99
+KECAMATAN_PER_DISTRICT = 14
+VILLAGE_COLS, VILLAGE_ROWS = 4, 3
+CELL = 0.02
+ORIGIN = (95.0, -10.0)
+
+
+def edge(line: int, seg: int, axis: str, n: int) -> np.ndarray:
+    """Offsets (in cells) across grid line `line`, segment `seg`; zero at both corners."""
+    t = np.linspace(0.0, 1.0, n + 1)
+    h = (line * 73856093) ^ (seg * 19349663) ^ (83492791 if axis == 'h' else 0)
+    waves = 1 + h % 3
+    amp = (0.06 + 0.03 * (h % 4)) * (1 if h % 2 else -1)
+    return amp * np.sin(math.pi * waves * t)
+
+
+def cell_ring(i: int, j: int, n: int) -> np.ndarray:
+    """Closed counter-clockwise ring of grid cell (column i, row j) in cell units."""
+    t = np.linspace(0.0, 1.0, n + 1)
+    bottom = np.column_stack([i + t, j + edge(j, i, 'h', n)])
+    right = np.column_stack([i + 1 + edge(i + 1, j, 'v', n), j + t])
+    top = np.column_stack([i + t, j + 1 + edge(j + 1, i, 'h', n)])[::-1]
+    left = np.column_stack([i + edge(i, j, 'v', n), j + t])[::-1]
+    return np.concatenate([bottom[:-1], right[:-1], top[:-1], left])
+
+
+def growth(scale: float) -> float:
+    """Factor applied to the kabupaten count (and above scale 1 to the edge vertices)."""
+    return scale if scale <= 1 else math.sqrt(scale)
+
+
+def district_layout(scale: float) -> List[Tuple[str, List[str]]]:
+    """[(province code, [regency codes])] for the requested scale."""
+    districts = max(1, round(NATIONAL_DISTRICTS * growth(scale)))
+    provinces = max(round(NATIONAL_PROVINCES * min(scale, 1)), math.ceil(districts / MAX_DISTRICTS_PER_PROVINCE))
+    provinces = min(districts, max(1, provinces))
+    if provinces > MAX_PROVINCES:
+        raise ValueError(f'--scale {scale:g} needs {provinces} provinces; at most {MAX_PROVINCES} fit the codes')
+    layout = []
+    for p in range(provinces):
+        prov = str(11 + p)
+        count = districts // provinces + (p < districts % provinces)
+        layout.append((prov, [f'{prov}{r + 1:02d}' for r in range(count)]))
+    return layout
+
+
+def village_feature(prov: str, reg: str, kec: str, village: str, ring: np.ndarray) -> dict:
+    lonlat = np.round(ring * CELL + ORIGIN, 7).tolist()
+    return {
+        'type': 'Feature',
+        'properties': {
+            'country_code': 'id',
+            'country': 'Indonesia',
+            'province_code': f'id{prov}',
+            'province': f'Synthetic {prov}',
+            'regency_code': f'id{reg}',
+            'regency': f'Kabupaten {reg}',
+            'district_code': f'id{kec}',
+            'district': f'Kecamatan {kec}',
+            'village_code': f'id{village}',
+            'village': f'Desa {village}',
+            'source': 'synthetic',
+            'date': '2019-12-20',
+            'valid_on': '2020-04-01',
+        },
+        'geometry': {'type': 'MultiPolygon', 'coordinates': [[lonlat]]},
+    }
+
+
+def write_collection(path: Path, features: List[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with tmp.open('w', encoding='utf-8') as fh:
+        json.dump({'type': 'FeatureCollection', 'features': features}, fh, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def generate(out_dir: Path, scale: float = 1, edge_vertices: int = 100) -> Dict[str, int]:
+    """Write the synthetic tree; returns feature/vertex/file counts."""
+    data_dir = out_dir / 'data'
+    stats = {'provinces': 0, 'districts': 0, 'kecamatan': 0, 'villages': 0, 'vertices': 0}
+    layout = district_layout(scale)
+    edge_vertices = max(1, round(edge_vertices * max(growth(scale), 1)))
+    # Provinces are blocks on a grid of their own, kept roughly square so even large
+    # scales stay within valid longitudes and latitudes
+    dist_w = KECAMATAN_PER_DISTRICT * VILLAGE_COLS
+    cols = math.ceil(math.sqrt(max(len(regencies) for _, regencies in layout)))
+    rows = math.ceil(max(len(regencies) for _, regencies in layout) / cols)
+    prov_w = cols * dist_w + VILLAGE_COLS  # gap between provinces
+    prov_h = (rows + 1) * VILLAGE_ROWS
+    per_row = math.ceil(math.sqrt(len(layout) * prov_h / prov_w))
+    national = out_dir / 'national.geojson'
+    national.parent.mkdir(parents=True, exist_ok=True)
+    tmp = national.with_name(national.name + '.tmp')
+    first = True
+    with tmp.open('w', encoding='utf-8') as nat:
+        nat.write('{"type":"FeatureCollection","features":[\n')
+        for p, (prov, regencies) in enumerate(layout):
+            prov_dir = data_dir / f'id{prov}_synthetic_{prov}'
+            col0, row0 = (p % per_row) * prov_w, (p // per_row) * prov_h
+            for r, reg in enumerate(regencies):
+                di, dj = col0 + (r % cols) * dist_w, row0 + (r // cols) * VILLAGE_ROWS
+                dist_dir = prov_dir / f'id{reg}_kabupaten_{reg}'
+                district_features = []
+                for k in range(KECAMATAN_PER_DISTRICT):
+                    kec = f'{reg}{(k + 1) * 10:03d}'
+                    features = []
+                    for v in range(VILLAGE_COLS * VILLAGE_ROWS):
+                        ring = cell_ring(di + k * VILLAGE_COLS + v % VILLAGE_COLS, dj + v // VILLAGE_COLS, edge_vertices)
+                        features.append(village_feature(prov, reg, kec, f'{kec}{v + 1:03d}', ring))
+                        stats['vertices'] += len(ring)
+                    write_collection(dist_dir / f'id{kec}_kecamatan_{kec}.geojson', features)
+                    district_features.extend(features)
+                    stats['kecamatan'] += 1
+                write_collection(dist_dir / f'{dist_dir.name}.geojson', district_features)
+                for f in district_features:
+                    nat.write(('' if first else ',\n') + json.dumps(f, separators=(',', ':')))
+                    first = False
+                stats['villages'] += len(district_features)
+                stats['districts'] += 1
+            stats['provinces'] += 1
+        nat.write('\n]}\n')
+    os.replace(tmp, national)
+    return stats
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Generate a synthetic public/data-style tree for benchmarks')
+    ap.add_argument('--scale', type=float, default=1, help='Multiple of the national tree (0.01, 0.1, 1 = national, 10, 100)')
+    ap.add_argument('--out', type=Path, help='Output directory (default: .cache/synthetic/x<scale>)')
+    ap.add_argument('--edge-vertices', type=int, default=100,
+                    help='Vertices per village edge at scale 1 and below (default: 100)')
+    args = ap.parse_args()
+
+    out = args.out or OUT_ROOT / f'x{args.scale:g}'
+    try:
+        stats = generate(out, args.scale, args.edge_vertices)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"[OK] {out}: {stats['provinces']} provinces, {stats['districts']} districts, "
+          f"{stats['kecamatan']} kecamatan, {stats['villages']} villages, {stats['vertices']:,} vertices")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,32 +9,54 @@ Usage (from repo root):
     --output public/data/jawa_timu_kab.geojson \
     --province 35
 
+Split every province in one streaming pass instead (writes <out-dir>/kab_<prov>.geojson):
+  python3 scripts/make_jawa_timu_kab.py --source public/data/kab_37.geojson --all-provinces
+
+The default --out-dir, public/data/kab_split, is a new output that no loader reads.
+The public/data/kab_<prov>.geojson files the province configs load are the dissolved
+boundaries written by make_kab_dissolved.py / build_hierarchy.py, with a different
+property schema; existing outputs are never replaced unless --force is given, so
+pointing --out-dir at public/data cannot silently overwrite them.
+
+Outputs are written to <path>.tmp and moved into place only once the whole source has
+been read, so a failed run leaves existing files untouched.
+
 The script is defensive about schema differences and checks multiple common
-property names to determine province and district codes.
+property names to determine province and district codes. The source is streamed
+with ijson; which property key holds the code is decided once per file from a
+sample of features, then only that key is read for every feature.
 """
 import argparse
+import contextlib
+import itertools
 import json
 import os
 import re
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
+
+import ijson
 
 PROVINCE_CODE = '35'
+SAMPLE_SIZE = 50
+
+DIGITS_RE = re.compile(r"\d+")
+FOUR_DIGITS_RE = re.compile(r"\d{4}")
 
 # Common property keys seen across datasets
 PROV_KEYS = [
-    'prov_id', 'ID_PROV', 'kode_prov', 'KODE_PROV', 'Kode_Prov', 'PROVNO'
+    'prov_id', 'ID_PROV', 'kode_prov', 'KODE_PROV', 'Kode_Prov', 'PROVNO', 'province_code'
 ]
 DISTRICT_KEYS = [
     'kab_id', 'ID_KAB', 'id_kab', 'kab_kota', 'KABKOTNO', 'KAB_NO',
-    'kode_kab', 'KODE_KAB', 'Kode_Kab', 'kode', 'KODE', 'REGC', 'WADMKK'
+    'kode_kab', 'KODE_KAB', 'Kode_Kab', 'kode', 'KODE', 'REGC', 'WADMKK', 'regency_code'
 ]
 
 def normalize_digits(val: Any) -> Optional[str]:
     if val is None:
         return None
     s = str(val)
-    m = re.search(r"\d+", s)
+    m = DIGITS_RE.search(s)
     return m.group(0) if m else None
 
 
@@ -49,51 +71,162 @@ def get_province_code(props: Dict[str, Any]) -> Optional[str]:
     for key in DISTRICT_KEYS:
         if key in props:
             digits = normalize_digits(props.get(key))
-            if digits and re.fullmatch(r"\d{4}", digits):
+            if digits and FOUR_DIGITS_RE.fullmatch(digits):
                 return digits[:2]
     # Some datasets may encode in a generic 'kode' or nested codes
     kode = normalize_digits(props.get('kode') or props.get('KODE'))
-    if kode and re.fullmatch(r"\d{4}", kode):
+    if kode and FOUR_DIGITS_RE.fullmatch(kode):
         return kode[:2]
     return None
 
 
+class SchemaResolver:
+    """
+    Property keys that carry the province code in one source file.
+
+    Resolved once from a sample of features so the per-feature work is a dict
+    lookup plus one precompiled regex, instead of probing every candidate key.
+    Features that lack the resolved key fall back to get_province_code().
+    """
+
+    def __init__(self, prov_key: Optional[str] = None, district_key: Optional[str] = None):
+        self.prov_key = prov_key
+        self.district_key = district_key
+
+    @classmethod
+    def from_sample(cls, features: List[Dict[str, Any]]) -> 'SchemaResolver':
+        props_list = [f.get('properties') or {} for f in features]
+        for key in PROV_KEYS:
+            if any(normalize_digits(p.get(key)) for p in props_list):
+                return cls(prov_key=key)
+        for key in DISTRICT_KEYS:
+            if any(FOUR_DIGITS_RE.fullmatch(normalize_digits(p.get(key)) or '') for p in props_list):
+                return cls(district_key=key)
+        return cls()
+
+    def province_code(self, props: Dict[str, Any]) -> Optional[str]:
+        if self.prov_key is not None:
+            val = props.get(self.prov_key)
+            if val is not None:
+                m = DIGITS_RE.search(str(val))
+                if m:
+                    return m.group(0)
+        elif self.district_key is not None:
+            val = props.get(self.district_key)
+            if val is not None:
+                m = DIGITS_RE.search(str(val))
+                if m and len(m.group(0)) == 4:
+                    return m.group(0)[:2]
+        return get_province_code(props)
+
+    def describe(self) -> str:
+        if self.prov_key:
+            return f"province code from '{self.prov_key}'"
+        if self.district_key:
+            return f"province code from first two digits of '{self.district_key}'"
+        return 'no common code key found, probing all candidate keys per feature'
+
+
+def iter_features(source: str):
+    with open(source, 'rb') as f:
+        yield from ijson.items(f, 'features.item', use_float=True)
+
+
+def resolve_schema(source: str, sample_size: int = SAMPLE_SIZE) -> SchemaResolver:
+    return SchemaResolver.from_sample(list(itertools.islice(iter_features(source), sample_size)))
+
+
+def split_by_province(source: str, output_for: Callable[[str], Optional[str]],
+                      resolver: SchemaResolver) -> Dict[str, int]:
+    """
+    Stream the source once and append each feature to output_for(province_code).
+
+    output_for returns the output path for a province, or None to drop the
+    feature. Features go to <output_path>.tmp; the temporary files replace the
+    outputs only after the whole source was read and are removed on any error.
+    Returns {output_path: feature_count}.
+    """
+    handles: Dict[str, Any] = {}
+    counts: Dict[str, int] = {}
+    try:
+        for feat in iter_features(source):
+            prov = resolver.province_code(feat.get('properties') or {})
+            out_path = output_for(prov) if prov else None
+            if out_path is None:
+                continue
+            fh = handles.get(out_path)
+            if fh is None:
+                os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+                fh = handles[out_path] = open(out_path + '.tmp', 'w', encoding='utf-8')
+                fh.write('{"type": "FeatureCollection", "features": [')
+                counts[out_path] = 0
+            if counts[out_path]:
+                fh.write(', ')
+            fh.write(json.dumps(feat, ensure_ascii=False))
+            counts[out_path] += 1
+        for fh in handles.values():
+            fh.write(']}')
+            fh.close()
+    except BaseException:
+        for out_path, fh in handles.items():
+            fh.close()
+            with contextlib.suppress(OSError):
+                os.remove(out_path + '.tmp')
+        raise
+    for out_path in handles:
+        os.replace(out_path + '.tmp', out_path)
+    return counts
+
+
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument('--source', default='public/data/kab_37.geojson', help='Path to nationwide kabupaten GeoJSON')
     parser.add_argument('--output', default='public/data/jawa_timu_kab.geojson', help='Output path for Jawa Timur districts')
     parser.add_argument('--province', default=PROVINCE_CODE, help='Province code to filter (e.g., 35 for Jawa Timur)')
+    parser.add_argument('--all-provinces', action='store_true',
+                        help='Write kab_<prov>.geojson for every province found, in one pass over the source')
+    parser.add_argument('--out-dir', default='public/data/kab_split',
+                        help='Output directory for --all-provinces (default: public/data/kab_split, not read by the loaders)')
+    parser.add_argument('--force', action='store_true', help='Replace existing kab_<prov>.geojson files in --out-dir')
     args = parser.parse_args()
 
     if not os.path.exists(args.source):
         print(f"Source not found: {args.source}", file=sys.stderr)
         sys.exit(1)
 
-    with open(args.source, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    features = data.get('features') or []
-    if not isinstance(features, list):
-        print('Invalid GeoJSON: features is not a list', file=sys.stderr)
-        sys.exit(1)
-
-    kept = []
-    for feat in features:
-        props = feat.get('properties') or {}
-        prov = get_province_code(props)
-        if prov == str(args.province):
-            kept.append(feat)
-
-    out = {
-        'type': 'FeatureCollection',
-        'features': kept,
-    }
-
-    os.makedirs(os.path.dirname(args.output), exist_ok=True)
-    with open(args.output, 'w', encoding='utf-8') as f:
-        json.dump(out, f, ensure_ascii=False)
-
-    print(f"Wrote {len(kept)} features to {args.output}")
+    resolver = resolve_schema(args.source)
+    print(f"Schema: {resolver.describe()}")
+
+    if args.all_provinces:
+        targets: Dict[str, Optional[str]] = {}
+        skipped = []
+
+        def output_for(prov: str) -> Optional[str]:
+            if prov not in targets:
+                out_path = os.path.join(args.out_dir, f'kab_{prov}.geojson')
+                if not args.force and os.path.exists(out_path):
+                    skipped.append(out_path)
+                    out_path = None
+                targets[prov] = out_path
+            return targets[prov]
+
+        counts = split_by_province(args.source, output_for, resolver)
+        for out_path in sorted(skipped):
+            print(f"[SKIP] {out_path} exists (use --force to overwrite)")
+        for out_path in sorted(counts):
+            print(f"Wrote {counts[out_path]} features to {out_path}")
+        print(f"Split {sum(counts.values())} features into {len(counts)} province files")
+        return
+
+    province = str(args.province)
+    counts = split_by_province(args.source, lambda prov: args.output if prov == province else None, resolver)
+    if not counts:
+        # Keep writing an (empty) collection so downstream configs still resolve
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'type': 'FeatureCollection', 'features': []}, f, ensure_ascii=False)
+
+    print(f"Wrote {counts.get(args.output, 0)} features to {args.output}")
 
 
 if __name__ == '__main__':
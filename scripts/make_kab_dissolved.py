@@ -3,33 +3,52 @@
 Generate dissolved district (kabupaten/kota) boundaries per province.
 
 Usage:
-  python3 scripts/make_kab_dissolved.py --province 33 [--force]
-  python3 scripts/make_kab_dissolved.py --all [--force]
+  python3 scripts/make_kab_dissolved.py --province 33 [--force] [--no-cache]
+  python3 scripts/make_kab_dissolved.py --all [--force] [--jobs 8]
 
 Logic:
 - For each province directory under public/data named id<prov>_<slug>/, e.g. id33_jawa_tengah/
 - For each district directory inside, e.g. id3301_cilacap/
   - Prefer fallback file named exactly as folder: id3301_cilacap.geojson
   - If not present, union all .geojson files inside the district directory
-- Dissolve all geometries per district using shapely.ops.unary_union into a single polygon/multipolygon
+- Dissolve all geometries per district into a single polygon/multipolygon. Kecamatan in a
+  district normally form a clean polygonal coverage (shared edges, no overlaps), which is
+  merged with the much faster shapely.coverage_union_all; anything else falls back to
+  shapely.ops.unary_union. --engine unary skips the coverage check, --grid-size snaps vertices to a
+  precision grid first to close slivers, and each province reports the path per district
+- Each district's dissolved geometry is cached under .cache/kab_dissolved/, keyed by a
+  hash of the district's .geojson files (plus engine/grid size). A --force rebuild only
+  re-dissolves districts whose inputs changed and reassembles the rest from the cache;
+  --no-cache disables this
 - Write FeatureCollection to public/data/kab_<prov>.geojson with features containing
   properties: regency_code, province_code, kab_name
+- With --jobs N, districts of all requested provinces are dissolved across N worker
+  processes (geometries come back as WKB); each province file keeps sorted district order
 
-Requires: shapely
+Requires: shapely>=2.0 (coverage validation uses shapely>=2.1 / GEOS>=3.12 when available)
 """
 import argparse
+import hashlib
 import json
-import re
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import shapely
+from shapely import STRtree
 from shapely.geometry import shape, mapping
 from shapely.ops import unary_union
 
 ROOT = Path(__file__).resolve().parents[1]
 PUBLIC_DATA = ROOT / 'public' / 'data'
+CACHE_DIR = ROOT / '.cache' / 'kab_dissolved'
+sys.path.insert(0, str(ROOT))
 
-PROV_DIR_RE = re.compile(r'^id(\d{2})_.+$')
-DIST_DIR_RE = re.compile(r'^id(\d{4})_(.+)$')
+from region_index import DIST_DIR_RE, PROV_DIR_RE  # noqa: E402
+
+DISSOLVE_ENGINES = ('auto', 'unary')
 
 
 def list_province_codes() -> List[str]:
@@ -66,79 +85,324 @@ def read_all_geoms(fp: Path):
     return geoms
 
 
-def build_province(prov_code: str, force: bool = False) -> bool:
-    prov_dir = next((d for d in PUBLIC_DATA.glob(f'id{prov_code}_*') if d.is_dir()), None)
-    if not prov_dir:
-        print(f'[WARN] Province {prov_code}: directory not found under {PUBLIC_DATA}')
+def is_clean_coverage(geoms: np.ndarray) -> bool:
+    """True if the geometries are valid polygons that only touch along shared edges."""
+    if not np.isin(shapely.get_type_id(geoms), (3, 6)).all() or not shapely.is_valid(geoms).all():
         return False
+    if hasattr(shapely, 'coverage_is_valid'):  # shapely >= 2.1, GEOS >= 3.12
+        return bool(shapely.coverage_is_valid(geoms))
+    return not interiors_intersect(geoms)
+
+
+def interiors_intersect(geoms: np.ndarray) -> bool:
+    """
+    True if any two geometries share interior area. Unlike the 'overlaps' predicate this
+    also catches a polygon inside another and duplicated polygons.
+    """
+    left, right = STRtree(geoms).query(geoms, predicate='intersects')
+    pair = left < right
+    return bool(shapely.relate_pattern(geoms[left[pair]], geoms[right[pair]], '2********').any())
 
-    out_path = PUBLIC_DATA / f'kab_{prov_code}.geojson'
-    if out_path.exists() and not force:
-        print(f'[SKIP] {out_path} exists (use --force to overwrite)')
-        return True
-
-    features = []
-    for dist_dir in sorted(p for p in prov_dir.iterdir() if p.is_dir() and DIST_DIR_RE.match(p.name)):
-        mdir = DIST_DIR_RE.match(dist_dir.name)
-        regency_code, slug = mdir.group(1), mdir.group(2)
-        kab_name = slug.replace('_', ' ').title()
-
-        fallback = dist_dir / f'{dist_dir.name}.geojson'
-        geoms = read_all_geoms(fallback) if fallback.exists() else []
-        if not geoms:
-            # Union all subdistrict files
-            for f in sorted(dist_dir.glob('*.geojson')):
-                geoms.extend(read_all_geoms(f))
-
-        if not geoms:
-            print(f'[WARN] Province {prov_code}: no geometries found for {dist_dir}')
-            continue
 
+def dissolve(geoms: List, engine: str = 'auto', grid_size: Optional[float] = None):
+    """
+    Merge geometries into one (multi)polygon.
+
+    Returns (merged, path) where path is 'coverage' or 'unary'. In 'auto' mode the
+    coverage fast path is only taken when the input is a clean coverage, since
+    coverage_union_all gives wrong results otherwise.
+    """
+    arr = np.asarray(geoms, dtype=object)
+    if grid_size:
+        arr = shapely.set_precision(arr, grid_size)
+    if engine != 'unary' and is_clean_coverage(arr):
         try:
-            merged = unary_union(geoms)
-        except Exception as e:
-            print(f'[WARN] Province {prov_code}: union failed for {dist_dir}: {e}')
-            continue
+            return shapely.coverage_union_all(arr), 'coverage'
+        except Exception:
+            pass
+    return unary_union(arr), 'unary'
+
+
+def find_province_dir(prov_code: str) -> Optional[Path]:
+    return next((d for d in PUBLIC_DATA.glob(f'id{prov_code}_*') if d.is_dir()), None)
+
+
+def list_district_dirs(prov_dir: Path) -> List[Path]:
+    return sorted(p for p in prov_dir.iterdir() if p.is_dir() and DIST_DIR_RE.match(p.name))
+
+
+def district_input_key(dist_dir: Path, engine: str, grid_size: Optional[float]) -> str:
+    """Hash of every .geojson file in the district plus the dissolve options."""
+    h = hashlib.sha256(dissolve_options(engine, grid_size).encode())
+    for f in sorted(dist_dir.glob('*.geojson')):
+        h.update(f.name.encode() + b'\0')
+        with f.open('rb') as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def district_cache_path(cache_dir: Path, dist_dir: Path) -> Path:
+    return cache_dir / dist_dir.parent.name / f'{dist_dir.name}.json'
+
+
+def dissolve_options(engine: str, grid_size: Optional[float]) -> str:
+    return f'{engine}|{grid_size}'
+
+
+def district_files(dist_dir: Path) -> List[str]:
+    return sorted(f.name for f in dist_dir.glob('*.geojson'))
+
+
+def read_cached_district(cache_path: Path, key: Optional[str], options: Optional[str] = None,
+                         files: Optional[List[str]] = None) -> Optional[bytes]:
+    """
+    Cached WKB when the entry matches key, or (key None) was written with these
+    options from exactly these input files.
+    """
+    try:
+        with cache_path.open('r', encoding='utf-8') as fh:
+            entry = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if key is not None:
+        if entry.get('key') != key:
+            return None
+    elif entry.get('options') != options or entry.get('files') != files:
+        return None
+    return bytes.fromhex(entry['wkb'])
+
+
+def cache_is_newer(cache_path: Path, dist_dir: Path, files: List[str]) -> bool:
+    """True when the cache entry was written after every input file was last modified (stat only)."""
+    try:
+        written = cache_path.stat().st_mtime_ns
+        return all((dist_dir / name).stat().st_mtime_ns <= written for name in files)
+    except OSError:
+        return False
+
+
+def write_cached_district(cache_path: Path, key: str, path: str, wkb: bytes, options: str,
+                          files: List[str]) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix('.tmp')
+    with tmp_path.open('w', encoding='utf-8') as fh:
+        json.dump({'key': key, 'options': options, 'files': files, 'path': path, 'wkb': wkb.hex()}, fh)
+    os.replace(tmp_path, cache_path)
+
+
+def dissolve_district(prov_code: str, dist_dir: Path, engine: str = 'auto',
+                      grid_size: Optional[float] = None,
+                      cache_dir: Optional[Path] = None,
+                      unchanged: bool = False) -> Tuple[Optional[bytes], Optional[str], List[str]]:
+    """
+    Dissolve one district directory into a single (multi)polygon.
 
-        feature = {
-            'type': 'Feature',
-            'properties': {
-                'regency_code': regency_code,
-                'province_code': prov_code,
-                'kab_name': kab_name,
-            },
-            'geometry': mapping(merged)
-        }
-        features.append(feature)
+    Runs in worker processes, so the result travels back as WKB together with
+    the dissolve path taken ('cached' when served from cache_dir) and any
+    warnings (printed by the parent to keep the log readable). With
+    unchanged=True (the caller knows the inputs did not change) a cache entry
+    written from the same list of files, and newer than every one of them, is
+    used without rehashing the files.
+    """
+    warnings: List[str] = []
+    options = dissolve_options(engine, grid_size)
+    files = district_files(dist_dir)
+    if cache_dir is not None:
+        cache_path = district_cache_path(cache_dir, dist_dir)
+        wkb = None
+        if unchanged and cache_is_newer(cache_path, dist_dir, files):
+            wkb = read_cached_district(cache_path, None, options, files)
+        if wkb is None:
+            key = district_input_key(dist_dir, engine, grid_size)
+            wkb = read_cached_district(cache_path, key)
+        if wkb is not None:
+            return wkb, 'cached', warnings
 
+    fallback = dist_dir / f'{dist_dir.name}.geojson'
+    geoms = read_all_geoms(fallback) if fallback.exists() else []
+    if not geoms:
+        # Union all subdistrict files
+        for f in sorted(dist_dir.glob('*.geojson')):
+            geoms.extend(read_all_geoms(f))
+
+    if not geoms:
+        warnings.append(f'[WARN] Province {prov_code}: no geometries found for {dist_dir}')
+        return None, None, warnings
+
+    try:
+        merged, path = dissolve(geoms, engine=engine, grid_size=grid_size)
+    except Exception as e:
+        warnings.append(f'[WARN] Province {prov_code}: union failed for {dist_dir}: {e}')
+        return None, None, warnings
+    wkb = shapely.to_wkb(merged)
+    if cache_dir is not None:
+        try:
+            write_cached_district(cache_path, key, path, wkb, options, files)
+        except OSError as e:
+            warnings.append(f'[WARN] Province {prov_code}: could not cache {dist_dir.name}: {e}')
+    return wkb, path, warnings
+
+
+def district_feature(prov_code: str, dist_dir: Path, wkb: bytes) -> dict:
+    regency_code, slug = DIST_DIR_RE.match(dist_dir.name).groups()
+    return {
+        'type': 'Feature',
+        'properties': {
+            'regency_code': regency_code,
+            'province_code': prov_code,
+            'kab_name': slug.replace('_', ' ').title(),
+        },
+        'geometry': mapping(shapely.from_wkb(wkb))
+    }
+
+
+def write_province(prov_code: str, out_path: Path, features: List[dict]) -> bool:
     if not features:
         print(f'[WARN] Province {prov_code}: no features produced')
         return False
 
-    with out_path.open('w', encoding='utf-8') as f:
+    tmp_path = out_path.with_name(out_path.name + '.tmp')
+    with tmp_path.open('w', encoding='utf-8') as f:
         json.dump({'type': 'FeatureCollection', 'features': features}, f, ensure_ascii=False)
+    os.replace(tmp_path, out_path)
     print(f'[OK] Wrote {out_path} with {len(features)} dissolved district boundaries')
     return True
 
 
+def report_paths(prov_code: str, dist_dirs: List[Path], paths: List[Optional[str]], engine: str) -> None:
+    counts = {p: paths.count(p) for p in ('cached', 'coverage', 'unary') if p in paths}
+    if counts:
+        print(f'[INFO] Province {prov_code}: dissolve paths ' + ', '.join(f'{k}={v}' for k, v in counts.items()))
+    if engine == 'unary':
+        return
+    for d, p in zip(dist_dirs, paths):
+        if p == 'unary':
+            print(f'[INFO] Province {prov_code}: {d.name} is not a clean coverage, used unary_union')
+
+
+def build_provinces(prov_codes: List[str], force: bool = False, jobs: int = 1,
+                    engine: str = 'auto', grid_size: Optional[float] = None,
+                    cache_dir: Optional[Path] = CACHE_DIR,
+                    changed: Optional[Iterable[Path]] = None) -> Dict[str, bool]:
+    """
+    Build kab_<prov>.geojson for each province code and return {code: ok}.
+
+    With jobs > 1 every district of every requested province is dissolved in a
+    process pool; each province file is written as soon as its last district
+    finishes, with features in sorted directory order so output is deterministic.
+
+    `changed` lists the district directories known to have changed (e.g. by a file
+    watcher). The province files are then rewritten even without force, and every
+    other district is taken from its cache entry without rehashing its files.
+    """
+    changed_names = None if changed is None else {Path(d).name for d in changed}
+
+    def unchanged(dist_dir: Path) -> bool:
+        return changed_names is not None and dist_dir.name not in changed_names
+
+    results: Dict[str, bool] = {}
+    plans: Dict[str, Tuple[Path, List[Path]]] = {}
+    for prov_code in prov_codes:
+        prov_dir = find_province_dir(prov_code)
+        if not prov_dir:
+            print(f'[WARN] Province {prov_code}: directory not found under {PUBLIC_DATA}')
+            results[prov_code] = False
+            continue
+
+        out_path = PUBLIC_DATA / f'kab_{prov_code}.geojson'
+        if out_path.exists() and not force and changed is None:
+            print(f'[SKIP] {out_path} exists (use --force to overwrite)')
+            results[prov_code] = True
+            continue
+        plans[prov_code] = (out_path, list_district_dirs(prov_dir))
+
+    def finish(prov_code: str, dissolved: List[Optional[bytes]], paths: List[Optional[str]]) -> None:
+        out_path, dist_dirs = plans[prov_code]
+        report_paths(prov_code, dist_dirs, paths, engine)
+        features = [district_feature(prov_code, d, wkb) for d, wkb in zip(dist_dirs, dissolved) if wkb]
+        results[prov_code] = write_province(prov_code, out_path, features)
+
+    if jobs <= 1:
+        for prov_code, (_, dist_dirs) in plans.items():
+            dissolved, paths = [], []
+            for dist_dir in dist_dirs:
+                wkb, path, warnings = dissolve_district(prov_code, dist_dir, engine, grid_size, cache_dir,
+                                                        unchanged(dist_dir))
+                for w in warnings:
+                    print(w)
+                dissolved.append(wkb)
+                paths.append(path)
+            finish(prov_code, dissolved, paths)
+        return results
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending: Dict[str, List[Optional[bytes]]] = {}
+        pending_paths: Dict[str, List[Optional[str]]] = {}
+        remaining: Dict[str, int] = {}
+        futures = {}
+        for prov_code, (_, dist_dirs) in plans.items():
+            pending[prov_code] = [None] * len(dist_dirs)
+            pending_paths[prov_code] = [None] * len(dist_dirs)
+            remaining[prov_code] = len(dist_dirs)
+            if not dist_dirs:
+                finish(prov_code, [], [])
+            for idx, dist_dir in enumerate(dist_dirs):
+                fut = pool.submit(dissolve_district, prov_code, dist_dir, engine, grid_size, cache_dir,
+                                  unchanged(dist_dir))
+                futures[fut] = (prov_code, idx)
+
+        for fut in as_completed(futures):
+            prov_code, idx = futures[fut]
+            try:
+                wkb, path, warnings = fut.result()
+            except Exception as e:
+                wkb, path = None, None
+                warnings = [f'[WARN] Province {prov_code}: worker failed for {plans[prov_code][1][idx]}: {e}']
+            for w in warnings:
+                print(w)
+            pending[prov_code][idx] = wkb
+            pending_paths[prov_code][idx] = path
+            remaining[prov_code] -= 1
+            if remaining[prov_code] == 0:
+                finish(prov_code, pending.pop(prov_code), pending_paths.pop(prov_code))
+    return results
+
+
+def build_province(prov_code: str, force: bool = False, jobs: int = 1,
+                   engine: str = 'auto', grid_size: Optional[float] = None,
+                   cache_dir: Optional[Path] = CACHE_DIR, changed: Optional[Iterable[Path]] = None) -> bool:
+    return build_provinces([prov_code], force=force, jobs=jobs, engine=engine,
+                           grid_size=grid_size, cache_dir=cache_dir, changed=changed)[prov_code]
+
+
 def main():
     ap = argparse.ArgumentParser()
     g = ap.add_mutually_exclusive_group(required=True)
     g.add_argument('--province', help='2-digit province code (e.g., 33)')
     g.add_argument('--all', action='store_true', help='Process all provinces found under public/data')
     ap.add_argument('--force', action='store_true', help='Overwrite existing kab_<prov>.geojson')
+    ap.add_argument('--jobs', type=int, default=1,
+                    help='Dissolve districts in this many worker processes (default: 1, serial)')
+    ap.add_argument('--engine', choices=DISSOLVE_ENGINES, default='auto',
+                    help='auto: coverage union for clean coverages, else unary_union (default); '
+                         'unary: always unary_union')
+    ap.add_argument('--grid-size', type=float, default=None,
+                    help='Snap vertices to this precision grid (degrees, e.g. 1e-7) before dissolving')
+    ap.add_argument('--no-cache', action='store_true',
+                    help='Re-dissolve every district instead of reusing cached results for unchanged inputs')
     args = ap.parse_args()
+    opts = dict(force=args.force, jobs=args.jobs, engine=args.engine, grid_size=args.grid_size,
+                cache_dir=None if args.no_cache else CACHE_DIR)
 
     if args.province:
-        ok = build_province(args.province.zfill(2), force=args.force)
+        ok = build_province(args.province.zfill(2), **opts)
         raise SystemExit(0 if ok else 1)
 
     # --all
     codes = list_province_codes()
-    ok_total = 0
-    for code in codes:
-        if build_province(code, force=args.force):
-            ok_total += 1
+    results = build_provinces(codes, **opts)
+    ok_total = sum(1 for code in codes if results.get(code))
     print(f'[SUMMARY] Succeeded: {ok_total}/{len(codes)} provinces')
 
 if __name__ == '__main__':
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Publish public/data under content-hashed, immutable filenames.
+
+Links every data file to public/data-hashed/<same relative dir>/<stem>.<hash>.<ext>
+and writes an alias map from the logical URL to the hashed URL:
+  public/data-hashed/aliases.json
+  {"/data/id35_jawa_timur/id3510_banyuwangi/id3510_banyuwangi.geojson":
+   "/data-hashed/id35_jawa_timur/id3510_banyuwangi/id3510_banyuwangi.1f2e3d4c5b6a.geojson", ...}
+
+Hashed files never change, so serve /data-hashed/ with
+  Cache-Control: public, max-age=31536000, immutable
+After a data refresh only files whose content changed get a new name (and are
+re-downloaded).
+
+Hashed files are hard links to the public/data files, so publishing takes no extra
+disk space. Deploy with a tool that keeps hard links (rsync -H, tar); --copy writes real
+copies instead.
+A link shares its content with the source file: a tool that rewrites a data file in
+place (instead of writing .tmp and renaming) also changes its hashed name's content.
+Each run therefore removes older hashed names that are still linked to their source
+file, since they no longer match their hash, and the source gets a new name. Files on
+another filesystem are copied.
+
+The config generators publish their province themselves, so one run writes the
+bundles, publishes them and emits the hashed URLs (the alias map is merged):
+  python3 scripts/gen_province_config.py --province 51 --slug bali --publish
+  python3 scripts/gen_prov35_config.py --publish
+Run this script for the whole tree, e.g. before scripts/gen_catalog.py --aliases.
+
+Examples:
+  python3 scripts/publish_hashed.py               # publish, keep old hashed files
+  python3 scripts/publish_hashed.py --prune       # also delete hashed files no longer referenced
+  python3 scripts/publish_hashed.py --copy        # copies instead of hard links
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLIC_DATA = ROOT / 'public' / 'data'
+HASHED_DIR = ROOT / 'public' / 'data-hashed'
+ALIASES_FILE = 'aliases.json'
+
+PUBLISH_SUFFIXES = ('.geojson', '.json')
+HASH_LENGTH = 12
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open('rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(name: str, digest: str) -> str:
+    """'id3510_banyuwangi.bundle.json' -> 'id3510_banyuwangi.<digest>.bundle.json'."""
+    stem, _, ext = name.partition('.')
+    return f'{stem}.{digest}.{ext}' if ext else f'{stem}.{digest}'
+
+
+def place(src: Path, target: Path, copy: bool = False) -> None:
+    """Hard-link (or copy) src to target atomically."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + '.tmp')
+    if tmp.exists():
+        tmp.unlink()
+    if copy:
+        shutil.copyfile(src, tmp)
+    else:
+        try:
+            os.link(src, tmp)
+        except OSError:  # other filesystem, or no hard links
+            shutil.copyfile(src, tmp)
+    os.replace(tmp, target)
+
+
+def publish(src_root: Path, out_root: Path, files: Optional[Iterable[Path]] = None,
+            copy: bool = False) -> Dict[str, str]:
+    """
+    Publish every publishable file under src_root (or only `files`) under its hashed
+    name and return the alias map for those files.
+    """
+    aliases: Dict[str, str] = {}
+    url_base = '/' + out_root.name
+    for src in sorted(src_root.rglob('*') if files is None else files):
+        if not src.is_file() or not src.name.endswith(PUBLISH_SUFFIXES):
+            continue
+        rel = src.relative_to(src_root)
+        target_rel = rel.with_name(hashed_name(rel.name, file_hash(src)))
+        target = out_root / target_rel
+        for old in target.parent.glob(hashed_name(rel.name, '*')) if target.parent.exists() else ():
+            if old != target and not old.name.endswith('.tmp') and os.path.samefile(old, src):
+                old.unlink()  # rewritten in place through its link; its hash no longer matches
+        if not target.exists():
+            place(src, target, copy)
+        aliases[f'/data/{rel.as_posix()}'] = f'{url_base}/{target_rel.as_posix()}'
+    return aliases
+
+
+def prune(out_root: Path, aliases: Dict[str, str]) -> int:
+    keep = {out_root / url.split('/', 2)[2] for url in aliases.values()}
+    keep.add(out_root / ALIASES_FILE)
+    removed = 0
+    for f in out_root.rglob('*'):
+        if f.is_file() and f not in keep:
+            f.unlink()
+            removed += 1
+    return removed
+
+
+def load_aliases(path) -> Dict[str, str]:
+    """Read an alias map written by this script (empty dict when path is None)."""
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def write_aliases(out_root: Path, aliases: Dict[str, str], merge: bool = False) -> Path:
+    """Write out_root/aliases.json atomically; with merge, entries are added to the existing map."""
+    alias_path = out_root / ALIASES_FILE
+    if merge and alias_path.exists():
+        aliases = {**load_aliases(alias_path), **aliases}
+    out_root.mkdir(parents=True, exist_ok=True)
+    tmp = alias_path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(aliases, indent=1, sort_keys=True), encoding='utf-8')
+    os.replace(tmp, alias_path)
+    return alias_path
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Publish public/data under content-hashed filenames')
+    ap.add_argument('--src', type=Path, default=PUBLIC_DATA, help='Source directory (default: public/data)')
+    ap.add_argument('--out', type=Path, default=HASHED_DIR, help='Output directory (default: public/data-hashed)')
+    ap.add_argument('--prune', action='store_true', help='Delete hashed files not referenced by the new alias map')
+    ap.add_argument('--copy', action='store_true', help='Copy files instead of hard-linking them')
+    args = ap.parse_args()
+
+    if not args.src.exists():
+        raise SystemExit(f'Missing data directory: {args.src}')
+
+    aliases = publish(args.src, args.out, copy=args.copy)
+    alias_path = write_aliases(args.out, aliases)
+    print(f'Published {len(aliases)} files to {args.out}, alias map: {alias_path}')
+
+    if args.prune:
+        print(f'Pruned {prune(args.out, aliases)} stale hashed files')
+
+
+if __name__ == '__main__':
+    main()
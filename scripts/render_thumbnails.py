@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Render small PNG thumbnails of every province, kabupaten and kecamatan without a browser.
+
+Usage:
+  python3 scripts/render_thumbnails.py [--levels prov,kab,kec] [--size 128] [--jobs 8] \
+    [--out-dir public/thumbnails] [--force]
+
+Sources (under public/data):
+- prov: prov_37.geojson, one thumbnail per feature (prov_id / province_code)
+- kab:  kab_<prov>.geojson, one thumbnail per feature (regency_code)
+- kec:  id<prov>_<slug>/id<regency>_<slug>/id<kec>_<slug>.geojson, one thumbnail per file
+        (all village polygons of the kecamatan drawn together)
+
+Outputs: <out-dir>/<level>/<code>.png, e.g. public/thumbnails/kec/5106010.png
+
+Logic:
+- Every polygon ring is turned into edges in pixel space; for each scanline the
+  crossings of all edges are computed at once with numpy, sorted, and paired
+  (even-odd rule per polygon, so holes stay empty) into horizontal spans
+- Spans are filled with a difference array + cumsum, rendered at --supersample
+  times the size and averaged down for anti-aliased edges
+- PNGs are encoded with zlib directly (RGBA, transparent background)
+- Source files are rendered in parallel, one file per task; a file is skipped when
+  its size/mtime and the render settings match the last run (.cache/thumbnails.json)
+  and all of its thumbnails still exist
+
+Requires: shapely>=2.0, numpy
+"""
+import argparse
+import json
+import os
+import re
+import struct
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLIC_DATA = ROOT / 'public' / 'data'
+THUMB_DIR = ROOT / 'public' / 'thumbnails'
+CACHE_FILE = ROOT / '.cache' / 'thumbnails.json'
+sys.path.insert(0, str(ROOT))
+
+from region_index import DIST_DIR_RE, PROV_DIR_RE  # noqa: E402
+
+KEC_FILE_PATTERN = re.compile(r'^id(\d{7})_(.+)\.geojson$')
+KAB_FILE_PATTERN = re.compile(r'^kab_(\d{2})\.geojson$')
+
+LEVELS = ('prov', 'kab', 'kec')
+CODE_KEYS = {
+    'prov': ('prov_id', 'province_code', 'kode_prov', 'id'),
+    'kab': ('regency_code', 'kab_id', 'kabupaten_id', 'id'),
+}
+FILL_COLOR = (0x9a, 0xd3, 0xc9)  # src/map/styles.ts default fill
+
+
+def ring_edges(geoms: List) -> Tuple[np.ndarray, np.ndarray]:
+    """All ring edges of the polygonal geometries as (E, 4) [x0, y0, x1, y1] plus each edge's polygon index."""
+    parts = shapely.get_parts(np.asarray(geoms, dtype=object))
+    parts = parts[shapely.get_type_id(parts) == 3]
+    if not len(parts):
+        return np.empty((0, 4)), np.empty(0, dtype=np.int64)
+    rings, ring_poly = shapely.get_rings(parts, return_index=True)
+    coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+    same = coord_ring[:-1] == coord_ring[1:]
+    edges = np.hstack([coords[:-1][same], coords[1:][same]])
+    return edges, ring_poly[coord_ring[:-1][same]]
+
+
+def rasterize(geoms: List, size: int, supersample: int = 2, pad: int = 2) -> np.ndarray:
+    """Coverage (0..1) of the geometries on a size x size grid, aspect ratio kept and centred."""
+    edges, poly = ring_edges(geoms)
+    n = size * supersample
+    if not len(edges):
+        return np.zeros((size, size))
+
+    minx, miny = edges[:, [0, 2]].min(), edges[:, [1, 3]].min()
+    maxx, maxy = edges[:, [0, 2]].max(), edges[:, [1, 3]].max()
+    span = max(maxx - minx, maxy - miny) or 1.0
+    inner = n - 2 * pad * supersample
+    scale = inner / span
+    offx = (n - (maxx - minx) * scale) / 2
+    offy = (n - (maxy - miny) * scale) / 2
+    x0 = (edges[:, 0] - minx) * scale + offx
+    x1 = (edges[:, 2] - minx) * scale + offx
+    y0 = (maxy - edges[:, 1]) * scale + offy
+    y1 = (maxy - edges[:, 3]) * scale + offy
+
+    # Scanline r samples y = r + 0.5; an edge crosses it when ylo <= y < yhi (half-open,
+    # so shared vertices are counted once and every polygon has an even crossing count).
+    ylo, yhi = np.minimum(y0, y1), np.maximum(y0, y1)
+    r_start = np.clip(np.ceil(ylo - 0.5), 0, n).astype(np.int64)
+    r_end = np.clip(np.ceil(yhi - 0.5), 0, n).astype(np.int64)
+    counts = np.maximum(r_end - r_start, 0)
+    keep = counts > 0
+    if not keep.any():
+        return np.zeros((size, size))
+    counts = counts[keep]
+    idx = np.repeat(np.flatnonzero(keep), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    rows = np.repeat(r_start[keep], counts) + offsets
+    yc = rows + 0.5
+    xs = x0[idx] + (yc - y0[idx]) * (x1[idx] - x0[idx]) / (y1[idx] - y0[idx])
+
+    order = np.lexsort((xs, rows, poly[idx]))
+    rows, xs = rows[order], xs[order]
+    span_rows = rows[0::2]
+    c0 = np.clip(np.ceil(xs[0::2] - 0.5), 0, n).astype(np.int64)
+    c1 = np.clip(np.ceil(xs[1::2] - 0.5), 0, n).astype(np.int64)
+    filled = c1 > c0
+
+    diff = np.zeros((n, n + 1), dtype=np.int32)
+    np.add.at(diff, (span_rows[filled], c0[filled]), 1)
+    np.add.at(diff, (span_rows[filled], c1[filled]), -1)
+    mask = np.cumsum(diff[:, :n], axis=1) > 0
+    return mask.reshape(size, supersample, size, supersample).mean(axis=(1, 3))
+
+
+def encode_png(coverage: np.ndarray, color: Tuple[int, int, int] = FILL_COLOR) -> bytes:
+    """RGBA PNG with a solid fill colour and the coverage as alpha."""
+    h, w = coverage.shape
+    rgba = np.empty((h, w, 4), dtype=np.uint8)
+    rgba[..., :3] = color
+    rgba[..., 3] = np.round(coverage * 255).astype(np.uint8)
+    raw = np.hstack([np.zeros((h, 1), dtype=np.uint8), rgba.reshape(h, w * 4)]).tobytes()
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 6, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 9))
+            + chunk(b'IEND', b''))
+
+
+def feature_code(props: dict, level: str) -> Optional[str]:
+    for key in CODE_KEYS[level]:
+        digits = re.sub(r'\D', '', str(props.get(key) or ''))
+        if digits:
+            return digits
+    return None
+
+
+def list_sources(data_dir: Path, levels: List[str]) -> List[Tuple[str, str]]:
+    """[(level, source file)] for the requested levels."""
+    sources: List[Tuple[str, str]] = []
+    if 'prov' in levels and (data_dir / 'prov_37.geojson').is_file():
+        sources.append(('prov', str(data_dir / 'prov_37.geojson')))
+    if 'kab' in levels:
+        sources.extend(('kab', str(f)) for f in sorted(data_dir.glob('kab_*.geojson'))
+                       if KAB_FILE_PATTERN.match(f.name))
+    if 'kec' in levels:
+        for prov in sorted(data_dir.iterdir()):
+            if not (prov.is_dir() and PROV_DIR_RE.match(prov.name)):
+                continue
+            for dist in sorted(prov.iterdir()):
+                if dist.is_dir() and DIST_DIR_RE.match(dist.name):
+                    sources.extend(('kec', str(f)) for f in sorted(dist.iterdir())
+                                   if KEC_FILE_PATTERN.match(f.name))
+    return sources
+
+
+def render_source(level: str, source: str, out_dir: str, size: int, supersample: int) -> Tuple[List[str], Optional[str]]:
+    """Render every thumbnail of one source file; returns (written paths, error)."""
+    try:
+        with open(source, 'r', encoding='utf-8') as fh:
+            data = json.load(fh)
+        features = [f for f in (data.get('features') or []) if isinstance(f, dict) and f.get('geometry')]
+        geoms = [shape(f['geometry']) for f in features]
+    except Exception as e:
+        return [], f'read failed: {e}'
+
+    if level == 'kec':
+        groups = {KEC_FILE_PATTERN.match(Path(source).name).group(1): geoms}
+    else:
+        groups: Dict[str, List] = {}
+        for feat, geom in zip(features, geoms):
+            code = feature_code(feat.get('properties') or {}, level)
+            if code:
+                groups.setdefault(code, []).append(geom)
+
+    target_dir = Path(out_dir) / level
+    target_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for code, group in groups.items():
+        target = target_dir / f'{code}.png'
+        tmp = target.with_name(target.name + '.tmp')
+        tmp.write_bytes(encode_png(rasterize(group, size, supersample)))
+        os.replace(tmp, target)
+        written.append(str(target))
+    return written, None if groups else 'no features with a code'
+
+
+def load_cache(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path: Path, cache: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps(cache), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Render PNG thumbnails of provinces, kabupaten and kecamatan')
+    ap.add_argument('--levels', default=','.join(LEVELS), help='Comma-separated levels to render (default: prov,kab,kec)')
+    ap.add_argument('--size', type=int, default=128, help='Thumbnail width and height in pixels (default: 128)')
+    ap.add_argument('--supersample', type=int, default=2, help='Render at N x N samples per pixel for anti-aliasing (default: 2)')
+    ap.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+    ap.add_argument('--out-dir', type=Path, default=THUMB_DIR, help='Output directory (default: public/thumbnails)')
+    ap.add_argument('--force', action='store_true', help='Re-render every source, ignoring the cache')
+    args = ap.parse_args()
+
+    levels = [lv.strip() for lv in args.levels.split(',') if lv.strip()]
+    unknown = set(levels) - set(LEVELS)
+    if unknown:
+        raise SystemExit(f'Unknown level(s): {", ".join(sorted(unknown))} (choose from {", ".join(LEVELS)})')
+
+    cache = {} if args.force else load_cache(CACHE_FILE)
+    settings = [args.size, args.supersample, str(args.out_dir.resolve())]
+    todo: List[Tuple[str, str, list]] = []
+    skipped = 0
+    for level, source in list_sources(PUBLIC_DATA, levels):
+        st = os.stat(source)
+        sig = [st.st_mtime_ns, st.st_size] + settings
+        entry = cache.get(source)
+        if entry and entry['sig'] == sig and all(os.path.exists(p) for p in entry['outputs']):
+            skipped += 1
+            continue
+        todo.append((level, source, sig))
+
+    print(f'Rendering {len(todo)} source files with {args.jobs} workers ({skipped} unchanged)...')
+    call = (
+        [t[0] for t in todo], [t[1] for t in todo],
+        [str(args.out_dir)] * len(todo), [args.size] * len(todo), [args.supersample] * len(todo),
+    )
+    if args.jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(render_source, *call, chunksize=8))
+    else:
+        results = list(map(render_source, *call))
+
+    rendered = errors = 0
+    for (level, source, sig), (written, error) in zip(todo, results):
+        rendered += len(written)
+        if error:
+            errors += 1
+            print(f'[WARN] {Path(source).relative_to(PUBLIC_DATA)}: {error}')
+            cache.pop(source, None)
+        else:
+            cache[source] = {'sig': sig, 'outputs': written}
+    save_cache(CACHE_FILE, cache)
+    print(f'[SUMMARY] {rendered} thumbnails from {len(todo)} files, {skipped} files unchanged, {errors} failed')
+
+
+if __name__ == '__main__':
+    main()
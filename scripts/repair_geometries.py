@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Repair invalid geometries across a directory of GeoJSON files.
+
+Usage:
+  python3 scripts/repair_geometries.py [--dir public/data] [--jobs 8] [--dry-run] [--report repair_report.json]
+
+Logic:
+- Find every *.geojson under --dir (default: public/data) and process the files in parallel
+- For each file, load all feature geometries into one shapely array and, vectorized over that array:
+  - check validity (shapely.is_valid / shapely.is_valid_reason)
+  - repair invalid geometries with shapely.make_valid, keeping only the polygonal parts of polygon inputs;
+    a polygon whose repair has no polygonal part left (it collapsed to a line, a point or nothing) is
+    left as it was and reported as collapsed, so it still counts as invalid
+  - drop consecutive duplicate vertices (shapely.remove_repeated_points)
+  - orient rings as RFC 7946 expects: exterior counter-clockwise, holes clockwise
+- Rewrite a file (atomically) only when at least one geometry changed
+- Print one report line per file; --report additionally writes all rows as JSON
+
+Run this before scripts/make_kab_dissolved.py so unary_union only sees valid input.
+
+Requires: shapely>=2.0, numpy
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import MultiPolygon, Polygon, mapping, shape
+from shapely.geometry.polygon import orient
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLIC_DATA = ROOT / 'public' / 'data'
+
+POLYGONAL = ('Polygon', 'MultiPolygon')
+
+
+def _polygonal_parts(geom):
+    """Collapse a make_valid() result back to a Polygon/MultiPolygon; None when it has no area left."""
+    if geom is None or geom.is_empty:
+        return None
+    if geom.geom_type in POLYGONAL:
+        return geom
+    parts: List[Polygon] = []
+    for g in getattr(geom, 'geoms', []):
+        if g.geom_type == 'Polygon':
+            parts.append(g)
+        elif g.geom_type == 'MultiPolygon':
+            parts.extend(g.geoms)
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else MultiPolygon(parts)
+
+
+def _orient_one(geom):
+    if geom is None:
+        return geom
+    if geom.geom_type == 'Polygon':
+        return orient(geom, sign=1.0)
+    if geom.geom_type == 'MultiPolygon':
+        return MultiPolygon([orient(p, sign=1.0) for p in geom.geoms])
+    return geom
+
+
+def orient_rings(geoms: np.ndarray) -> np.ndarray:
+    """Exterior rings counter-clockwise, interior rings clockwise."""
+    if hasattr(shapely, 'orient_polygons'):  # shapely >= 2.1
+        return shapely.orient_polygons(geoms, exterior_cw=False)
+    return np.array([_orient_one(g) for g in geoms], dtype=object)
+
+
+def repair_geometries(geoms: np.ndarray) -> Tuple[np.ndarray, Dict[str, object]]:
+    """
+    Repair an array of shapely geometries in one vectorized pass.
+
+    Returns the repaired array (same length and order as the input) and a dict of
+    counters: invalid, fixed, still_invalid, collapsed, duplicate_vertices, reoriented,
+    reason. Collapsed polygons are returned unchanged and are part of still_invalid.
+    """
+    stats: Dict[str, object] = {
+        'invalid': 0, 'fixed': 0, 'still_invalid': 0, 'collapsed': 0,
+        'duplicate_vertices': 0, 'reoriented': 0, 'reason': None,
+    }
+    if len(geoms) == 0:
+        return geoms, stats
+
+    out = geoms.copy()
+    invalid = ~shapely.is_valid(out)
+    n_invalid = int(invalid.sum())
+    stats['invalid'] = n_invalid
+    collapsed = np.zeros(len(out), dtype=bool)
+    if n_invalid:
+        stats['reason'] = shapely.is_valid_reason(out[invalid][0])
+        was_polygonal = np.isin(shapely.get_type_id(out[invalid]), (3, 6))
+        fixed = shapely.make_valid(out[invalid])
+        for i in np.flatnonzero(was_polygonal):
+            fixed[i] = _polygonal_parts(fixed[i])
+        lost = was_polygonal & shapely.is_missing(fixed)
+        collapsed[np.flatnonzero(invalid)[lost]] = True
+        fixed[lost] = out[invalid][lost]
+        out[invalid] = fixed
+    stats['collapsed'] = int(collapsed.sum())
+
+    # Collapsed polygons stay exactly as they were
+    work = out[~collapsed]
+    before = shapely.get_num_coordinates(work)
+    work = shapely.remove_repeated_points(work, tolerance=0.0)
+    stats['duplicate_vertices'] = int((before - shapely.get_num_coordinates(work)).sum())
+
+    oriented = orient_rings(work)
+    stats['reoriented'] = int((~shapely.equals_exact(work, oriented, tolerance=0.0)).sum())
+    out[~collapsed] = oriented
+
+    still_invalid = int((~shapely.is_valid(out)).sum())
+    stats['still_invalid'] = still_invalid
+    stats['fixed'] = max(n_invalid - still_invalid, 0)
+    return out, stats
+
+
+def repair_file(path: str, dry_run: bool = False) -> Dict[str, object]:
+    """Repair one GeoJSON file in place and return its report row."""
+    row: Dict[str, object] = {'file': path, 'features': 0, 'written': False, 'error': None}
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            data = json.load(fh)
+    except Exception as e:
+        row['error'] = f'read failed: {e}'
+        return row
+
+    if isinstance(data, dict) and data.get('type') == 'FeatureCollection':
+        features = [f for f in (data.get('features') or []) if isinstance(f, dict)]
+    elif isinstance(data, dict) and data.get('type') == 'Feature':
+        features = [data]
+    else:
+        row['error'] = 'not a Feature or FeatureCollection'
+        return row
+
+    with_geom = [f for f in features if f.get('geometry')]
+    row['features'] = len(features)
+    try:
+        geoms = np.array([shape(f['geometry']) for f in with_geom], dtype=object)
+    except Exception as e:
+        row['error'] = f'bad geometry: {e}'
+        return row
+
+    repaired, stats = repair_geometries(geoms)
+    row.update(stats)
+    if not len(geoms):
+        return row
+
+    changed = ~shapely.equals_exact(geoms, repaired, tolerance=0.0)
+    if not changed.any() or dry_run:
+        return row
+
+    for feat, geom, dirty in zip(with_geom, repaired, changed):
+        if dirty:
+            feat['geometry'] = mapping(geom)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(data, fh, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    row['written'] = True
+    return row
+
+
+def format_row(row: Dict[str, object], base: Path) -> str:
+    try:
+        rel = Path(str(row['file'])).relative_to(base)
+    except ValueError:
+        rel = Path(str(row['file']))
+    if row.get('error'):
+        return f'[WARN] {rel}: {row["error"]}'
+    tag = '[FIX]' if row.get('written') else '[OK]'
+    if row.get('still_invalid'):
+        tag = '[WARN]'
+    msg = (
+        f'{tag} {rel}: {row["features"]} features, '
+        f'{row["fixed"]}/{row["invalid"]} invalid fixed, '
+        f'{row["duplicate_vertices"]} duplicate vertices, '
+        f'{row["reoriented"]} reoriented'
+    )
+    if row.get('collapsed'):
+        msg += f', {row["collapsed"]} collapsed to non-polygons (left unchanged)'
+    if row.get('reason'):
+        msg += f' (e.g. {row["reason"]})'
+    return msg
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Validate and repair GeoJSON geometries in parallel')
+    ap.add_argument('--dir', type=Path, default=PUBLIC_DATA, help='Directory to scan recursively (default: public/data)')
+    ap.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+    ap.add_argument('--dry-run', action='store_true', help='Report only, do not rewrite files')
+    ap.add_argument('--report', type=Path, help='Write the per-file report as JSON to this path')
+    args = ap.parse_args()
+
+    files = sorted(str(p) for p in args.dir.rglob('*.geojson'))
+    if not files:
+        print(f'No .geojson files found under {args.dir}')
+        raise SystemExit(1)
+
+    rows: List[Dict[str, object]] = []
+    jobs = max(1, args.jobs)
+    if jobs == 1:
+        for row in (repair_file(f, args.dry_run) for f in files):
+            rows.append(row)
+            print(format_row(row, args.dir))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for row in pool.map(repair_file, files, [args.dry_run] * len(files), chunksize=8):
+                rows.append(row)
+                print(format_row(row, args.dir))
+
+    if args.report:
+        args.report.write_text(json.dumps(rows, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f'Wrote report to {args.report}')
+
+    def total(key: str) -> int:
+        return sum(int(r.get(key) or 0) for r in rows)
+
+    errors = sum(1 for r in rows if r.get('error'))
+    written = sum(1 for r in rows if r.get('written'))
+    print(
+        f'[SUMMARY] {len(rows)} files: {total("fixed")}/{total("invalid")} invalid geometries fixed, '
+        f'{total("duplicate_vertices")} duplicate vertices removed, {total("reoriented")} reoriented, '
+        f'{written} files rewritten, {errors} unreadable, {total("still_invalid")} still invalid '
+        f'({total("collapsed")} collapsed)'
+    )
+    raise SystemExit(1 if errors or total('still_invalid') else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,85 +1,33 @@
 #!/usr/bin/env python3
 """
 Modular and reusable script to capture screenshots of websites using Browser MCP.
-Usage: python screenshot_example.py [--websites-file FILE] [--save-dir DIR]
+Usage: python screenshot_example.py [--websites-file FILE] [--save-dir DIR] [--sessions N]
+                                    [--ready-timeout SECONDS] [--retries N] [--server-cmd "CMD ..."]
+
+Screenshots are captured by a pool of --sessions MCP server processes running in
+parallel (AsyncMCPClient). Responses are matched to requests by JSON-RPC id, and
+each page is captured as soon as the server reports it ready (see wait_ready)
+instead of after a fixed sleep. A session whose server dies or whose pipe breaks is
+replaced by a fresh server process and the page is retried (--retries). --server-cmd
+runs any other stdio MCP server, e.g. tests/fake_mcp_server.py when testing.
+
+MCPClient, mcp_session() and capture_screenshot() remain as blocking wrappers for
+callers that capture one page at a time.
 """
 
-import subprocess
+import asyncio
+import itertools
+import shlex
 import json
 import base64
 import os
 import time
 import argparse
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from contextlib import contextmanager
 
-class MCPClient:
-    def __init__(self):
-        self.process: Optional[subprocess.Popen] = None
-
-    def start(self):
-        self.process = subprocess.Popen(
-            ['npx', '@browsermcp/mcp@latest'],
-            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            text=True, cwd=os.getcwd()
-        )
-
-    def send(self, message: dict):
-        if self.process:
-            self.process.stdin.write(json.dumps(message) + '\n')
-            self.process.stdin.flush()
-
-    def receive(self) -> Optional[dict]:
-        if self.process:
-            line = self.process.stdout.readline()
-            return json.loads(line.strip()) if line else None
-        return None
-
-    def initialize(self):
-        self.send({
-            "jsonrpc": "2.0", "id": 1, "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05", "capabilities": {},
-                "clientInfo": {"name": "mcp-screenshot-client", "version": "1.0"}
-            }
-        })
-        return self.receive()
-
-    def list_tools(self):
-        self.send({"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
-        return self.receive()
-
-    def navigate(self, url: str, msg_id: int):
-        self.send({
-            "jsonrpc": "2.0", "id": msg_id, "method": "tools/call",
-            "params": {"name": "browser_navigate", "arguments": {"url": url}}
-        })
-        return self.receive()
-
-    def screenshot(self, msg_id: int):
-        self.send({
-            "jsonrpc": "2.0", "id": msg_id, "method": "tools/call",
-            "params": {"name": "browser_screenshot", "arguments": {}}
-        })
-        return self.receive()
-
-    def close(self):
-        if self.process:
-            self.send({"jsonrpc": "2.0", "id": 999, "method": "shutdown"})
-            self.process.terminate()
-            self.process.wait()
-
-@contextmanager
-def mcp_session():
-    client = MCPClient()
-    client.start()
-    client.initialize()
-    client.list_tools()
-    try:
-        yield client
-    finally:
-        client.close()
+DEFAULT_SERVER_CMD = 'npx @browsermcp/mcp@latest'
 
 def load_websites(file_path: Path) -> List[str]:
     try:
@@ -96,17 +44,304 @@ def save_screenshot(data: str, save_path: Path):
     except Exception as e:
         print(f"Save error: {e}")
 
-def capture_screenshot(client: MCPClient, url: str, idx: int, save_dir: Path):
-    print(f"Processing {url}...")
-    client.navigate(url, 3 + idx * 2)
-    time.sleep(3)
-    response = client.screenshot(4 + idx * 2)
+def screenshot_filename(url: str) -> str:
+    return url.replace('https://', '').replace('://', '').replace('/', '_').replace('.', '_') + '.png'
+
+def first_image(response: Optional[dict]) -> Optional[str]:
     if response and 'result' in response:
         for item in response['result'].get('content', []):
             if item.get('type') == 'image':
-                filename = url.replace('https://', '').replace('://', '').replace('/', '_').replace('.', '_') + '.png'
-                save_screenshot(item['data'], save_dir / filename)
-                break
+                return item['data']
+    return None
+
+class MCPError(Exception):
+    pass
+
+class MCPConnectionError(MCPError):
+    """The server process exited or closed its output; the session cannot be reused."""
+
+# Errors after which a session is replaced by a new server process
+# (ConnectionError covers BrokenPipeError and ConnectionResetError)
+SESSION_ERRORS = (MCPConnectionError, ConnectionError, asyncio.IncompleteReadError)
+
+class AsyncMCPClient:
+    """
+    asyncio JSON-RPC client for one stdio MCP server process.
+
+    A background reader task resolves each response to the request with the same
+    id, so several requests can be in flight and responses may arrive in any order.
+    Notifications (messages without an id) are dispatched to per-method waiters.
+    """
+
+    def __init__(self, command: List[str]):
+        self.command = command
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL, cwd=os.getcwd(), limit=64 * 1024 * 1024
+        )
+        self._reader = asyncio.ensure_future(self._read_loop())
+
+    async def _read_loop(self):
+        try:
+            while True:
+                try:
+                    line = await self.process.stdout.readline()
+                except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+                    break  # oversized line or broken pipe: the session is unusable
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue  # servers may log non-JSON lines to stdout
+                if not isinstance(message, dict):
+                    continue
+                if 'id' in message and ('result' in message or 'error' in message):
+                    future = self._pending.pop(message['id'], None)
+                    if future and not future.done():
+                        future.set_result(message)
+                elif 'method' in message:
+                    for future in self._waiters.pop(message['method'], []):
+                        if not future.done():
+                            future.set_result(message)
+        finally:
+            error = MCPConnectionError('MCP server closed its output')
+            for future in list(self._pending.values()) + [f for fs in self._waiters.values() for f in fs]:
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+            self._waiters.clear()
+
+    async def _write(self, message: dict):
+        self.process.stdin.write((json.dumps(message) + '\n').encode('utf-8'))
+        await self.process.stdin.drain()
+
+    @property
+    def alive(self) -> bool:
+        return self._reader is not None and not self._reader.done()
+
+    async def request(self, method: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> dict:
+        """
+        Send a request and return its response. Raises MCPError on JSON-RPC errors or
+        timeout, and MCPConnectionError / ConnectionError when the server is gone.
+        """
+        if not self.alive:
+            raise MCPConnectionError('MCP server closed its output')
+        msg_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = future
+        message = {"jsonrpc": "2.0", "id": msg_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        try:
+            await self._write(message)
+            response = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise MCPError(f'{method} timed out after {timeout}s')
+        finally:
+            self._pending.pop(msg_id, None)
+        if 'error' in response:
+            raise MCPError(f"{method}: {response['error'].get('message', response['error'])}")
+        return response
+
+    async def notify(self, method: str, params: Optional[dict] = None):
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._write(message)
+
+    def expect_notification(self, method: str) -> asyncio.Future:
+        """Future resolved by the next notification with this method (register before triggering it)."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(method, []).append(future)
+        return future
+
+    async def initialize(self, timeout: Optional[float] = None) -> List[str]:
+        """Run the MCP handshake and return the names of the server's tools."""
+        await self.request("initialize", {
+            "protocolVersion": "2024-11-05", "capabilities": {},
+            "clientInfo": {"name": "mcp-screenshot-client", "version": "1.0"}
+        }, timeout)
+        await self.notify("notifications/initialized")
+        tools = await self.request("tools/list", timeout=timeout)
+        return [t.get('name') for t in tools.get('result', {}).get('tools', [])]
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None, timeout: Optional[float] = None) -> dict:
+        return await self.request("tools/call", {"name": name, "arguments": arguments or {}}, timeout)
+
+    async def close(self):
+        if not self.process:
+            return
+        if self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+                await asyncio.wait_for(self.process.wait(), 2)
+            except (asyncio.TimeoutError, ConnectionError):
+                if self.process.returncode is None:
+                    self.process.terminate()
+                await self.process.wait()
+        if self._reader:
+            await self._reader
+
+async def wait_ready(client: AsyncMCPClient, tools: List[str], timeout: float, poll: float = 0.25):
+    """
+    Wait until the current page is ready to be captured, at most `timeout` seconds.
+
+    browser_navigate only responds once the page has loaded, so its response is the
+    primary signal. When the server also offers browser_snapshot, poll it until it
+    returns content without an error, which covers pages that render after load.
+    """
+    if 'browser_snapshot' not in tools:
+        return
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise MCPError(f'page not ready after {timeout}s')
+        try:
+            response = await client.call_tool('browser_snapshot', timeout=remaining)
+            result = response.get('result', {})
+            if result.get('content') and not result.get('isError'):
+                return
+        except SESSION_ERRORS:
+            raise
+        except MCPError:
+            if loop.time() >= deadline:
+                raise
+        await asyncio.sleep(min(poll, max(deadline - loop.time(), 0)))
+
+async def capture_one(client: AsyncMCPClient, tools: List[str], url: str, save_dir: Path, ready_timeout: float) -> bool:
+    await client.call_tool('browser_navigate', {'url': url}, timeout=ready_timeout)
+    await wait_ready(client, tools, ready_timeout)
+    data = first_image(await client.call_tool('browser_screenshot', timeout=ready_timeout))
+    if not data:
+        print(f"[WARN] {url}: no image in screenshot response")
+        return False
+    save_screenshot(data, save_dir / screenshot_filename(url))
+    return True
+
+class MCPClient:
+    """
+    Blocking wrapper around AsyncMCPClient for one page at a time. msg_id arguments are
+    accepted for compatibility only; request ids are assigned by AsyncMCPClient.
+    """
+
+    def __init__(self, server_cmd: str = DEFAULT_SERVER_CMD, timeout: Optional[float] = 30.0):
+        self.client = AsyncMCPClient(shlex.split(server_cmd))
+        self.timeout = timeout
+        self.tools: List[str] = []
+        self._loop = asyncio.new_event_loop()
+
+    def _run(self, coro):
+        return self._loop.run_until_complete(coro)
+
+    def start(self):
+        self._run(self.client.start())
+
+    def initialize(self) -> List[str]:
+        self.tools = self._run(self.client.initialize(timeout=self.timeout))
+        return self.tools
+
+    def list_tools(self) -> dict:
+        return self._run(self.client.request("tools/list", timeout=self.timeout))
+
+    def navigate(self, url: str, msg_id: Optional[int] = None) -> dict:
+        return self._run(self.client.call_tool('browser_navigate', {'url': url}, timeout=self.timeout))
+
+    def wait_ready(self):
+        self._run(wait_ready(self.client, self.tools, self.timeout))
+
+    def screenshot(self, msg_id: Optional[int] = None) -> dict:
+        return self._run(self.client.call_tool('browser_screenshot', timeout=self.timeout))
+
+    def close(self):
+        try:
+            self._run(self.client.close())
+        finally:
+            self._loop.close()
+
+@contextmanager
+def mcp_session(server_cmd: str = DEFAULT_SERVER_CMD, timeout: Optional[float] = 30.0):
+    client = MCPClient(server_cmd, timeout)
+    try:
+        client.start()
+        client.initialize()
+        yield client
+    finally:
+        client.close()
+
+def capture_screenshot(client: MCPClient, url: str, idx: int, save_dir: Path) -> bool:
+    print(f"Processing {url}...")
+    try:
+        client.navigate(url, 3 + idx * 2)
+        client.wait_ready()
+        data = first_image(client.screenshot(4 + idx * 2))
+    except MCPError as e:
+        print(f"[WARN] {url}: {e}")
+        return False
+    if not data:
+        print(f"[WARN] {url}: no image in screenshot response")
+        return False
+    save_screenshot(data, save_dir / screenshot_filename(url))
+    return True
+
+async def open_session(n: int, server_cmd: str, ready_timeout: float) -> Tuple[Optional[AsyncMCPClient], List[str]]:
+    """Start one MCP server and run the handshake; (None, []) when that fails."""
+    client = AsyncMCPClient(shlex.split(server_cmd))
+    try:
+        await client.start()
+        return client, await client.initialize(timeout=ready_timeout)
+    except (OSError, MCPError, asyncio.IncompleteReadError) as e:
+        print(f"[WARN] Session {n}: could not start MCP server: {e}")
+        await client.close()
+        return None, []
+
+async def capture_all(websites: List[str], save_dir: Path, sessions: int = 4, ready_timeout: float = 30.0,
+                      server_cmd: str = DEFAULT_SERVER_CMD, retries: int = 1) -> int:
+    """Capture every URL with a pool of parallel MCP sessions; returns the number saved."""
+    queue: asyncio.Queue = asyncio.Queue()
+    for url in websites:
+        queue.put_nowait(url)
+    saved = 0
+
+    async def worker(n: int):
+        nonlocal saved
+        client, tools = await open_session(n, server_cmd, ready_timeout)
+        try:
+            while client and not queue.empty():
+                url = queue.get_nowait()
+                print(f"[{n}] Processing {url}...")
+                for attempt in range(retries + 1):
+                    try:
+                        if await capture_one(client, tools, url, save_dir, ready_timeout):
+                            saved += 1
+                        break
+                    except SESSION_ERRORS as e:
+                        print(f"[WARN] {url}: session lost ({e or type(e).__name__}), restarting MCP server")
+                        await client.close()
+                        client, tools = await open_session(n, server_cmd, ready_timeout)
+                        if client is None:
+                            queue.put_nowait(url)  # another session may still capture it
+                            return
+                    except MCPError as e:
+                        print(f"[WARN] {url}: {e}")
+                        break
+                else:
+                    print(f"[WARN] {url}: giving up after {retries + 1} attempts")
+        finally:
+            if client:
+                await client.close()
+
+    await asyncio.gather(*(worker(n) for n in range(max(1, min(sessions, len(websites))))))
+    return saved
 
 def main():
     parser = argparse.ArgumentParser(description="Capture screenshots of websites.")
@@ -114,6 +349,14 @@ def main():
                         help="JSON file with list of websites")
     parser.add_argument('--save-dir', type=Path, default=Path.home() / "Documents" / "screenshots",
                         help="Directory to save screenshots")
+    parser.add_argument('--sessions', type=int, default=4,
+                        help="Number of MCP sessions capturing in parallel (default: 4)")
+    parser.add_argument('--ready-timeout', type=float, default=30.0,
+                        help="Seconds to wait for each page (and each request) before giving up (default: 30)")
+    parser.add_argument('--server-cmd', default=DEFAULT_SERVER_CMD,
+                        help=f"MCP server command line (default: '{DEFAULT_SERVER_CMD}')")
+    parser.add_argument('--retries', type=int, default=1,
+                        help="Retries per page on a new session after the server dies (default: 1)")
     args = parser.parse_args()
 
     websites = load_websites(args.websites_file)
@@ -122,9 +365,10 @@ def main():
 
     args.save_dir.mkdir(parents=True, exist_ok=True)
 
-    with mcp_session() as client:
-        for idx, url in enumerate(websites):
-            capture_screenshot(client, url, idx, args.save_dir)
+    started = time.perf_counter()
+    saved = asyncio.run(capture_all(websites, args.save_dir, args.sessions, args.ready_timeout, args.server_cmd,
+                                     args.retries))
+    print(f"Saved {saved}/{len(websites)} screenshots in {time.perf_counter() - started:.1f}s")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Tag millions of points with their province, kabupaten and kecamatan codes.
+
+Usage:
+  python3 scripts/spatial_join.py points.csv tagged.csv [--lon-col lon --lat-col lat] \
+    [--jobs 8] [--chunk-size 500000] [--tile-size 1.0]
+  python3 scripts/spatial_join.py points.parquet tagged.parquet      # needs pyarrow
+
+Logic:
+- Kecamatan are taken from the public/data hierarchy (region_index.RegionIndex, whose
+  cached per-file bboxes let workers load only the kecamatan near their points)
+- The input is read in chunks (--chunk-size rows), so memory stays bounded whatever the
+  file size; every chunk is written out before the next one is read
+- Each chunk is partitioned spatially into --tile-size degree tiles; tiles are joined in
+  parallel worker processes. A worker loads the village polygons of the kecamatan whose
+  bbox overlaps the tile (keeping recently used ones in a small LRU), prefilters point /
+  polygon pairs by bbox through an STRtree and runs the exact point-in-polygon test for
+  all pairs at once with shapely.contains_xy over the numpy coordinate arrays
+- Output = input columns + province_code, regency_code, kecamatan_code (empty when the
+  point is outside every kecamatan or its coordinates are missing)
+
+Requires: shapely>=2.0, numpy, pandas (pyarrow for Parquet)
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
+from shapely.geometry import shape
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLIC_DATA = ROOT / 'public' / 'data'
+sys.path.insert(0, str(ROOT))
+
+from region_index import RegionIndex  # noqa: E402
+
+LON_COLUMNS = ('lon', 'lng', 'longitude', 'x', 'long')
+LAT_COLUMNS = ('lat', 'latitude', 'y')
+OUTPUT_COLUMNS = ('province_code', 'regency_code', 'kecamatan_code')
+MAX_CACHED_KECAMATAN = 2000
+
+# Worker state, set once per process by init_worker()
+_KEC_PATHS: List[str] = []
+_KEC_BBOXES: Optional[np.ndarray] = None
+_LOADED: 'OrderedDict[int, np.ndarray]' = OrderedDict()
+
+
+def init_worker(paths: List[str], bboxes: np.ndarray) -> None:
+    global _KEC_PATHS, _KEC_BBOXES
+    _KEC_PATHS, _KEC_BBOXES = paths, bboxes
+    _LOADED.clear()
+
+
+def load_kecamatan(i: int) -> np.ndarray:
+    """Prepared village polygons of kecamatan i (LRU-cached per worker)."""
+    if i in _LOADED:
+        _LOADED.move_to_end(i)
+        return _LOADED[i]
+    try:
+        with open(_KEC_PATHS[i], 'r', encoding='utf-8') as fh:
+            features = json.load(fh).get('features') or []
+        geoms = np.array([shape(f['geometry']) for f in features if isinstance(f, dict) and f.get('geometry')],
+                         dtype=object)
+    except Exception as e:
+        print(f'[WARN] {_KEC_PATHS[i]}: {e}')
+        geoms = np.empty(0, dtype=object)
+    shapely.prepare(geoms)
+    _LOADED[i] = geoms
+    while len(_LOADED) > MAX_CACHED_KECAMATAN:
+        _LOADED.popitem(last=False)
+    return geoms
+
+
+def join_tile(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Index of the kecamatan containing each point of one tile, -1 where none does."""
+    result = np.full(len(x), -1, dtype=np.int32)
+    b = _KEC_BBOXES
+    near = np.flatnonzero((b[:, 0] <= x.max()) & (b[:, 2] >= x.min()) & (b[:, 1] <= y.max()) & (b[:, 3] >= y.min()))
+    if not len(near):
+        return result
+
+    parts = [load_kecamatan(i) for i in near]
+    owner = np.repeat(near, [len(p) for p in parts]).astype(np.int32)
+    polys = np.concatenate(parts) if parts else np.empty(0, dtype=object)
+    if not len(polys):
+        return result
+
+    # bbox prefilter, then the exact test for every candidate pair in one call
+    pt, poly = STRtree(polys).query(shapely.points(x, y))
+    inside = shapely.contains_xy(polys[poly], x[pt], y[pt])
+    pt, poly = pt[inside], poly[inside]
+    # Later assignments win; reverse so the first matching polygon is kept on shared edges
+    result[pt[::-1]] = owner[poly[::-1]]
+    return result
+
+
+def tile_partitions(x: np.ndarray, y: np.ndarray, tile_size: float) -> List[np.ndarray]:
+    """Row indices of the points grouped by tile; rows with missing coordinates are dropped."""
+    ok = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    if not len(ok):
+        return []
+    keys = np.floor(x[ok] / tile_size).astype(np.int64) * 1_000_003 + np.floor(y[ok] / tile_size).astype(np.int64)
+    order = np.argsort(keys, kind='stable')
+    bounds = np.flatnonzero(np.diff(keys[order])) + 1
+    return np.split(ok[order], bounds)
+
+
+def read_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit('Reading Parquet needs pyarrow: pip install pyarrow')
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    """Append DataFrame chunks to a CSV or Parquet file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.parquet = path.suffix.lower() in ('.parquet', '.pq')
+        self.writer = None
+        self.first = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='w' if self.first else 'a', header=self.first, index=False)
+        self.first = False
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+def pick_column(columns, wanted: Optional[str], candidates: Tuple[str, ...], label: str) -> str:
+    if wanted:
+        if wanted not in columns:
+            raise SystemExit(f'Column {wanted!r} not found in input (columns: {", ".join(map(str, columns))})')
+        return wanted
+    lower = {str(c).lower(): c for c in columns}
+    for c in candidates:
+        if c in lower:
+            return lower[c]
+    raise SystemExit(f'Could not find a {label} column; pass --{label}-col')
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Tag points with province/kabupaten/kecamatan codes')
+    ap.add_argument('input', type=Path, help='Input CSV or Parquet file')
+    ap.add_argument('output', type=Path, help='Output CSV or Parquet file')
+    ap.add_argument('--lon-col', help=f'Longitude column (default: first of {", ".join(LON_COLUMNS)})')
+    ap.add_argument('--lat-col', help=f'Latitude column (default: first of {", ".join(LAT_COLUMNS)})')
+    ap.add_argument('--data-dir', type=Path, default=PUBLIC_DATA, help='Data directory (default: public/data)')
+    ap.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+    ap.add_argument('--chunk-size', type=int, default=500000, help='Rows read and written at a time (default: 500000)')
+    ap.add_argument('--tile-size', type=float, default=1.0, help='Spatial partition size in degrees (default: 1.0)')
+    args = ap.parse_args()
+
+    regions = RegionIndex(args.data_dir)
+    regions.refresh(force=True)
+    kec = [n for n in regions.nodes.values() if n['level'] == 'subdistrict' and n['bbox']]
+    if not kec:
+        raise SystemExit(f'No kecamatan files found under {args.data_dir}')
+    codes = np.array([n['code'] for n in kec] + [''], dtype=object)  # index -1 -> ''
+    paths = [str(args.data_dir / n['path'][len('/data/'):]) for n in kec]
+    bboxes = np.array([n['bbox'] for n in kec], dtype=float)
+    print(f'Joining against {len(kec)} kecamatan with {args.jobs} workers...')
+
+    pool = ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker,
+                               initargs=(paths, bboxes)) if args.jobs > 1 else None
+    if pool is None:
+        init_worker(paths, bboxes)
+
+    writer = ChunkWriter(args.output)
+    started = time.perf_counter()
+    total = matched = 0
+    try:
+        for df in read_chunks(args.input, args.chunk_size):
+            lon_col = pick_column(df.columns, args.lon_col, LON_COLUMNS, 'lon')
+            lat_col = pick_column(df.columns, args.lat_col, LAT_COLUMNS, 'lat')
+            x = pd.to_numeric(df[lon_col], errors='coerce').to_numpy(dtype=float)
+            y = pd.to_numeric(df[lat_col], errors='coerce').to_numpy(dtype=float)
+
+            tiles = tile_partitions(x, y, args.tile_size)
+            idx = np.full(len(df), -1, dtype=np.int32)
+            xs = [x[rows] for rows in tiles]
+            ys = [y[rows] for rows in tiles]
+            results = pool.map(join_tile, xs, ys) if pool else map(join_tile, xs, ys)
+            for rows, res in zip(tiles, results):
+                idx[rows] = res
+
+            kec_codes = codes[idx]
+            df['province_code'] = [c[:2] for c in kec_codes]
+            df['regency_code'] = [c[:4] for c in kec_codes]
+            df['kecamatan_code'] = kec_codes
+            writer.write(df)
+
+            total += len(df)
+            matched += int((idx >= 0).sum())
+            elapsed = time.perf_counter() - started
+            print(f'  {total:,} rows ({matched:,} matched) in {elapsed:.1f}s, {total / elapsed:,.0f} rows/s')
+    finally:
+        writer.close()
+        if pool:
+            pool.shutdown()
+
+    print(f'[SUMMARY] {total:,} rows, {matched:,} matched, {total - matched:,} unmatched -> {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,23 +6,47 @@ Checks for each district folder (id<prov><regency>_<district-slug>):
 - Has at least one subdistrict .geojson (excluding the combined fallback file)
 - Has a combined fallback file named exactly like the district folder + .geojson
 
+With --deep, every district is also opened and checked, in parallel across processes:
+- Every .geojson parses and contains at least one feature with a geometry
+- Every geometry is valid (shapely.is_valid)
+- Feature codes match the file: district_code of a kecamatan file, regency_code of the
+  fallback file (when those properties are present)
+- Sibling kecamatan do not overlap (STRtree query, overlap area above --overlap-tolerance
+  of the smaller kecamatan)
+- The fallback file covers the union of its kecamatan (uncovered area above
+  --cover-tolerance of the union)
+Deep results are cached per district in .cache/validate_data.json. A district is only
+re-checked when one of its files changed: unchanged mtime/size reuses the cached result
+directly, and a changed mtime with identical content (sha256) reuses it as well.
+
 Exits with code 1 if any issues are found; prints a concise report.
 
 Examples:
   python3 scripts/validate_data.py                 # scan all provinces
   python3 scripts/validate_data.py --province 35   # scan only province 35
   python3 scripts/validate_data.py --province 51 --slug bali  # scan Bali only
+  python3 scripts/validate_data.py --deep --jobs 8             # also open and check every file
 """
 import argparse
+import hashlib
+import json
+import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 ROOT = Path(__file__).resolve().parents[1]
 PUBLIC_DATA = ROOT / 'public' / 'data'
+sys.path.insert(0, str(ROOT))
+
+from region_index import DIST_DIR_RE, PROV_DIR_RE  # noqa: E402
+
+FILE_CODE_PATTERN = re.compile(r'^id(\d+)_')
 
-PROV_DIR_PATTERN = re.compile(r'^id(\d{2})_([a-z0-9_]+)$')
-DIST_DIR_PATTERN = re.compile(r'^id(\d{4})_([a-z0-9_]+)$')
+CACHE_FILE = ROOT / '.cache' / 'validate_data.json'
+CACHE_VERSION = 1
 
 
 def find_province_dirs(prov: Optional[str], slug: Optional[str]) -> List[Path]:
@@ -36,12 +60,12 @@ def find_province_dirs(prov: Optional[str], slug: Optional[str]) -> List[Path]:
                 continue
             if slug and not d.name.endswith('_' + slug):
                 continue
-            if PROV_DIR_PATTERN.match(d.name):
+            if PROV_DIR_RE.match(d.name):
                 dirs.append(d)
         return dirs
     # else: auto-detect all province dirs
     for d in PUBLIC_DATA.iterdir():
-        if d.is_dir() and PROV_DIR_PATTERN.match(d.name):
+        if d.is_dir() and PROV_DIR_RE.match(d.name):
             dirs.append(d)
     return sorted(dirs)
 
@@ -70,10 +94,192 @@ def validate_district_dir(d: Path) -> Tuple[bool, List[str]]:
     return (len(issues) == 0, issues)
 
 
+def _digits(value) -> str:
+    return re.sub(r'\D', '', str(value)) if value is not None else ''
+
+
+def _load_file_geoms(f: Path, code_key: str, issues: List[str]):
+    """Parse one file, record per-file issues and return its geometries (or None)."""
+    import numpy as np
+    import shapely
+    from shapely.geometry import shape
+
+    try:
+        with f.open('r', encoding='utf-8') as fh:
+            data = json.load(fh)
+    except Exception as e:
+        issues.append(f'{f.name}: unreadable JSON ({e})')
+        return None
+    if isinstance(data, dict) and data.get('type') == 'Feature':
+        features = [data]
+    elif isinstance(data, dict):
+        features = [x for x in (data.get('features') or []) if isinstance(x, dict)]
+    else:
+        features = []
+    features = [x for x in features if x.get('geometry')]
+    if not features:
+        issues.append(f'{f.name}: empty collection')
+        return None
+
+    expected = FILE_CODE_PATTERN.match(f.name).group(1) if FILE_CODE_PATTERN.match(f.name) else None
+    mismatched = 0
+    for feat in features:
+        code = _digits((feat.get('properties') or {}).get(code_key))
+        if expected and code and code != expected:
+            mismatched += 1
+    if mismatched:
+        issues.append(f'{f.name}: {mismatched} features with {code_key} not matching {expected}')
+
+    try:
+        geoms = np.array([shape(x['geometry']) for x in features], dtype=object)
+    except Exception as e:
+        issues.append(f'{f.name}: bad geometry ({e})')
+        return None
+    invalid = ~shapely.is_valid(geoms)
+    if invalid.any():
+        issues.append(f'{f.name}: {int(invalid.sum())} invalid geometries '
+                      f'({shapely.is_valid_reason(geoms[invalid][0])})')
+        geoms = shapely.make_valid(geoms)
+    return geoms
+
+
+def deep_check_district(dist_dir: str, overlap_tol: float, cover_tol: float) -> List[str]:
+    """Open every file of one district and return its deep issues (runs in worker processes)."""
+    import numpy as np
+    import shapely
+
+    d = Path(dist_dir)
+    issues: List[str] = []
+    fallback_name = d.name + '.geojson'
+    kec_names: List[str] = []
+    kec_geoms = []
+    fallback_geom = None
+    for f in sorted(d.iterdir()):
+        if not f.is_file() or not f.name.endswith('.geojson'):
+            continue
+        is_fallback = f.name == fallback_name
+        geoms = _load_file_geoms(f, 'regency_code' if is_fallback else 'district_code', issues)
+        if geoms is None:
+            continue
+        merged = shapely.union_all(geoms)
+        if is_fallback:
+            fallback_geom = merged
+        else:
+            kec_names.append(f.stem)
+            kec_geoms.append(merged)
+
+    if kec_geoms:
+        kec_arr = np.array(kec_geoms, dtype=object)
+        left, right = shapely.STRtree(kec_arr).query(kec_arr, predicate='intersects')
+        for i, j in zip(left, right):
+            if i >= j:
+                continue
+            overlap = shapely.intersection(kec_arr[i], kec_arr[j]).area
+            smaller = min(kec_arr[i].area, kec_arr[j].area) or 1.0
+            if overlap / smaller > overlap_tol:
+                issues.append(f'{kec_names[i]} overlaps {kec_names[j]} ({overlap / smaller:.2%} of smaller)')
+
+        if fallback_geom is not None:
+            kec_union = shapely.union_all(kec_arr)
+            uncovered = shapely.difference(kec_union, fallback_geom).area
+            if kec_union.area and uncovered / kec_union.area > cover_tol:
+                issues.append(f'{fallback_name} does not cover its kecamatan '
+                              f'({uncovered / kec_union.area:.2%} of their union uncovered)')
+    return issues
+
+
+def _file_hash(f: Path) -> str:
+    h = hashlib.sha256()
+    with f.open('rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_cache(options: Dict[str, float]) -> Dict[str, dict]:
+    try:
+        with CACHE_FILE.open('r', encoding='utf-8') as fh:
+            cache = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != CACHE_VERSION or cache.get('options') != options:
+        return {}
+    return cache.get('districts', {})
+
+
+def save_cache(options: Dict[str, float], districts: Dict[str, dict]) -> None:
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CACHE_FILE.with_suffix('.tmp')
+    tmp.write_text(json.dumps({'version': CACHE_VERSION, 'options': options, 'districts': districts}),
+                   encoding='utf-8')
+    os.replace(tmp, CACHE_FILE)
+
+
+def cached_issues(d: Path, entry: Optional[dict]) -> Tuple[Optional[List[str]], Dict[str, list]]:
+    """
+    Return (issues, file_state) for a district.
+
+    issues is the cached result when no file changed content, else None.
+    file_state maps file name -> [mtime_ns, size, sha256] for storing in the cache.
+    """
+    old_files = (entry or {}).get('files', {})
+    state: Dict[str, list] = {}
+    for f in sorted(d.iterdir()):
+        if not f.is_file() or not f.name.endswith('.geojson'):
+            continue
+        st = f.stat()
+        old = old_files.get(f.name)
+        if old and old[0] == st.st_mtime_ns and old[1] == st.st_size:
+            state[f.name] = old
+        else:
+            state[f.name] = [st.st_mtime_ns, st.st_size, _file_hash(f)]
+    unchanged = entry is not None and set(state) == set(old_files) and all(
+        state[n][2] == old_files[n][2] for n in state)
+    return (entry['issues'] if unchanged else None), state
+
+
+def run_deep_checks(district_dirs: List[Path], jobs: int, overlap_tol: float, cover_tol: float,
+                    use_cache: bool = True) -> Dict[Path, List[str]]:
+    options = {'overlap_tol': overlap_tol, 'cover_tol': cover_tol}
+    cache = load_cache(options) if use_cache else {}
+    results: Dict[Path, List[str]] = {}
+    states: Dict[str, Dict[str, list]] = {}
+    todo: List[Path] = []
+    for d in district_dirs:
+        issues, states[str(d)] = cached_issues(d, cache.get(str(d)))
+        if issues is None:
+            todo.append(d)
+        else:
+            results[d] = issues
+
+    print(f'Deep check: {len(todo)} districts to check, {len(results)} unchanged (cached)')
+    if jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            checked = pool.map(deep_check_district, [str(d) for d in todo],
+                               [overlap_tol] * len(todo), [cover_tol] * len(todo))
+            results.update(zip(todo, checked))
+    else:
+        for d in todo:
+            results[d] = deep_check_district(str(d), overlap_tol, cover_tol)
+
+    if use_cache:
+        for d, issues in results.items():
+            cache[str(d)] = {'files': states[str(d)], 'issues': issues}
+        save_cache(options, cache)
+    return results
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(description='Validate public/data province/district layout')
     ap.add_argument('--province', help='Province numeric code (e.g., 35, 51)')
     ap.add_argument('--slug', help='Province slug (e.g., bali, jawa_timur)')
+    ap.add_argument('--deep', action='store_true', help='Open every file: parse, geometry validity, codes, overlaps, coverage')
+    ap.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes for --deep (default: CPU count)')
+    ap.add_argument('--overlap-tolerance', type=float, default=0.001,
+                    help='--deep: allowed overlap between sibling kecamatan, as a fraction of the smaller one')
+    ap.add_argument('--cover-tolerance', type=float, default=0.001,
+                    help='--deep: allowed part of the kecamatan union not covered by the fallback file')
+    ap.add_argument('--no-cache', action='store_true', help='--deep: ignore and do not update the result cache')
     args = ap.parse_args()
 
     prov = args.province.zfill(2) if args.province else None
@@ -86,15 +292,25 @@ def main() -> None:
     total_districts = 0
     bad_districts = 0
 
+    deep_results: Dict[Path, List[str]] = {}
+    if args.deep:
+        all_districts = [d for pdir in prov_dirs for d in sorted(pdir.iterdir())
+                         if d.is_dir() and DIST_DIR_RE.match(d.name)]
+        deep_results = run_deep_checks(all_districts, args.jobs, args.overlap_tolerance,
+                                       args.cover_tolerance, use_cache=not args.no_cache)
+        print()
+
     for pdir in prov_dirs:
         print(f'Province: {pdir.name}')
         for d in sorted(pdir.iterdir()):
             if not d.is_dir():
                 continue
-            if not DIST_DIR_PATTERN.match(d.name):
+            if not DIST_DIR_RE.match(d.name):
                 continue
             total_districts += 1
             ok, issues = validate_district_dir(d)
+            issues.extend(deep_results.get(d, []))
+            ok = ok and not issues
             if not ok:
                 bad_districts += 1
                 print(f'  - {d.name}: ' + '; '.join(issues))
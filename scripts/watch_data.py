@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Watch public/data and incrementally rebuild derived data while curating kecamatan files.
+
+Usage:
+  python3 scripts/watch_data.py [--interval 1.0] [--debounce 0.5] [--no-catalog]
+
+Logic:
+- Poll the id<prov>_<slug>/id<regency>_<slug>/*.geojson tree (stat only, no parsing) and
+  batch changes until the tree has been quiet for --debounce seconds
+- For every batch, recompute only what the changed files affect:
+  - the district's layout and deep validation (scripts/validate_data.py, cached)
+  - the district's bundle (<district>.bundle.json / .bundle.idx.json from
+    scripts/gen_province_config.py), when it has one, since the loader prefers it
+  - the district's dissolve and its province's kab_<prov>.geojson
+    (scripts/make_kab_dissolved.py; only the changed districts are hashed and
+    dissolved again, the others come straight from the dissolve cache)
+  - the province's catalog manifest and root index entry (scripts/gen_catalog.py;
+    only changed files are re-read)
+- All outputs are written to a temporary file and renamed into place, so the dev
+  server never serves a half-written file
+
+Stop with Ctrl+C.
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import Dict, Set, Tuple
+
+import gen_catalog
+import gen_province_config as gpc
+import make_kab_dissolved as mkd
+import validate_data
+from region_index import DIST_DIR_RE, PROV_DIR_RE
+
+PUBLIC_DATA = mkd.PUBLIC_DATA
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def snapshot(root: Path) -> Snapshot:
+    """{path: (mtime_ns, size)} for every kecamatan/fallback file under root."""
+    snap: Snapshot = {}
+    for prov in os.scandir(root):
+        if not prov.is_dir() or not PROV_DIR_RE.match(prov.name):
+            continue
+        for dist in os.scandir(prov.path):
+            if not dist.is_dir() or not DIST_DIR_RE.match(dist.name):
+                continue
+            for f in os.scandir(dist.path):
+                if f.name.endswith('.geojson') and f.is_file():
+                    st = f.stat()
+                    snap[f.path] = (st.st_mtime_ns, st.st_size)
+    return snap
+
+
+def diff(old: Snapshot, new: Snapshot) -> Set[str]:
+    changed = {p for p, sig in new.items() if old.get(p) != sig}
+    changed.update(p for p in old if p not in new)
+    return changed
+
+
+def rebuild_bundle(dist_dir: Path) -> None:
+    """Rewrite a district's bundle from its current kecamatan files (only if it has one)."""
+    bundle = dist_dir / (dist_dir.name + gpc.BUNDLE_SUFFIX)
+    index = dist_dir / (dist_dir.name + gpc.BUNDLE_INDEX_SUFFIX)
+    if not bundle.exists():
+        return
+    fallback = f'{dist_dir.name}.geojson'
+    subdistricts = sorted(f.stem for f in dist_dir.glob('*.geojson') if f.name != fallback)
+    if gpc.write_district_bundle(dist_dir, subdistricts):
+        print(f'[OK] Rebuilt bundle {dist_dir.parent.name}/{bundle.name}')
+        return
+    # No kecamatan left: drop the bundle so the loader falls back to the district file
+    for f in (bundle, index):
+        f.unlink(missing_ok=True)
+    print(f'[OK] Removed empty bundle {dist_dir.parent.name}/{bundle.name}')
+
+
+def rebuild(changed: Set[str], catalog: bool, overlap_tol: float, cover_tol: float) -> None:
+    started = time.perf_counter()
+    districts = sorted({Path(p).parent for p in changed})
+    provinces = sorted({d.parent for d in districts})
+
+    existing = [d for d in districts if d.is_dir()]
+    deep = validate_data.run_deep_checks(existing, jobs=1, overlap_tol=overlap_tol, cover_tol=cover_tol)
+    for d in existing:
+        _, issues = validate_data.validate_district_dir(d)
+        issues += deep.get(d, [])
+        print(f'[{"WARN" if issues else "OK"}] {d.parent.name}/{d.name}: '
+              + ('; '.join(issues) if issues else 'valid'))
+        rebuild_bundle(d)
+
+    for prov_dir in provinces:
+        m = PROV_DIR_RE.match(prov_dir.name)
+        if not m:
+            continue
+        mkd.build_province(m.group(1), changed=[d for d in districts if d.parent == prov_dir])
+        if catalog and prov_dir.is_dir():
+            gen_catalog.update_province(prov_dir, [p for p in changed if Path(p).parent.parent == prov_dir],
+                                        out_dir=gen_catalog.CATALOG_DIR)
+            print(f'[OK] Updated catalog manifest for {prov_dir.name}')
+
+    print(f'[WATCH] Rebuilt {len(districts)} district(s) in {len(provinces)} province(s) '
+          f'in {time.perf_counter() - started:.2f}s')
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Incrementally rebuild derived data when kecamatan files change')
+    ap.add_argument('--interval', type=float, default=1.0, help='Polling interval in seconds (default: 1.0)')
+    ap.add_argument('--debounce', type=float, default=0.5,
+                    help='Wait until no change was seen for this many seconds before rebuilding (default: 0.5)')
+    ap.add_argument('--no-catalog', action='store_true', help='Do not update catalog manifests')
+    ap.add_argument('--overlap-tolerance', type=float, default=0.001, help='See validate_data.py --overlap-tolerance')
+    ap.add_argument('--cover-tolerance', type=float, default=0.001, help='See validate_data.py --cover-tolerance')
+    args = ap.parse_args()
+
+    current = snapshot(PUBLIC_DATA)
+    print(f'[WATCH] Watching {len(current)} files under {PUBLIC_DATA} (Ctrl+C to stop)')
+    pending: Set[str] = set()
+    last_change = 0.0
+    try:
+        while True:
+            time.sleep(args.interval)
+            latest = snapshot(PUBLIC_DATA)
+            changed = diff(current, latest)
+            current = latest
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+                continue
+            if pending and time.monotonic() - last_change >= args.debounce:
+                batch, pending = pending, set()
+                print(f'[WATCH] {len(batch)} file(s) changed')
+                try:
+                    rebuild(batch, not args.no_catalog, args.overlap_tolerance, args.cover_tolerance)
+                except Exception as e:
+                    print(f'[WARN] Rebuild failed: {e}')
+    except KeyboardInterrupt:
+        print('\n[WATCH] Stopped')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import { mergeProvinceConfig } from './data-config';
+import type { ProvinceConfig } from './types/data-config';
+
+const bundled: ProvinceConfig = {
+  id: '35',
+  name: 'Jawa Timur',
+  path: '/data/id35_jawa_timur',
+  districtsFile: '/data/jawa_timu_kab.geojson',
+  districts: {
+    '3510': {
+      id: '3510',
+      name: 'Banyuwangi',
+      path: '/data/id35_jawa_timur/id3510_banyuwangi',
+      subdistricts: [{ id: 'id3510010_pesanggaran', url: '/data-hashed/id3510010_pesanggaran.abc.geojson' }],
+      bundleFile: 'id3510_banyuwangi.bundle.json',
+      bundleIndexFile: 'id3510_banyuwangi.bundle.idx.json',
+      bundleUrl: '/data-hashed/id3510_banyuwangi.def.bundle.json',
+    },
+  },
+};
+
+const manifest: ProvinceConfig = {
+  id: '35',
+  name: 'Jawa Timur',
+  path: '/data/id35_jawa_timur',
+  districtsFile: '/data/kab_37.geojson',
+  districts: {
+    '3510': {
+      id: '3510',
+      name: 'Banyuwangi',
+      path: '/data/id35_jawa_timur/id3510_banyuwangi',
+      subdistricts: [
+        { id: 'id3510010_pesanggaran', size: 10 },
+        { id: 'id3510020_siliragung', size: 20 },
+      ],
+    },
+  },
+};
+
+test('manifest keeps the bundle, hashed URLs and districtsFile of the bundled config', () => {
+  const merged = mergeProvinceConfig(bundled, manifest);
+  const district = merged.districts['3510'];
+  expect(merged.districtsFile).toBe('/data/jawa_timu_kab.geojson');
+  expect(district.bundleFile).toBe('id3510_banyuwangi.bundle.json');
+  expect(district.bundleIndexFile).toBe('id3510_banyuwangi.bundle.idx.json');
+  expect(district.bundleUrl).toBe('/data-hashed/id3510_banyuwangi.def.bundle.json');
+  expect(district.subdistricts.map(s => s.id)).toEqual(['id3510010_pesanggaran', 'id3510020_siliragung']);
+  expect(district.subdistricts[0]).toMatchObject({ size: 10, url: '/data-hashed/id3510010_pesanggaran.abc.geojson' });
+});
+
+test('manifest fields win over the bundled ones', () => {
+  const withBundle = { ...manifest.districts['3510'], bundleFile: 'new.bundle.json' };
+  const merged = mergeProvinceConfig(bundled, { ...manifest, districts: { '3510': withBundle } });
+  expect(merged.districts['3510'].bundleFile).toBe('new.bundle.json');
+});
+
+test('without a bundled config the manifest is used as is', () => {
+  expect(mergeProvinceConfig(undefined, manifest)).toBe(manifest);
+});
@@ -1,10 +1,14 @@
 // Data configuration for Indonesian administrative divisions
 // Structured approach using province-specific metadata files
 
-import type { DistrictConfig, ProvinceConfig } from './types/data-config';
+import type { CatalogIndex, DistrictConfig, ProvinceConfig, SubdistrictFile } from './types/data-config';
 import PROVINCES from './data/provinces';
 
-export type { SubdistrictFile, DistrictConfig, ProvinceConfig } from './types/data-config';
+export type {
+  SubdistrictFile, DistrictConfig, ProvinceConfig, FileStats, CatalogIndex, CatalogIndexEntry
+} from './types/data-config';
+
+export const CATALOG_INDEX_URL = '/data/catalog/index.json';
 
 // Main data configuration (assembled from per-province modules)
 export const DATA_CONFIG: Record<string, ProvinceConfig> = PROVINCES;
@@ -75,3 +79,79 @@ export function getProvinceByDistrictId(districtId: string | number): ProvinceCo
   
   return null;
 }
+
+// Overlay a catalog manifest on the bundled province config. The manifest is the
+// fresher listing of districts and files, but fields it does not carry (bundle
+// files, hashed URLs when the catalog was generated without --aliases, a hand-set
+// districtsFile such as Jawa Timur's) are kept from the bundled config.
+export function mergeProvinceConfig(bundled: ProvinceConfig | undefined, manifest: ProvinceConfig): ProvinceConfig {
+  if (!bundled) {
+    return manifest;
+  }
+  const districts: Record<string, DistrictConfig> = {};
+  for (const [code, district] of Object.entries(manifest.districts)) {
+    const base = bundled.districts[code];
+    if (!base) {
+      districts[code] = district;
+      continue;
+    }
+    const baseSubdistricts = new Map(base.subdistricts.map(s => [s.id, s] as [string, SubdistrictFile]));
+    districts[code] = {
+      ...base,
+      ...district,
+      subdistricts: district.subdistricts.map(s => ({ ...baseSubdistricts.get(s.id), ...s })),
+    };
+  }
+  return { ...bundled, ...manifest, districtsFile: bundled.districtsFile || manifest.districtsFile, districts };
+}
+
+// Lazy catalog (generated by scripts/gen_catalog.py): fetch a province's manifest
+// only when it is needed, instead of relying on the bundled per-province modules.
+let catalogIndexPromise: Promise<CatalogIndex | null> | null = null;
+const provinceManifestCache = new Map<string, Promise<ProvinceConfig | null>>();
+
+export function loadCatalogIndex(): Promise<CatalogIndex | null> {
+  if (!catalogIndexPromise) {
+    catalogIndexPromise = fetch(CATALOG_INDEX_URL)
+      .then(res => (res.ok ? (res.json() as Promise<CatalogIndex>) : null))
+      .catch(error => {
+        console.error('Failed to load catalog index:', error);
+        return null;
+      });
+  }
+  return catalogIndexPromise;
+}
+
+export function loadProvinceManifest(provinceId: string | number): Promise<ProvinceConfig | null> {
+  const id = provinceId.toString().padStart(2, '0');
+  let pending = provinceManifestCache.get(id);
+  if (!pending) {
+    pending = loadCatalogIndex().then(async index => {
+      const entry = index?.provinces.find(p => p.id === id);
+      if (!entry) return null;
+      const res = await fetch(entry.manifest);
+      if (!res.ok) return null;
+      const manifest = mergeProvinceConfig(DATA_CONFIG[id], (await res.json()) as ProvinceConfig);
+      DATA_CONFIG[id] = manifest;
+      return manifest;
+    });
+    provinceManifestCache.set(id, pending);
+  }
+  return pending;
+}
+
+// District lookup used by the data loader: for a kabupaten code, the province's
+// catalog manifest (when the catalog was generated) replaces the bundled module in
+// DATA_CONFIG first, so newly added kecamatan files are picked up without a rebuild.
+// Without a catalog this is findDistrictConfig on the bundled configuration.
+export async function resolveDistrictConfig(districtId: string | number): Promise<DistrictConfig | null> {
+  const idStr = districtId.toString();
+  if (/^\d{4}$/.test(idStr)) {
+    const manifest = await loadProvinceManifest(idStr.substring(0, 2));
+    const district = manifest?.districts[idStr];
+    if (district) {
+      return district;
+    }
+  }
+  return findDistrictConfig(districtId);
+}
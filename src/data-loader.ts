@@ -1,7 +1,7 @@
 // Generic data loader for Indonesian administrative divisions
 // This replaces the repetitive loading functions with a unified approach
 
-import { DistrictConfig, findDistrictConfig, SubdistrictFile } from './data-config';
+import { DistrictConfig, resolveDistrictConfig, SubdistrictFile } from './data-config';
 
 export interface GeoJSONFeature {
   type: "Feature";
@@ -83,7 +83,7 @@ async function loadSubdistrictFile(
   subdistrict: SubdistrictFile, 
   districtCode: string
 ): Promise<GeoJSONFeature[]> {
-  const url = `${basePath}/${subdistrict.id}.geojson`;
+  const url = subdistrict.url || `${basePath}/${subdistrict.id}.geojson`;
   console.log(`Loading subdistrict: ${subdistrict.id} from ${url}`);
   
   try {
@@ -111,8 +111,8 @@ async function loadSubdistrictFile(
 }
 
 // Load fallback district file
-async function loadFallbackFile(basePath: string, fallbackFile: string): Promise<GeoJSONData | null> {
-  const url = `${basePath}/${fallbackFile}`;
+async function loadFallbackFile(basePath: string, fallbackFile: string, fallbackUrl?: string): Promise<GeoJSONData | null> {
+  const url = fallbackUrl || `${basePath}/${fallbackFile}`;
   console.log(`Loading fallback district file: ${url}`);
   
   try {
@@ -132,6 +132,39 @@ async function loadFallbackFile(basePath: string, fallbackFile: string): Promise
   }
 }
 
+// Load the whole district from its bundle in a single request.
+// The bundle lists [{ id, features }] per kecamatan so names can still be derived per file.
+async function loadDistrictBundle(districtConfig: DistrictConfig): Promise<GeoJSONFeature[]> {
+  const url = districtConfig.bundleUrl || `${districtConfig.path}/${districtConfig.bundleFile}`;
+  console.log(`Loading district bundle: ${url}`);
+
+  try {
+    const response = await fetch(url);
+
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    const data = await parseJsonSafely(response, districtConfig.bundleFile || url);
+    const features: GeoJSONFeature[] = data.features || [];
+    const listing: { id: string; features: number }[] = data.subdistricts || [];
+
+    const enhanced: GeoJSONFeature[] = [];
+    let offset = 0;
+    for (const entry of listing) {
+      const slice = features.slice(offset, offset + entry.features);
+      enhanced.push(...enhanceFeatures(slice, entry.id, districtConfig.id));
+      offset += entry.features;
+    }
+    console.log(`Successfully loaded ${enhanced.length} features from bundle for ${districtConfig.name}`);
+    return enhanced;
+
+  } catch (error) {
+    console.error(`Failed to load bundle for ${districtConfig.name}:`, error);
+    return [];
+  }
+}
+
 // Main function to load subdistrict data
 export async function loadSubdistrictData(districtId: string | number): Promise<LoadResult> {
   if (!districtId) {
@@ -141,7 +174,7 @@ export async function loadSubdistrictData(districtId: string | number): Promise<
   console.log(`Loading subdistrict data for district ID: ${districtId} (type: ${typeof districtId})`);
   
   // Find district configuration
-  const districtConfig = findDistrictConfig(districtId);
+  const districtConfig = await resolveDistrictConfig(districtId);
   if (!districtConfig) {
     const error = `No configuration found for district ID: ${districtId}`;
     console.error(error);
@@ -150,6 +183,19 @@ export async function loadSubdistrictData(districtId: string | number): Promise<
   
   console.log(`Found district configuration: ${districtConfig.name} (${districtConfig.id})`);
   
+  // Prefer the single-request district bundle when the generator wrote one
+  if (districtConfig.bundleFile) {
+    const bundled = await loadDistrictBundle(districtConfig);
+    if (bundled.length > 0) {
+      return {
+        success: true,
+        data: { type: "FeatureCollection", features: bundled },
+        loadedCount: districtConfig.subdistricts.length,
+        totalCount: districtConfig.subdistricts.length
+      };
+    }
+  }
+
   // Try to load individual subdistrict files
   const combinedFeatures: GeoJSONFeature[] = [];
   let loadedCount = 0;
@@ -185,7 +231,7 @@ export async function loadSubdistrictData(districtId: string | number): Promise<
   if (districtConfig.fallbackFile) {
     console.log(`No subdistrict files loaded for ${districtConfig.name}, trying fallback: ${districtConfig.fallbackFile}`);
     
-    const fallbackData = await loadFallbackFile(districtConfig.path, districtConfig.fallbackFile);
+    const fallbackData = await loadFallbackFile(districtConfig.path, districtConfig.fallbackFile, districtConfig.fallbackUrl);
     if (fallbackData) {
       console.log(`Successfully loaded fallback data for ${districtConfig.name}`);
       return {
@@ -1,8 +1,19 @@
 // Shared types for data configuration (provinces → districts → subdistricts)
 
-export interface SubdistrictFile {
+// Per-file metadata written by scripts/gen_catalog.py
+export interface FileStats {
+  size: number;
+  features: number;
+  vertices: number;
+  bbox: [number, number, number, number] | null;
+  hash: string;
+}
+
+export interface SubdistrictFile extends Partial<FileStats> {
   id: string;
   name?: string;
+  // Content-hashed URL (scripts/publish_hashed.py); preferred over path + id when set
+  url?: string;
 }
 
 export interface DistrictConfig {
@@ -13,6 +24,16 @@ export interface DistrictConfig {
   path: string;
   subdistricts: SubdistrictFile[];
   fallbackFile?: string;
+  // Whole-district bundle and its byte-range index (scripts/gen_province_config.py)
+  bundleFile?: string;
+  bundleIndexFile?: string;
+  // Content-hashed URLs (scripts/publish_hashed.py); preferred when set
+  fallbackUrl?: string;
+  bundleUrl?: string;
+  bundleIndexUrl?: string;
+  // Present in catalog manifests (scripts/gen_catalog.py)
+  fallback?: FileStats;
+  bbox?: [number, number, number, number] | null;
 }
 
 export interface ProvinceConfig {
@@ -22,4 +43,20 @@ export interface ProvinceConfig {
   // Path to the districts (kabupaten/kota) GeoJSON collection used for filtering
   districtsFile?: string;
   districts: Record<string, DistrictConfig>;
+  bbox?: [number, number, number, number] | null;
+}
+
+// Root index of the lazy-loadable catalog (public/data/catalog/index.json)
+export interface CatalogIndexEntry {
+  id: string;
+  name: string;
+  manifest: string;
+  districts: number;
+  bbox: [number, number, number, number] | null;
+  hash: string;
+}
+
+export interface CatalogIndex {
+  version: number;
+  provinces: CatalogIndexEntry[];
 }
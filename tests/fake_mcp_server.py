@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Minimal stdio MCP server for testing scripts/screenshot_example.py.
+
+Usage:
+  python3 tests/fake_mcp_server.py [--crash-once MARKER]
+
+Tools:
+  browser_navigate    {"url": ...}; URLs containing 'hang' never get a response, URLs
+                      containing 'crash' make the server exit (with --crash-once only
+                      while MARKER does not exist yet; the file is created first)
+  browser_screenshot  image content with a tiny base64 payload
+  hold                response is held back and sent after the next request's response
+  echo                returns its arguments
+  notify              sends the notification {"method": <method argument>} before responding
+  exit                exits without responding
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+
+TOOLS = ['browser_navigate', 'browser_screenshot', 'hold', 'echo', 'notify', 'exit']
+IMAGE = base64.b64encode(b'\x89PNG fake').decode('ascii')
+
+
+def send(message):
+    sys.stdout.write(json.dumps(message) + '\n')
+    sys.stdout.flush()
+
+
+def result(msg_id, content):
+    return {'jsonrpc': '2.0', 'id': msg_id, 'result': {'content': content}}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--crash-once', help='Marker file; crash only while it does not exist')
+    args = ap.parse_args()
+
+    print('fake MCP server starting', flush=True)  # non-JSON noise on stdout
+    held = None
+    for line in sys.stdin:
+        message = json.loads(line)
+        msg_id, method = message.get('id'), message.get('method')
+        if msg_id is None:
+            continue
+        params = message.get('params') or {}
+        name, arguments = params.get('name'), params.get('arguments') or {}
+        response = None
+        if method == 'initialize':
+            response = {'jsonrpc': '2.0', 'id': msg_id, 'result': {'protocolVersion': '2024-11-05', 'capabilities': {}}}
+        elif method == 'tools/list':
+            response = {'jsonrpc': '2.0', 'id': msg_id, 'result': {'tools': [{'name': t} for t in TOOLS]}}
+        elif name == 'browser_navigate':
+            url = arguments.get('url', '')
+            if 'crash' in url and not (args.crash_once and os.path.exists(args.crash_once)):
+                if args.crash_once:
+                    open(args.crash_once, 'w').close()
+                sys.exit(1)
+            if 'hang' in url:
+                continue
+            response = result(msg_id, [{'type': 'text', 'text': f'navigated to {url}'}])
+        elif name == 'browser_screenshot':
+            response = result(msg_id, [{'type': 'image', 'data': IMAGE, 'mimeType': 'image/png'}])
+        elif name == 'hold':
+            held = result(msg_id, [{'type': 'text', 'text': json.dumps(arguments)}])
+            continue
+        elif name == 'echo':
+            response = result(msg_id, [{'type': 'text', 'text': json.dumps(arguments)}])
+        elif name == 'notify':
+            send({'jsonrpc': '2.0', 'method': arguments.get('method'), 'params': {}})
+            response = result(msg_id, [{'type': 'text', 'text': 'sent'}])
+        elif name == 'exit':
+            sys.exit(1)
+        else:
+            response = {'jsonrpc': '2.0', 'id': msg_id, 'error': {'code': -32601, 'message': f'unknown {method} {name}'}}
+        send(response)
+        if held:
+            send(held)
+            held = None
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+from shapely.geometry import box, mapping
+
+import build_hierarchy as bh
+import make_kab_dissolved as mkd
+
+
+def write_kecamatan(path, x):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    feature = {'type': 'Feature', 'properties': {}, 'geometry': mapping(box(x, 0, x + 1, 1))}
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [feature]}))
+
+
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+    data = tmp_path / 'data'
+    prov = data / 'id51_bali'
+    write_kecamatan(prov / 'id5106_bangli' / 'id5106010_susut.geojson', 0)
+    write_kecamatan(prov / 'id5106_bangli' / 'id5106020_bangli.geojson', 1)
+    write_kecamatan(prov / 'id5171_kota_denpasar' / 'id5171010_denpasar_selatan.geojson', 2)
+    monkeypatch.setattr(mkd, 'PUBLIC_DATA', data)
+    return data
+
+
+def read(path):
+    return json.loads(path.read_text())['features']
+
+
+def test_outputs_carry_the_level_properties(data, tmp_path):
+    out = tmp_path / 'out'
+    assert bh.build_hierarchy(out, cache_dir=None)
+    kab = read(out / 'kab_51.geojson')
+    assert [f['properties'] for f in kab] == [
+        {'regency_code': '5106', 'province_code': '51', 'kab_name': 'Bangli'},
+        {'regency_code': '5171', 'province_code': '51', 'kab_name': 'Kota Denpasar'},
+    ]
+    assert [f['properties'] for f in read(out / 'kab_37.geojson')] == [f['properties'] for f in kab]
+    assert [f['properties'] for f in read(out / 'prov_37.geojson')] == [
+        {'prov_id': '51', 'prov_name': 'Bali', 'province_code': '51'}]
+    assert [f['properties'] for f in read(out / 'indonesia.geojson')] == [{'name': 'Indonesia'}]
+    assert not list(out.glob('*.tmp'))
+
+
+def test_failed_write_keeps_the_served_file(tmp_path):
+    out = tmp_path / 'kab_51.geojson'
+    out.write_text('previous')
+    with pytest.raises(TypeError):
+        bh.write_collection(out, [{'bad': object()}], [box(0, 0, 1, 1)])
+    assert out.read_text() == 'previous'
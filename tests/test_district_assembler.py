@@ -0,0 +1,58 @@
+import gzip
+import json
+
+import geojson_processor as gp
+
+
+def village(kec_code, kec_name, x):
+    ring = [[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]
+    return {'type': 'Feature', 'geometry': {'type': 'Polygon', 'coordinates': [ring]},
+            'properties': {'regency_code': 'id5106', 'district_code': kec_code, 'district': kec_name}}
+
+
+def make_fallback_only(tmp_path):
+    dist = tmp_path / 'id51_bali' / 'id5106_bangli'
+    dist.mkdir(parents=True)
+    (dist / 'id5106_bangli.geojson').write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        village('id5106010', 'Susut', 0), village('id5106040', 'Kintamani', 1)]}))
+    return gp.DistrictAssembler(tmp_path)
+
+
+def test_fallback_features_are_enhanced_per_kecamatan(tmp_path):
+    body, _ = make_fallback_only(tmp_path).get('5106')
+    payload = json.loads(gzip.decompress(body))
+    assert payload['source'] == 'fallback'
+    props = [f['properties'] for f in payload['features']]
+    assert [p['kecamatan'] for p in props] == ['Susut', 'Kintamani']
+    assert {p['kab_id'] for p in props} == {'5106'}
+
+
+def test_gzip_and_identity_have_distinct_etags(tmp_path, monkeypatch):
+    monkeypatch.setattr(gp, 'assembler', make_fallback_only(tmp_path))
+    client = gp.app.test_client()
+    url = '/api/district/5106/subdistricts'
+    zipped = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    plain = client.get(url)
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert zipped.headers['ETag'] != plain.headers['ETag']
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+    assert client.get(url, headers={'If-None-Match': zipped.headers['ETag']}).status_code == 200
+    assert client.get(url, headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+
+
+def test_empty_district_is_cached_until_it_changes(tmp_path, monkeypatch):
+    dist = tmp_path / 'id51_bali' / 'id5106_bangli'
+    dist.mkdir(parents=True)
+    (dist / 'id5106010_susut.geojson').write_text(json.dumps({'type': 'FeatureCollection', 'features': []}))
+    assembler = gp.DistrictAssembler(tmp_path)
+    calls = []
+    assemble = assembler.assemble
+    monkeypatch.setattr(assembler, 'assemble', lambda *a: calls.append(a) or assemble(*a))
+    assert assembler.get('5106') is None
+    assert assembler.get('5106') is None
+    assert len(calls) == 1
+
+    (dist / 'id5106040_kintamani.geojson').write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        village('id5106040', 'Kintamani', 0)]}))
+    assert assembler.get('5106') is not None
+    assert len(calls) == 2
@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import shape
+
+from feature_store import FeatureStore
+from geojson_processor import GeoJSONProcessor
+
+SQUARE = [[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0], [0.0, 0.0]]]
+COLLECTION = {
+    'type': 'GeometryCollection',
+    'geometries': [
+        {'type': 'Point', 'coordinates': [5.0, 5.0]},
+        {'type': 'Polygon', 'coordinates': [[[2.0, 2.0], [3.0, 2.0], [3.0, 4.0], [2.0, 2.0]]]},
+    ],
+}
+
+
+def feature(geometry, **properties):
+    return {'type': 'Feature', 'properties': properties, 'geometry': geometry}
+
+
+@pytest.fixture
+def collection():
+    return {'type': 'FeatureCollection', 'features': [
+        feature({'type': 'Polygon', 'coordinates': SQUARE}, village_code='id1', village='A'),
+        feature(COLLECTION, village_code='id2', note='collection'),
+        feature({'type': 'MultiPolygon', 'coordinates': [SQUARE, [[[10.0, 10.0], [11.0, 10.0], [11.0, 11.0],
+                                                                   [10.0, 10.0]]]]}),
+        feature(None),
+    ]}
+
+
+def test_round_trip(collection):
+    store = FeatureStore.from_geojson(collection)
+    assert store.to_geojson() == json.loads(json.dumps(collection))
+
+
+def test_geometry_collection_is_kept_out_of_line(collection):
+    store = FeatureStore.from_geojson(collection)
+    assert store.geometry(1) == COLLECTION
+    geoms = store.to_shapely()
+    assert geoms[1].geom_type == 'GeometryCollection'
+    assert geoms[3] is None
+    assert store.bounds()[1].tolist() == [2.0, 2.0, 5.0, 5.0]
+    assert store.total_bounds() == (0.0, 0.0, 11.0, 11.0)
+    simplified = store.simplify(0.01)
+    assert simplified.types.tolist() == store.types.tolist()
+    assert shape(simplified.geometry(1)).equals(shape(COLLECTION))
+    assert simplified.records[1].get('note') == 'collection'
+
+
+def test_quantized_features_match_full_precision():
+    rng = np.random.default_rng(0)
+    features = []
+    for _ in range(50):
+        ring = np.round(rng.uniform(95, 141, (4, 2)), 7).tolist()
+        features.append(feature({'type': 'Polygon', 'coordinates': [ring + ring[:1]]}))
+    full = FeatureStore.from_geojson(features)
+    quantized = FeatureStore.from_geojson(features, quantize=1e-7)
+    for i in range(len(full)):
+        assert np.allclose(quantized.geometry(i)['coordinates'], full.geometry(i)['coordinates'], atol=1e-7)
+    assert np.allclose(quantized.bounds(), full.bounds(), atol=1e-7)
+
+
+def test_processor_bounds_and_simplify_accept_geometry_collections(tmp_path, collection):
+    path = tmp_path / 'mixed.geojson'
+    path.write_text(json.dumps(collection), encoding='utf-8')
+    processor = GeoJSONProcessor(str(path))
+    assert processor.get_bounds() == {'west': 0.0, 'south': 0.0, 'east': 11.0, 'north': 11.0}
+    assert processor.simplify_geojson(0.01, str(tmp_path / 'out.geojson'))
+    out = json.loads((tmp_path / 'out.geojson').read_text(encoding='utf-8'))
+    assert [f['geometry'] and f['geometry']['type'] for f in out['features']] == \
+        ['Polygon', 'GeometryCollection', 'MultiPolygon', None]
+    records, areas, _ = processor.feature_index()
+    assert len(records) == 4
+    assert areas[1] == pytest.approx(shapely.area(shape(COLLECTION)))
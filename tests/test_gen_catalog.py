@@ -0,0 +1,64 @@
+import json
+
+import gen_catalog
+
+
+def write_collection(path, x):
+    ring = [[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'Polygon', 'coordinates': [ring]}}]}))
+
+
+def make_tree(tmp_path, monkeypatch):
+    data = tmp_path / 'data'
+    dist = data / 'id51_bali' / 'id5106_bangli'
+    dist.mkdir(parents=True)
+    write_collection(dist / 'id5106010_susut.geojson', 0)
+    write_collection(dist / 'id5106_bangli.geojson', 0)
+    (dist / 'id5106_bangli.bundle.json').write_text('{}')
+    (dist / 'id5106_bangli.bundle.idx.json').write_text('{}')
+    other = data / 'id51_bali' / 'id5171_denpasar'
+    other.mkdir()
+    write_collection(other / 'id5171010_denpasar_selatan.geojson', 1)
+    monkeypatch.setattr(gen_catalog, 'PUBLIC_DATA', data)
+    return data
+
+
+def manifest(data, aliases=None):
+    layout = gen_catalog.scan_province(data / 'id51_bali')
+    stats = {str(f): gen_catalog.file_stats(str(f)) for files in layout.values() for f in files}
+    return gen_catalog.province_manifest('51', 'bali', layout, stats, aliases)
+
+
+def test_district_with_bundle_lists_it(tmp_path, monkeypatch):
+    districts = manifest(make_tree(tmp_path, monkeypatch))['districts']
+    assert districts['5106']['bundleFile'] == 'id5106_bangli.bundle.json'
+    assert districts['5106']['bundleIndexFile'] == 'id5106_bangli.bundle.idx.json'
+    assert 'bundleFile' not in districts['5171']
+    assert [s['id'] for s in districts['5106']['subdistricts']] == ['id5106010_susut']
+
+
+def test_aliases_add_hashed_urls(tmp_path, monkeypatch):
+    data = make_tree(tmp_path, monkeypatch)
+    base = '/data/id51_bali/id5106_bangli'
+    aliases = {
+        f'{base}/id5106010_susut.geojson': '/h/susut.1.geojson',
+        f'{base}/id5106_bangli.geojson': '/h/bangli.2.geojson',
+        f'{base}/id5106_bangli.bundle.json': '/h/bangli.3.bundle.json',
+        f'{base}/id5106_bangli.bundle.idx.json': '/h/bangli.4.bundle.idx.json',
+    }
+    district = manifest(data, aliases)['districts']['5106']
+    assert district['subdistricts'][0]['url'] == '/h/susut.1.geojson'
+    assert district['fallbackUrl'] == '/h/bangli.2.geojson'
+    assert district['bundleUrl'] == '/h/bangli.3.bundle.json'
+    assert district['bundleIndexUrl'] == '/h/bangli.4.bundle.idx.json'
+
+
+def test_update_province_drops_urls_without_aliases(tmp_path, monkeypatch):
+    data = make_tree(tmp_path, monkeypatch)
+    out = tmp_path / 'catalog'
+    alias = {'/data/id51_bali/id5106_bangli/id5106010_susut.geojson': '/h/susut.1.geojson'}
+    gen_catalog.update_province(data / 'id51_bali', [], out_dir=out, aliases=alias)
+    gen_catalog.update_province(data / 'id51_bali', [], out_dir=out)
+    written = json.loads((out / 'prov-51.json').read_text())
+    assert 'url' not in written['districts']['5106']['subdistricts'][0]
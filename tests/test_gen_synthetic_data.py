@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+import gen_synthetic_data as gsd
+
+
+def counts(scale):
+    layout = gsd.district_layout(scale)
+    return len(layout), sum(len(regencies) for _, regencies in layout)
+
+
+def test_scale_one_is_the_national_tree_and_larger_scales_exceed_it():
+    assert counts(1) == (gsd.NATIONAL_PROVINCES, gsd.NATIONAL_DISTRICTS)
+    assert counts(0.01) == (1, 5)
+    provinces, districts = counts(100)
+    assert districts == 10 * gsd.NATIONAL_DISTRICTS
+    assert max(len(r) for _, r in gsd.district_layout(100)) <= gsd.MAX_DISTRICTS_PER_PROVINCE
+    with pytest.raises(ValueError):
+        gsd.district_layout(1000)
+
+
+def test_vertices_per_village_grow_above_scale_one(tmp_path, monkeypatch):
+    monkeypatch.setattr(gsd, 'NATIONAL_DISTRICTS', 1)
+    monkeypatch.setattr(gsd, 'NATIONAL_PROVINCES', 1)
+    small = gsd.generate(tmp_path / 'x1', 1, edge_vertices=4)
+    large = gsd.generate(tmp_path / 'x4', 4, edge_vertices=4)
+    assert large['districts'] == 2 * small['districts']
+    assert large['vertices'] / large['villages'] > 1.9 * small['vertices'] / small['villages']
+    national = json.loads((tmp_path / 'x4' / 'national.geojson').read_text())
+    assert len(national['features']) == large['villages']
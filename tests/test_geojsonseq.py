@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+import geojson_processor as gp
+
+
+def square(x, size):
+    ring = [[x, 0], [x + size, 0], [x + size, size], [x, size], [x, 0]]
+    return {'type': 'Feature', 'properties': {'x': x}, 'geometry': {'type': 'Polygon', 'coordinates': [ring]}}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    features = [square(0, 1), square(10, 3), square(20, 2)]
+    (tmp_path / 'squares.geojson').write_text(json.dumps({'type': 'FeatureCollection', 'features': features}))
+    (tmp_path / 'empty.geojson').write_text(json.dumps({'type': 'FeatureCollection', 'features': []}))
+    monkeypatch.setattr(gp, 'processor', gp.GeoJSONProcessor(str(tmp_path / 'squares.geojson')), raising=False)
+    monkeypatch.setattr(gp, 'seq_processors', gp.OrderedDict())
+    return gp.app.test_client()
+
+
+def records(response):
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    return [json.loads(r)['properties']['x'] for r in body.split('\x1e') if r]
+
+
+@pytest.mark.parametrize('order', gp.STREAM_ORDERS)
+def test_empty_collection_streams_nothing(client, order):
+    assert records(client.get(f'/geojsonseq/empty.geojson?order={order}')) == []
+
+
+def test_orders_and_limit(client):
+    assert records(client.get('/geojsonseq/squares.geojson')) == [0, 10, 20]
+    assert records(client.get('/geojsonseq/squares.geojson?order=largest&limit=2')) == [10, 20]
+    assert records(client.get('/geojsonseq/squares.geojson?order=center&center=21,1')) == [20, 10, 0]
+    assert records(client.get('/geojsonseq/squares.geojson?order=file&limit=1')) == [0]
+
+
+def test_bad_arguments_are_rejected(client):
+    assert client.get('/geojsonseq/squares.geojson?limit=-1').status_code == 400
+    assert client.get('/geojsonseq/squares.geojson?order=random').status_code == 400
+    assert client.get('/geojsonseq/squares.geojson?order=center&center=1').status_code == 400
+    assert client.get('/geojsonseq/missing.geojson').status_code == 404
+
+
+@pytest.mark.parametrize('order', gp.STREAM_ORDERS)
+def test_negative_limit_streams_nothing_in_every_order(tmp_path, order):
+    (tmp_path / 'a.geojson').write_text(json.dumps({'type': 'FeatureCollection', 'features': [square(0, 1)]}))
+    assert list(gp.GeoJSONProcessor(str(tmp_path / 'a.geojson')).stream_geojsonseq(order, limit=-1)) == []
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+import make_jawa_timu_kab as mjk
+
+
+def source_text(codes):
+    features = [{'type': 'Feature', 'properties': {'kab_id': c}, 'geometry': None} for c in codes]
+    return json.dumps({'type': 'FeatureCollection', 'features': features})
+
+
+def split(source, out_dir, resolver=None):
+    resolver = resolver or mjk.resolve_schema(str(source))
+    return mjk.split_by_province(str(source), lambda prov: str(out_dir / f'kab_{prov}.geojson'), resolver)
+
+
+def test_split_writes_one_collection_per_province(tmp_path):
+    source = tmp_path / 'national.geojson'
+    source.write_text(source_text(['5106', '3501', '5171']))
+    counts = split(source, tmp_path / 'out')
+    assert sorted(counts.values()) == [1, 2]
+    bali = json.loads((tmp_path / 'out' / 'kab_51.geojson').read_text())
+    assert [f['properties']['kab_id'] for f in bali['features']] == ['5106', '5171']
+    assert not list((tmp_path / 'out').glob('*.tmp'))
+
+
+def test_failed_split_keeps_existing_outputs(tmp_path):
+    out = tmp_path / 'out'
+    out.mkdir()
+    (out / 'kab_51.geojson').write_text('previous')
+    source = tmp_path / 'national.geojson'
+    text = source_text(['5106', '3501'])
+    resolver = mjk.SchemaResolver(district_key='kab_id')
+    source.write_text(text[:text.index('3501')])  # truncated after the first feature
+    with pytest.raises(Exception):
+        split(source, out, resolver)
+    assert (out / 'kab_51.geojson').read_text() == 'previous'
+    assert sorted(p.name for p in out.iterdir()) == ['kab_51.geojson']
+
+
+def test_all_provinces_keeps_existing_files_without_force(tmp_path, monkeypatch, capsys):
+    source = tmp_path / 'national.geojson'
+    source.write_text(source_text(['5106', '3501']))
+    out = tmp_path / 'out'
+    out.mkdir()
+    (out / 'kab_51.geojson').write_text('dissolved')
+    argv = ['make_jawa_timu_kab.py', '--source', str(source), '--all-provinces', '--out-dir', str(out)]
+    monkeypatch.setattr('sys.argv', argv)
+    mjk.main()
+    assert (out / 'kab_51.geojson').read_text() == 'dissolved'
+    assert json.loads((out / 'kab_35.geojson').read_text())['features'][0]['properties']['kab_id'] == '3501'
+    assert '[SKIP]' in capsys.readouterr().out
+
+    monkeypatch.setattr('sys.argv', argv + ['--force'])
+    mjk.main()
+    assert json.loads((out / 'kab_51.geojson').read_text())['features'][0]['properties']['kab_id'] == '5106'
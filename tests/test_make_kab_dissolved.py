@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, box
+
+import make_kab_dissolved as mkd
+
+
+def test_shared_edges_are_a_clean_coverage():
+    top = Polygon([(0, 1), (1, 1), (2, 1), (2, 2), (0, 2)])
+    geoms = np.array([box(0, 0, 1, 1), box(1, 0, 2, 1), top])
+    assert not mkd.interiors_intersect(geoms)
+    assert mkd.is_clean_coverage(geoms)
+
+
+def test_contained_polygon_is_not_a_clean_coverage():
+    geoms = np.array([box(0, 0, 4, 4), box(1, 1, 2, 2)])
+    assert mkd.interiors_intersect(geoms)
+    assert not mkd.is_clean_coverage(geoms)
+
+
+def test_duplicate_polygon_is_not_a_clean_coverage():
+    geoms = np.array([box(0, 0, 1, 1), box(1, 0, 2, 1), box(0, 0, 1, 1)])
+    assert mkd.interiors_intersect(geoms)
+    assert not mkd.is_clean_coverage(geoms)
+
+
+def test_dissolve_falls_back_to_unary_for_contained_polygons():
+    merged, path = mkd.dissolve([box(0, 0, 4, 4), box(1, 1, 2, 2)])
+    assert path == 'unary'
+    assert shapely.is_valid(merged)
+    assert merged.equals(box(0, 0, 4, 4))
+
+
+def test_fallback_without_coverage_is_valid(monkeypatch):
+    # shapely < 2.1 has no coverage_is_valid; the STRtree fallback must reject these too
+    monkeypatch.delattr(shapely, 'coverage_is_valid', raising=False)
+    assert not mkd.is_clean_coverage(np.array([box(0, 0, 4, 4), box(1, 1, 2, 2)]))
+    assert not mkd.is_clean_coverage(np.array([box(0, 0, 1, 1), box(0, 0, 1, 1)]))
+    assert mkd.is_clean_coverage(np.array([box(0, 0, 1, 1), box(1, 0, 2, 1)]))
+
+
+def write_district(prov_dir, name, x):
+    dist = prov_dir / name
+    dist.mkdir(parents=True, exist_ok=True)
+    ring = [[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]
+    (dist / f'{name[:9]}010_kec.geojson').write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'Polygon', 'coordinates': [ring]}}]}))
+    return dist
+
+
+def test_changed_districts_skip_hashing_the_others(tmp_path, monkeypatch):
+    prov = tmp_path / 'data' / 'id51_bali'
+    dists = [write_district(prov, 'id5106_bangli', 0), write_district(prov, 'id5171_denpasar', 1)]
+    monkeypatch.setattr(mkd, 'PUBLIC_DATA', tmp_path / 'data')
+    cache = tmp_path / 'cache'
+    assert mkd.build_province('51', cache_dir=cache)
+
+    hashed = []
+    real_key = mkd.district_input_key
+    monkeypatch.setattr(mkd, 'district_input_key', lambda d, *a: hashed.append(d.name) or real_key(d, *a))
+    write_district(prov, 'id5171_denpasar', 5)
+    assert mkd.build_province('51', cache_dir=cache, changed=[dists[1]])
+    assert hashed == ['id5171_denpasar']
+    out = json.loads((tmp_path / 'data' / 'kab_51.geojson').read_text())
+    assert shapely.bounds(shapely.geometry.shape(out['features'][1]['geometry'])).tolist() == [5, 0, 6, 1]
+
+
+def test_deleted_kecamatan_invalidates_the_trusted_cache(tmp_path, monkeypatch):
+    prov = tmp_path / 'data' / 'id51_bali'
+    dist = write_district(prov, 'id5106_bangli', 0)
+    extra = dist / 'id5106020_kec.geojson'
+    extra.write_text(json.dumps({'type': 'FeatureCollection', 'features': [{'type': 'Feature', 'properties': {},
+                     'geometry': {'type': 'Polygon', 'coordinates': [[[1, 0], [2, 0], [2, 1], [1, 1], [1, 0]]]}}]}))
+    monkeypatch.setattr(mkd, 'PUBLIC_DATA', tmp_path / 'data')
+    cache = tmp_path / 'cache'
+    assert mkd.build_province('51', cache_dir=cache)
+
+    extra.unlink()
+    # The district is not reported as changed, but its file list no longer matches the entry
+    assert mkd.build_province('51', cache_dir=cache, changed=[])
+    out = json.loads((tmp_path / 'data' / 'kab_51.geojson').read_text())
+    assert shapely.bounds(shapely.geometry.shape(out['features'][0]['geometry'])).tolist() == [0, 0, 1, 1]
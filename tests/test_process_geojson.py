@@ -0,0 +1,62 @@
+import json
+
+import process_geojson as pg
+
+
+def kecamatan(kab_id, kec_code=None, name='Susut'):
+    props = {'kab_id': kab_id}
+    if kec_code:
+        props.update({'province_code': 'id51', 'province': 'Bali', 'regency_code': f'id{kec_code[:4]}',
+                      'regency': 'Bangli', 'district_code': f'id{kec_code}', 'district': name})
+    return {'type': 'Feature', 'properties': props, 'geometry': None}
+
+
+def write(path, features):
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': features}))
+    return str(path)
+
+
+def test_filter_compares_kab_id_as_integer(tmp_path):
+    source = write(tmp_path / 'kec.geojson', [kecamatan('5104'), kecamatan('5104 '), kecamatan(5104),
+                                             kecamatan('05104'), kecamatan('5106'), kecamatan(None)])
+    pg.filter_geojson_by_regency('5104', source, str(tmp_path / 'out'))
+    written = json.loads((tmp_path / 'out' / '5104_kecamatan.geojson').read_text())
+    assert [f['properties']['kab_id'] for f in written['features']] == ['5104', '5104 ', 5104, '05104']
+
+
+def test_filter_ignores_regency_code(tmp_path):
+    # Only kab_id is read; a feature whose regency_code matches but kab_id does not is left out
+    source = write(tmp_path / 'kec.geojson', [kecamatan('5106', '5104010'), kecamatan('5104', '5106010')])
+    pg.filter_geojson_by_regency('5104', source, str(tmp_path / 'out'))
+    written = json.loads((tmp_path / 'out' / '5104_kecamatan.geojson').read_text())
+    assert [f['properties']['district_code'] for f in written['features']] == ['id5106010']
+
+
+def test_split_national_writes_the_public_data_layout(tmp_path):
+    source = write(tmp_path / 'kec.geojson', [kecamatan('5106', '5106010', 'Susut'),
+                                             kecamatan('5106', '5106040', 'Kintamani'),
+                                             kecamatan('5106', '5106010', 'Susut'),
+                                             {'type': 'Feature', 'properties': {}, 'geometry': None}])
+    stats = pg.split_national_geojson(source, str(tmp_path / 'data'))
+    assert stats == {'features': 4, 'skipped': 1, 'files': 3}
+    dist = tmp_path / 'data' / 'id51_bali' / 'id5106_bangli'
+    assert sorted(p.name for p in dist.iterdir()) == ['id5106010_susut.geojson', 'id5106040_kintamani.geojson',
+                                                      'id5106_bangli.geojson']
+    assert len(json.loads((dist / 'id5106010_susut.geojson').read_text())['features']) == 2
+    assert len(json.loads((dist / 'id5106_bangli.geojson').read_text())['features']) == 3
+
+    pg.split_national_geojson(source, str(tmp_path / 'plain'), with_fallback=False)
+    assert not (tmp_path / 'plain' / 'id51_bali' / 'id5106_bangli' / 'id5106_bangli.geojson').exists()
+
+
+def test_writer_pool_reopens_closed_files(tmp_path):
+    pool = pg.FeatureWriterPool(max_open=2)
+    paths = [str(tmp_path / 'out' / f'{name}.geojson') for name in 'abc']
+    for round_ in range(3):
+        for path in paths:
+            pool.write(path, json.dumps({'n': round_}))
+        assert len(pool.handles) == 2
+    pool.close()
+    assert pool.handles == {}
+    for path in paths:
+        assert json.loads(open(path).read())['features'] == [{'n': 0}, {'n': 1}, {'n': 2}]
@@ -0,0 +1,56 @@
+import json
+import os
+
+import gen_province_config as gpc
+import publish_hashed as ph
+
+
+def write_tree(data):
+    dist = data / 'id51_bali' / 'id5106_bangli'
+    dist.mkdir(parents=True)
+    feature = {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'Point', 'coordinates': [115, -8]}}
+    (dist / 'id5106010_susut.geojson').write_text(json.dumps({'type': 'FeatureCollection', 'features': [feature]}))
+    (data / 'kab_37.geojson').write_text('{"type":"FeatureCollection","features":[]}')
+    return dist
+
+
+def test_publish_links_instead_of_copying(tmp_path):
+    data = tmp_path / 'data'
+    src = write_tree(data) / 'id5106010_susut.geojson'
+    aliases = ph.publish(data, tmp_path / 'data-hashed')
+    url = aliases['/data/id51_bali/id5106_bangli/id5106010_susut.geojson']
+    target = tmp_path / url.lstrip('/')
+    assert url.startswith('/data-hashed/id51_bali/id5106_bangli/id5106010_susut.')
+    assert os.path.samefile(target, src)
+
+    copied = ph.publish(data, tmp_path / 'copies', copy=True)
+    copy_target = tmp_path / 'copies' / copied['/data/kab_37.geojson'].split('/', 2)[2]
+    assert not os.path.samefile(copy_target, data / 'kab_37.geojson')
+
+
+def test_in_place_rewrite_drops_the_stale_hashed_name(tmp_path):
+    data = tmp_path / 'data'
+    src = write_tree(data) / 'id5106010_susut.geojson'
+    out = tmp_path / 'data-hashed'
+    old = out / ph.publish(data, out)['/data/id51_bali/id5106_bangli/id5106010_susut.geojson'].split('/', 2)[2]
+    with open(src, 'w') as fh:  # same inode as the hashed link
+        fh.write('{"type":"FeatureCollection","features":[]}')
+    new = out / ph.publish(data, out)['/data/id51_bali/id5106_bangli/id5106010_susut.geojson'].split('/', 2)[2]
+    assert not old.exists()
+    assert new.read_text() == src.read_text()
+
+
+def test_province_config_publishes_bundles_in_one_run(tmp_path, monkeypatch):
+    data = tmp_path / 'data'
+    write_tree(data)
+    out = tmp_path / 'data-hashed'
+    ph.write_aliases(out, {'/data/other.geojson': '/data-hashed/other.1.geojson'})
+    monkeypatch.setattr(gpc, 'PUBLIC_DATA', data)
+    ts = gpc.gen_province_ts('51', 'bali', 'Bali', '/data/kab_37.geojson', publish_to=out)
+    aliases = ph.load_aliases(out / ph.ALIASES_FILE)
+    base = '/data/id51_bali/id5106_bangli'
+    for name in ('id5106_bangli.bundle.json', 'id5106_bangli.bundle.idx.json', 'id5106010_susut.geojson'):
+        assert aliases[f'{base}/{name}'] in ts
+        assert (tmp_path / aliases[f'{base}/{name}'].lstrip('/')).exists()
+    assert f"districtsFile: '{aliases['/data/kab_37.geojson']}'" in ts
+    assert aliases['/data/other.geojson'] == '/data-hashed/other.1.geojson'
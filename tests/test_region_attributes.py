@@ -0,0 +1,52 @@
+import json
+import os
+
+from region_attributes import AttributeStore
+from region_index import RegionIndex
+
+
+def write_kecamatan(path, x):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ring = [[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'Polygon', 'coordinates': [ring]}}]}))
+
+
+def make_store(tmp_path):
+    data = tmp_path / 'data'
+    write_kecamatan(data / 'id51_bali' / 'id5106_bangli' / 'id5106010_susut.geojson', 0)
+    write_kecamatan(data / 'id51_bali' / 'id5171_denpasar' / 'id5171010_denpasar_selatan.geojson', 1)
+    stats = tmp_path / 'stats'
+    stats.mkdir()
+    (stats / 'poverty.csv').write_text('code,rate\n5106,5.3\n5171,2.1\n')
+    return AttributeStore(stats, RegionIndex(data, cache_file=None, refresh_interval=0)), data, stats
+
+
+def codes_and_etag(store):
+    body, etag, _ = store.payload('poverty', 'district', '51')
+    return json.loads(body)['codes'], etag
+
+
+def test_payload_cached_until_csv_changes(tmp_path):
+    store, _, stats = make_store(tmp_path)
+    first = store.payload('poverty', 'district', '51')
+    assert store.payload('poverty', 'district', '51') is first
+
+    csv = stats / 'poverty.csv'
+    csv.write_text('code,rate\n5106,9.9\n5171,2.1\n')  # same size
+    st = csv.stat()
+    os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert store.payload('poverty', 'district', '51')[1] != first[1]
+
+
+def test_payload_follows_region_rebuilds(tmp_path):
+    store, data, _ = make_store(tmp_path)
+    codes, etag = codes_and_etag(store)
+    assert codes == ['5106', '5171']
+    version = store.regions.version
+
+    write_kecamatan(data / 'id51_bali' / 'id5103_badung' / 'id5103010_kuta.geojson', 2)
+    codes, new_etag = codes_and_etag(store)
+    assert store.regions.version == version + 1
+    assert codes == ['5103', '5106', '5171']
+    assert new_etag != etag
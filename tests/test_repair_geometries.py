@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+import repair_geometries as rg
+
+
+def repair(*polygons):
+    return rg.repair_geometries(np.array(polygons, dtype=object))
+
+
+def test_bowtie_is_split_into_valid_polygons():
+    out, stats = repair(Polygon([(0, 0), (2, 2), (2, 0), (0, 2), (0, 0)]))
+    assert stats['invalid'] == 1 and stats['fixed'] == 1 and stats['still_invalid'] == 0
+    assert out[0].geom_type == 'MultiPolygon' and out[0].is_valid
+    assert out[0].area == 2
+
+
+def test_repeated_points_are_removed():
+    out, stats = repair(Polygon([(0, 0), (1, 0), (1, 0), (1, 1), (1, 1), (0, 1), (0, 0)]))
+    assert stats['duplicate_vertices'] == 2
+    assert shapely.get_num_coordinates(out[0]) == 5
+
+
+def test_clockwise_exterior_is_reoriented():
+    out, stats = repair(Polygon([(0, 0), (0, 1), (1, 1), (1, 0), (0, 0)]))
+    assert stats['reoriented'] == 1
+    assert out[0].exterior.is_ccw
+
+
+def test_collapsed_polygon_is_reported_and_left_unchanged():
+    flat = Polygon([(0, 0), (1, 1), (2, 2), (0, 0)])
+    good = Polygon([(5, 0), (6, 0), (6, 1), (5, 0)])
+    out, stats = repair(flat, good)
+    assert stats['collapsed'] == 1 and stats['still_invalid'] == 1 and stats['fixed'] == 0
+    assert out[0] is flat
+    assert out[1].is_valid
+
+
+def test_repair_file_rewrites_only_repaired_geometries(tmp_path):
+    path = tmp_path / 'kec.geojson'
+    features = [
+        {'type': 'Feature', 'properties': {'n': 1},
+         'geometry': {'type': 'Polygon', 'coordinates': [[[0, 0], [0, 1], [1, 1], [1, 0], [0, 0]]]}},
+        {'type': 'Feature', 'properties': {'n': 2},
+         'geometry': {'type': 'Polygon', 'coordinates': [[[0, 0], [1, 1], [2, 2], [0, 0]]]}},
+    ]
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': features}))
+    row = rg.repair_file(str(path))
+    assert row['written'] and row['collapsed'] == 1 and row['reoriented'] == 1
+    written = json.loads(path.read_text())['features']
+    assert Polygon(written[0]['geometry']['coordinates'][0]).exterior.is_ccw
+    assert written[1]['geometry'] == features[1]['geometry']
+    assert '[WARN]' in rg.format_row(row, tmp_path)
@@ -0,0 +1,66 @@
+import json
+import threading
+
+from region_index import RegionIndex
+from reverse_geocoder import ReverseGeocoder
+
+
+def write_kecamatan(data, dist, name, villages):
+    path = data / 'id51_bali' / dist / f'{name}.geojson'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    features = []
+    for code, x in villages:
+        ring = [[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]
+        features.append({'type': 'Feature', 'properties': {'village_code': f'id{code}', 'village': f'Desa {code}'},
+                         'geometry': {'type': 'Polygon', 'coordinates': [ring]}})
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': features}))
+
+
+def make_geocoder(tmp_path):
+    data = tmp_path / 'data'
+    write_kecamatan(data, 'id5106_bangli', 'id5106010_susut', [('5106010001', 0), ('5106010002', 1)])
+    return ReverseGeocoder(RegionIndex(data, cache_file=None, refresh_interval=0)), data
+
+
+def test_locate_returns_the_village_chain(tmp_path):
+    geocoder, _ = make_geocoder(tmp_path)
+    chain = geocoder.locate(1.5, 0.5)
+    assert chain['village']['code'] == '5106010002'
+    assert chain['subdistrict']['code'] == '5106010'
+    assert geocoder.locate(9, 9) is None
+
+
+def test_snapshot_survives_a_rebuild(tmp_path):
+    geocoder, data = make_geocoder(tmp_path)
+    idx, snap = geocoder.lookup([1.5], [0.5])
+
+    # A new kecamatan sorts first, so the rebuilt tree numbers its polygons differently
+    write_kecamatan(data, 'id5103_badung', 'id5103010_kuta', [('5103010001', 5), ('5103010002', 6),
+                                                              ('5103010003', 7)])
+    assert geocoder.locate(5.5, 0.5)['village']['code'] == '5103010001'
+    assert geocoder.snapshot is not snap
+    assert geocoder.key(idx[0], snap) == '5106010002'
+    assert geocoder.chain(idx[0], snap)['village']['code'] == '5106010002'
+
+
+def test_lookups_during_rebuilds_stay_consistent(tmp_path):
+    geocoder, data = make_geocoder(tmp_path)
+    errors = []
+
+    def reader():
+        for _ in range(200):
+            try:
+                result = geocoder.locate_many([0.5, 1.5], [0.5, 0.5])
+                if result['results'] != ['5106010001', '5106010002']:
+                    errors.append(result['results'])
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for n in range(10):
+        write_kecamatan(data, 'id5103_badung', f'id51030{n}0_kec', [(f'51030{n}0001', 10 + n)])
+    for t in threads:
+        t.join()
+    assert errors == []
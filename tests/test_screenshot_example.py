@@ -0,0 +1,115 @@
+import asyncio
+import json
+import shlex
+import sys
+from pathlib import Path
+
+import pytest
+
+import screenshot_example as se
+
+FAKE_SERVER = [sys.executable, str(Path(__file__).with_name('fake_mcp_server.py'))]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def started_client():
+    client = se.AsyncMCPClient(FAKE_SERVER)
+    await client.start()
+    tools = await client.initialize(timeout=5)
+    assert 'browser_screenshot' in tools
+    return client
+
+
+def text(response):
+    return json.loads(response['result']['content'][0]['text'])
+
+
+def test_out_of_order_responses_match_their_requests():
+    async def scenario():
+        client = await started_client()
+        try:
+            return await asyncio.gather(client.call_tool('hold', {'tag': 'first'}, timeout=5),
+                                        client.call_tool('echo', {'tag': 'second'}, timeout=5))
+        finally:
+            await client.close()
+
+    first, second = run(scenario())
+    assert text(first) == {'tag': 'first'}
+    assert text(second) == {'tag': 'second'}
+
+
+def test_request_timeout_keeps_session_usable():
+    async def scenario():
+        client = await started_client()
+        try:
+            with pytest.raises(se.MCPError, match='timed out'):
+                await client.call_tool('browser_navigate', {'url': 'https://hang.test'}, timeout=0.2)
+            return await client.call_tool('echo', {'ok': True}, timeout=5)
+        finally:
+            await client.close()
+
+    assert text(run(scenario())) == {'ok': True}
+
+
+def test_server_exit_fails_pending_and_later_requests():
+    async def scenario():
+        client = await started_client()
+        try:
+            with pytest.raises(se.MCPConnectionError):
+                await client.call_tool('exit', timeout=5)
+            with pytest.raises(se.MCPConnectionError):
+                await client.call_tool('echo', timeout=5)
+        finally:
+            await client.close()
+
+    run(scenario())
+
+
+def test_capture_all_restarts_crashed_session(tmp_path):
+    marker = tmp_path / 'crashed'
+    out = tmp_path / 'shots'
+    out.mkdir()
+    cmd = shlex.join(FAKE_SERVER + ['--crash-once', str(marker)])
+    urls = ['https://a.test', 'https://crash.test', 'https://b.test']
+
+    saved = run(se.capture_all(urls, out, sessions=1, ready_timeout=5, server_cmd=cmd))
+    assert marker.exists()
+    assert saved == 3
+    assert sorted(p.name for p in out.iterdir()) == ['a_test.png', 'b_test.png', 'crash_test.png']
+
+
+def test_capture_all_gives_up_on_timeouts(tmp_path):
+    cmd = shlex.join(FAKE_SERVER)
+    saved = run(se.capture_all(['https://hang.test', 'https://a.test'], tmp_path, sessions=1,
+                               ready_timeout=0.3, server_cmd=cmd))
+    assert saved == 1
+
+
+def test_expect_notification_resolves_and_fails_with_the_session():
+    async def scenario():
+        client = await started_client()
+        try:
+            waiter = client.expect_notification('notifications/ready')
+            await client.call_tool('notify', {'method': 'notifications/ready'}, timeout=5)
+            assert (await asyncio.wait_for(waiter, 5))['method'] == 'notifications/ready'
+            pending = client.expect_notification('notifications/never')
+            with pytest.raises(se.MCPConnectionError):
+                await client.call_tool('exit', timeout=5)
+            with pytest.raises(se.MCPConnectionError):
+                await pending
+        finally:
+            await client.close()
+
+    run(scenario())
+
+
+def test_sync_session_captures_a_page(tmp_path):
+    with se.mcp_session(shlex.join(FAKE_SERVER), timeout=5) as client:
+        assert 'browser_navigate' in client.tools
+        assert se.capture_screenshot(client, 'https://a.test', 0, tmp_path)
+        client.timeout = 0.3
+        assert not se.capture_screenshot(client, 'https://hang.test', 1, tmp_path)
+    assert (tmp_path / 'a_test.png').read_bytes() == b'\x89PNG fake'
@@ -0,0 +1,37 @@
+import json
+
+import gen_province_config as gpc
+import watch_data
+
+
+def write_kecamatan(dist, stem, x):
+    ring = [[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]
+    (dist / f'{stem}.geojson').write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'kec': stem}, 'geometry': {'type': 'Polygon', 'coordinates': [ring]}}]}))
+
+
+def bundle_ids(dist):
+    bundle = json.loads((dist / f'{dist.name}{gpc.BUNDLE_SUFFIX}').read_text())
+    return [s['id'] for s in bundle['subdistricts']]
+
+
+def test_changed_district_bundle_is_rebuilt(tmp_path):
+    dist = tmp_path / 'id51_bali' / 'id5106_bangli'
+    dist.mkdir(parents=True)
+    write_kecamatan(dist, 'id5106010_susut', 0)
+    gpc.write_district_bundle(dist, ['id5106010_susut'])
+
+    write_kecamatan(dist, 'id5106020_tembuku', 1)
+    watch_data.rebuild_bundle(dist)
+    assert bundle_ids(dist) == ['id5106010_susut', 'id5106020_tembuku']
+    index = json.loads((dist / f'{dist.name}{gpc.BUNDLE_INDEX_SUFFIX}').read_text())
+    assert sorted(index) == ['id5106010_susut', 'id5106020_tembuku']
+    assert not list(dist.glob('*.tmp'))
+
+
+def test_district_without_bundle_gets_none(tmp_path):
+    dist = tmp_path / 'id51_bali' / 'id5106_bangli'
+    dist.mkdir(parents=True)
+    write_kecamatan(dist, 'id5106010_susut', 0)
+    watch_data.rebuild_bundle(dist)
+    assert not (dist / f'{dist.name}{gpc.BUNDLE_SUFFIX}').exists()